@@ -0,0 +1,171 @@
+#!/usr/bin/env python3.11
+"""Compares the size and encode/decode latency of the cached models when
+serialised with pickle (the `SimpleRedisCache` default) against the
+`DataclassCodec` used by the Redis caches.
+
+Usage: python -m benchmarks.cache_codec [iterations]
+"""
+from __future__ import annotations
+
+import pickle
+import sys
+import time
+from datetime import datetime
+from typing import Any
+from typing import Callable
+
+from rgdps.common.cache.codec import DataclassCodec
+from rgdps.constants.levels import LevelDemonDifficulty
+from rgdps.constants.levels import LevelDifficulty
+from rgdps.constants.levels import LevelLength
+from rgdps.constants.levels import LevelPublicity
+from rgdps.constants.levels import LevelSearchFlag
+from rgdps.constants.songs import SongSource
+from rgdps.constants.users import DEFAULT_PRIVILEGES
+from rgdps.constants.users import UserPrivacySetting
+from rgdps.models.level import Level
+from rgdps.models.song import Song
+from rgdps.models.user import User
+
+DEFAULT_ITERATIONS = 100_000
+
+
+def sample_user() -> User:
+    return User(
+        id=1_234_567,
+        username="RealistikDash",
+        email="realistikdash@example.com",
+        password="$2b$12$" + "N" * 53,
+        privileges=DEFAULT_PRIVILEGES,
+        message_privacy=UserPrivacySetting.PUBLIC,
+        friend_privacy=UserPrivacySetting.PUBLIC,
+        comment_privacy=UserPrivacySetting.PUBLIC,
+        youtube_name=None,
+        twitter_name="RealistikDash",
+        twitch_name=None,
+        register_ts=datetime.now(),
+        stars=12_345,
+        demons=120,
+        primary_colour=12,
+        secondary_colour=3,
+        display_type=0,
+        icon=98,
+        ship=40,
+        ball=30,
+        ufo=20,
+        wave=10,
+        robot=5,
+        spider=3,
+        explosion=11,
+        glow=True,
+        creator_points=15,
+        coins=140,
+        user_coins=300,
+        diamonds=8_000,
+    )
+
+
+def sample_level() -> Level:
+    return Level(
+        id=9_876_543,
+        name="Bloodbath",
+        user_id=1_234_567,
+        description="VmVyaWZpZWQgYnkgUmlvdA==",
+        custom_song_id=None,
+        official_song_id=15,
+        version=3,
+        length=LevelLength.XL,
+        two_player=False,
+        publicity=LevelPublicity.PUBLIC,
+        render_str="",
+        game_version=21,
+        binary_version=35,
+        upload_ts=datetime.now(),
+        update_ts=datetime.now(),
+        original_id=None,
+        downloads=10_000_000,
+        likes=500_000,
+        stars=10,
+        difficulty=LevelDifficulty.INSANE,
+        demon_difficulty=LevelDemonDifficulty.EXTREME,
+        coins=0,
+        coins_verified=False,
+        requested_stars=10,
+        feature_order=1,
+        search_flags=LevelSearchFlag.EPIC,
+        low_detail_mode=True,
+        object_count=60_000,
+        copy_password=0,
+        building_time=3_600,
+        update_locked=False,
+        deleted=False,
+        data_security_hash="a" * 40,
+        data_size=500_000,
+        data_hash="b" * 64,
+    )
+
+
+def sample_song() -> Song:
+    return Song(
+        id=467_339,
+        name="At the Speed of Light",
+        author_id=9,
+        author="Dimrain47",
+        author_youtube=None,
+        size=9.56,
+        download_url="https://audio.ngfiles.com/467000/467339_At_the_Speed_of_Light_FINA.mp3",
+        source=SongSource.BOOMLINGS,
+        blocked=False,
+    )
+
+
+def time_us(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1_000_000 / iterations
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS
+
+    print(
+        f"{'model':>6} {'codec':>9} {'bytes':>6} {'encode us':>10} {'decode us':>10}",
+    )
+
+    for name, obj in (
+        ("user", sample_user()),
+        ("level", sample_level()),
+        ("song", sample_song()),
+    ):
+        codec = DataclassCodec(type(obj))
+        pickled = pickle.dumps(obj)
+        encoded = codec.encode(obj)
+        assert codec.decode(encoded) == obj
+
+        for codec_name, data, encode, decode in (
+            (
+                "pickle",
+                pickled,
+                lambda: pickle.dumps(obj),
+                lambda: pickle.loads(pickled),
+            ),
+            (
+                "dataclass",
+                encoded,
+                lambda: codec.encode(obj),
+                lambda: codec.decode(encoded),
+            ),
+        ):
+            encode_us = time_us(encode, iterations)
+            decode_us = time_us(decode, iterations)
+            print(
+                f"{name:>6} {codec_name:>9} {len(data):>6} "
+                f"{encode_us:>10.2f} {decode_us:>10.2f}",
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
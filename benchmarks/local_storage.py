@@ -0,0 +1,109 @@
+#!/usr/bin/env python3.11
+"""Measures the event loop latency while large blobs are saved and loaded in
+parallel, comparing file I/O performed directly on the event loop (as
+`LocalStorage` did previously) against the current thread pool offloading.
+
+A probe task repeatedly sleeps for a millisecond, recording how late it is
+woken up. Any time spent blocking the loop shows up as probe lag, which is
+what every other request on the worker would experience.
+
+Usage: python -m benchmarks.local_storage [blob MiB] [parallel writes]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from rgdps.services.storage import AbstractStorage
+from rgdps.services.storage import LocalStorage
+
+DEFAULT_BLOB_MIB = 64
+DEFAULT_PARALLEL = 8
+PROBE_INTERVAL = 0.001
+
+
+class BlockingLocalStorage(LocalStorage):
+    # The file I/O as it was before offloading to the thread pool.
+    async def load(self, key: str) -> bytes | None:
+        location = f"{self._root}/{key}"
+        if not os.path.exists(location):
+            return None
+
+        with open(location, "rb") as file:
+            return file.read()
+
+    async def save(self, key: str, data: bytes) -> None:
+        location = f"{self._root}/{key}"
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+
+        with open(location, "wb") as file:
+            file.write(data)
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def benchmark(
+    storage: AbstractStorage,
+    blob: bytes,
+    parallel: int,
+) -> tuple[float, list[float]]:
+    """Returns the total time in seconds and the probe lag in milliseconds."""
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(storage.save(f"saves/{idx}", blob) for idx in range(parallel)),
+    )
+    await asyncio.gather(
+        *(storage.load(f"saves/{idx}") for idx in range(parallel)),
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return elapsed, lags
+
+
+async def main() -> int:
+    blob_mib = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BLOB_MIB
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PARALLEL
+    blob = os.urandom(blob_mib * 1024 * 1024)
+
+    print(f"{parallel} parallel saves and loads of {blob_mib} MiB")
+    print(
+        f"{'storage':>10} {'total s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+    )
+
+    for name, storage_cls in (
+        ("blocking", BlockingLocalStorage),
+        ("offloaded", LocalStorage),
+    ):
+        with tempfile.TemporaryDirectory() as root:
+            storage = storage_cls(root)
+            elapsed, lags = await benchmark(storage, blob, parallel)
+            await storage.disconnect()
+
+        lags.sort()
+        p50 = statistics.median(lags)
+        p99 = lags[int(len(lags) * 0.99)]
+        print(
+            f"{name:>10} {elapsed:>8.2f} {p50:>8.2f} {p99:>8.2f} {lags[-1]:>8.2f}",
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
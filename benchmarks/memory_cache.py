@@ -0,0 +1,146 @@
+#!/usr/bin/env python3.11
+"""Measures the memory usage and operation latency of the in-process caches
+at a large number of entries, comparing the unbounded `SimpleAsyncMemoryCache`
+and the `OrderedDict` based `LRUAsyncMemoryCache` against the plain `dict`
+LRU it replaced.
+
+Memory is measured with `tracemalloc`, with every entry sharing one value so
+that only the overhead of the cache itself (including its keys) is counted.
+The eviction pass then sets `EVICTIONS` new keys into the full cache, which
+is capped as the `dict` LRU slows down with every key evicted (its first key
+has to be found past the gaps left by the previous evictions).
+
+Usage: python -m benchmarks.memory_cache [entries]
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import TypeVar
+
+from rgdps.common.cache.base import AbstractAsyncCache
+from rgdps.common.cache.base import KeyType
+from rgdps.common.cache.memory import LRUAsyncMemoryCache
+from rgdps.common.cache.memory import SimpleAsyncMemoryCache
+from rgdps.common.cache.single_flight import SingleFlight
+
+T = TypeVar("T")
+
+DEFAULT_ENTRIES = 1_000_000
+EVICTIONS = 20_000
+EXPIRY = timedelta(hours=1)
+
+
+class DictLRUAsyncMemoryCache(AbstractAsyncCache[T]):
+    # The LRU cache as it was before using an `OrderedDict`, evicting the
+    # first key of a plain `dict`.
+    def __init__(self, capacity: int, expiry: timedelta | None = None) -> None:
+        self._capacity = capacity
+        self._expiry = expiry.total_seconds() if expiry is not None else None
+        self._cache: dict[str, tuple[T, float | None]] = {}
+        self._loads = SingleFlight()
+
+    async def get(self, key: KeyType) -> T | None:
+        key_str = str(key)
+        entry = self._cache.pop(key_str, None)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return None
+
+        self._cache[key_str] = entry
+        return value
+
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: KeyType, value: T) -> None:
+        key_str = str(key)
+        self._cache.pop(key_str, None)
+
+        while len(self._cache) >= self._capacity:
+            del self._cache[next(iter(self._cache))]
+
+        expires_at = None
+        if self._expiry is not None:
+            expires_at = time.monotonic() + self._expiry
+
+        self._cache[key_str] = (value, expires_at)
+
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        for key, value in items.items():
+            await self.set(key, value)
+
+    async def delete(self, key: KeyType) -> None:
+        self._cache.pop(str(key), None)
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        for key in keys:
+            await self.delete(key)
+
+
+async def measure(
+    cache: AbstractAsyncCache[object],
+    entries: int,
+    evict: bool,
+) -> tuple[float, float, float, float, float | None]:
+    value = object()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for key in range(entries):
+        await cache.set(key, value)
+    set_us = (time.perf_counter() - start) * 1_000_000 / entries
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for key in range(entries):
+        await cache.get(key)
+    get_us = (time.perf_counter() - start) * 1_000_000 / entries
+
+    evict_us = None
+    if evict:
+        start = time.perf_counter()
+        for key in range(entries, entries + EVICTIONS):
+            await cache.set(key, value)
+        evict_us = (time.perf_counter() - start) * 1_000_000 / EVICTIONS
+
+    return memory / (1024 * 1024), memory / entries, set_us, get_us, evict_us
+
+
+async def main() -> int:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENTRIES
+
+    print(f"{entries} entries")
+    print(
+        f"{'cache':>14} {'MiB':>8} {'B/entry':>8} {'set us':>7} "
+        f"{'get us':>7} {'evict us':>9}",
+    )
+
+    for name, cache, evict in (
+        ("simple", SimpleAsyncMemoryCache[object](), False),
+        ("dict lru", DictLRUAsyncMemoryCache[object](entries, EXPIRY), True),
+        ("ordered lru", LRUAsyncMemoryCache[object](entries, EXPIRY), True),
+    ):
+        memory_mib, entry_bytes, set_us, get_us, evict_us = await measure(
+            cache,
+            entries,
+            evict,
+        )
+        evict_str = f"{evict_us:.2f}" if evict_us is not None else "-"
+        print(
+            f"{name:>14} {memory_mib:>8.1f} {entry_bytes:>8.0f} {set_us:>7.2f} "
+            f"{get_us:>7.2f} {evict_str:>9}",
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3.11
+"""Measures the size and latency tradeoffs of the storage blob codec at each
+zlib compression level.
+
+By default, synthetic level data (base64 encoded gzip, as sent by the game)
+and save data (repetitive key/value text) are used. Passing a directory
+benchmarks every file within it instead, such as the `levels` directory of a
+local storage root.
+
+Usage: python -m benchmarks.storage_codec [directory]
+"""
+from __future__ import annotations
+
+import base64
+import gzip
+import os
+import random
+import sys
+import time
+
+from rgdps.services.storage import decode_blob
+from rgdps.services.storage import encode_blob
+
+COMPRESSION_LEVELS = (1, 3, 6, 9)
+ITERATIONS = 5
+
+
+def synthetic_level(object_count: int) -> bytes:
+    objects = ";".join(
+        f"1,{random.randint(1, 1900)},2,{random.randint(0, 30000)},"
+        f"3,{random.randint(0, 3000)},57,{random.randint(1, 20)}"
+        for _ in range(object_count)
+    )
+    level_string = f"kS38,1_40_2_125_3_255_11_255_12_255_13_255_4_-1_6_1000;{objects};"
+    return base64.urlsafe_b64encode(gzip.compress(level_string.encode()))
+
+
+def synthetic_save(entries: int) -> bytes:
+    return ";".join(
+        f"<k>k_{idx}</k><d><k>kCEK</k><i>4</i><k>k1</k><i>{random.randint(1, 10**8)}</i>"
+        f"<k>k2</k><s>Level {idx}</s><k>k4</k><s>{random.randint(0, 2)}</s></d>"
+        for idx in range(entries)
+    ).encode()
+
+
+def load_samples(directory: str | None) -> dict[str, list[bytes]]:
+    if directory is not None:
+        samples = []
+        for root, _, files in os.walk(directory):
+            for file in files:
+                with open(os.path.join(root, file), "rb") as f:
+                    samples.append(decode_blob(f.read()))
+
+        return {directory: samples}
+
+    return {
+        "small levels": [synthetic_level(500) for _ in range(50)],
+        "large levels": [synthetic_level(50_000) for _ in range(5)],
+        "saves": [synthetic_save(50_000)],
+    }
+
+
+def benchmark(samples: list[bytes], level: int) -> tuple[float, float, float]:
+    """Returns the compression ratio, and the mean encode and decode time in
+    milliseconds per blob."""
+
+    raw_size = sum(len(sample) for sample in samples)
+    encoded = [encode_blob(sample, level) for sample in samples]
+    encoded_size = sum(len(blob) for blob in encoded)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for sample in samples:
+            encode_blob(sample, level)
+    encode_ms = (time.perf_counter() - start) * 1000 / ITERATIONS / len(samples)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for blob in encoded:
+            decode_blob(blob)
+    decode_ms = (time.perf_counter() - start) * 1000 / ITERATIONS / len(samples)
+
+    return encoded_size / raw_size, encode_ms, decode_ms
+
+
+def main() -> int:
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+
+    for name, samples in load_samples(directory).items():
+        if not samples:
+            continue
+
+        mean_size = sum(len(sample) for sample in samples) / len(samples)
+        print(f"{name}: {len(samples)} blobs, mean size {mean_size / 1024:.1f} KiB")
+        print(f"{'level':>7} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+
+        for level in COMPRESSION_LEVELS:
+            ratio, encode_ms, decode_ms = benchmark(samples, level)
+            print(f"{level:>7} {ratio:>7.3f} {encode_ms:>10.3f} {decode_ms:>10.3f}")
+
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+ALTER TABLE `levels` DROP INDEX `modified_ts`, DROP COLUMN `modified_ts`;
+ALTER TABLE `users` DROP INDEX `modified_ts`, DROP COLUMN `modified_ts`;
@@ -0,0 +1,2 @@
+ALTER TABLE `levels` ADD COLUMN `modified_ts` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, ADD INDEX `modified_ts` (`modified_ts`);
+ALTER TABLE `users` ADD COLUMN `modified_ts` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, ADD INDEX `modified_ts` (`modified_ts`);
@@ -0,0 +1 @@
+ALTER TABLE `levels` DROP COLUMN `data_security_hash`, DROP COLUMN `data_size`;
@@ -0,0 +1 @@
+ALTER TABLE `levels` ADD COLUMN `data_security_hash` CHAR(40) NULL DEFAULT NULL, ADD COLUMN `data_size` INT UNSIGNED NOT NULL DEFAULT 0;
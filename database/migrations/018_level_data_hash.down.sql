@@ -0,0 +1 @@
+ALTER TABLE `levels` DROP INDEX `data_hash`, DROP COLUMN `data_hash`;
@@ -0,0 +1 @@
+ALTER TABLE `levels` ADD COLUMN `data_hash` CHAR(64) NULL DEFAULT NULL, ADD INDEX `data_hash` (`data_hash`);
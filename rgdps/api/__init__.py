@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import urllib.parse
-import uuid
+from datetime import timedelta
 
 import httpx
 from databases import DatabaseURL
@@ -14,21 +15,35 @@ from fastapi.responses import Response
 from fastapi_limiter import FastAPILimiter
 from meilisearch_python_async import Client as MeiliClient
 from redis.asyncio import Redis
-from starlette.middleware.base import RequestResponseEndpoint
 
 from . import context
 from . import gd
 from . import pubsub
 from . import responses
+from .middleware import RequestMiddleware
 from rgdps import logger
-from rgdps.common.cache.memory import SimpleAsyncMemoryCache
-from rgdps.common.cache.redis import SimpleRedisCache
+from rgdps.common.cache.base import AbstractAsyncCache
+from rgdps.common.cache.base import CacheMetrics
+from rgdps.common.cache.codec import DataclassCodec
+from rgdps.common.cache.disk import SizedLRUAsyncDiskCache
+from rgdps.common.cache.memory import LRUAsyncMemoryCache
+from rgdps.common.cache.memory import SizedLRUAsyncMemoryCache
+from rgdps.common.cache.redis import LayeredRedisCache
+from rgdps.common.cache.tiered import TieredAsyncCache
 from rgdps.config import config
 from rgdps.constants.responses import GenericResponse
+from rgdps.models.level import Level
+from rgdps.models.song import Song
+from rgdps.models.user import User
+from rgdps.services.meili import MeiliIndexQueue
 from rgdps.services.mysql import MySQLService
 from rgdps.services.pubsub import listen_pubsubs
+from rgdps.services.storage import CompressedStorage
 from rgdps.services.storage import LocalStorage
 from rgdps.services.storage import S3Storage
+from rgdps.usecases import levels
+
+CACHE_METRICS_INTERVAL = 60
 
 
 def init_logging() -> None:
@@ -105,7 +120,7 @@ def init_redis(app: FastAPI) -> None:
     async def on_startup() -> None:
         await app.state.redis.initialize()
         shared_ctx = context.PubsubContext(app)
-        await listen_pubsubs(
+        app.state.pubsub_listener = await listen_pubsubs(
             shared_ctx,
             app.state.redis,
             pubsub.router,
@@ -127,6 +142,7 @@ def init_redis(app: FastAPI) -> None:
 
     @app.on_event("shutdown")
     async def on_shutdown() -> None:
+        await app.state.pubsub_listener.stop()
         await app.state.redis.close()
 
 
@@ -136,10 +152,16 @@ def init_meili(app: FastAPI) -> None:
         config.meili_key,
         timeout=10,
     )
+    app.state.meili_queue = MeiliIndexQueue(
+        app.state.meili,
+        batch_size=config.meili_queue_batch_size,
+        flush_interval=config.meili_queue_flush_interval,
+    )
 
     @app.on_event("startup")
     async def startup() -> None:
         await app.state.meili.health()
+        app.state.meili_queue.start()
         logger.info(
             "Connected to the MeiliSearch database.",
             extra={
@@ -147,9 +169,13 @@ def init_meili(app: FastAPI) -> None:
             },
         )
 
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        await app.state.meili_queue.stop()
+
 
 def init_s3_storage(app: FastAPI) -> None:
-    app.state.storage = S3Storage(
+    s3_storage = S3Storage(
         region=config.s3_region,
         endpoint=config.s3_endpoint,
         access_key=config.s3_access_key,
@@ -157,11 +183,17 @@ def init_s3_storage(app: FastAPI) -> None:
         bucket=config.s3_bucket,
         retries=10,
         timeout=5,
+        upload_concurrency=config.s3_upload_concurrency,
+        upload_memory_budget=config.s3_upload_memory_budget,
+    )
+    app.state.storage = CompressedStorage(
+        s3_storage,
+        level=config.storage_compression_level,
     )
 
     @app.on_event("startup")
     async def startup() -> None:
-        app.state.storage = await app.state.storage.connect()
+        await s3_storage.connect()
         logger.info(
             "Connected to S3 storage.",
             extra={
@@ -172,18 +204,27 @@ def init_s3_storage(app: FastAPI) -> None:
 
     @app.on_event("shutdown")
     async def shutdown() -> None:
-        await app.state.storage.disconnect()
+        await s3_storage.disconnect()
 
 
 def init_local_storage(app: FastAPI) -> None:
-    app.state.storage = LocalStorage(
+    local_storage = LocalStorage(
         root=config.local_root,
+        io_threads=config.local_io_threads,
+    )
+    app.state.storage = CompressedStorage(
+        local_storage,
+        level=config.storage_compression_level,
     )
 
     @app.on_event("startup")
     async def startup() -> None:
         logger.info("Connected to the local storage.")
 
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        await local_storage.disconnect()
+
 
 def init_http(app: FastAPI) -> None:
     app.state.http = httpx.AsyncClient()
@@ -194,90 +235,250 @@ def init_http(app: FastAPI) -> None:
 
 
 def init_cache_stateful(app: FastAPI) -> None:
-    app.state.user_cache = SimpleAsyncMemoryCache()
-    app.state.password_cache = SimpleAsyncMemoryCache()
+    caches = {
+        "user": LRUAsyncMemoryCache(
+            capacity=config.cache_user_capacity,
+            expiry=timedelta(seconds=config.cache_user_ttl),
+        ),
+        "user_name": LRUAsyncMemoryCache(
+            capacity=config.cache_user_capacity,
+            expiry=timedelta(seconds=config.cache_user_ttl),
+        ),
+        "password": LRUAsyncMemoryCache(
+            capacity=config.cache_password_capacity,
+            expiry=timedelta(seconds=config.cache_password_ttl),
+        ),
+        "level": LRUAsyncMemoryCache(
+            capacity=config.cache_level_capacity,
+            expiry=timedelta(seconds=config.cache_level_ttl),
+        ),
+        "song": LRUAsyncMemoryCache(
+            capacity=config.cache_song_capacity,
+            expiry=timedelta(seconds=config.cache_song_ttl),
+        ),
+        "song_miss": LRUAsyncMemoryCache(
+            capacity=config.cache_song_capacity,
+            expiry=timedelta(seconds=config.cache_song_miss_ttl),
+        ),
+    }
+
+    app.state.user_cache = caches["user"]
+    app.state.user_name_cache = caches["user_name"]
+    app.state.password_cache = caches["password"]
+    app.state.level_cache = caches["level"]
+    app.state.song_cache = caches["song"]
+    app.state.song_miss_cache = caches["song_miss"]
+
+    @app.on_event("startup")
+    async def startup() -> None:
+        app.state.cache_metrics_task = asyncio.create_task(
+            _log_memory_cache_metrics(caches),
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        app.state.cache_metrics_task.cancel()
 
     logger.info("Initialised stateful caching.")
 
 
 def init_cache_stateless(app: FastAPI) -> None:
-    app.state.user_cache = SimpleRedisCache(
+    # Each cache keeps a small in-process layer in front of Redis, kept
+    # consistent across processes through pubsub (see `pubsub.py`).
+    local_expiry = timedelta(seconds=config.cache_local_ttl)
+
+    user_codec = DataclassCodec(User)
+    level_codec = DataclassCodec(Level)
+    song_codec = DataclassCodec(Song)
+
+    app.state.user_cache = LayeredRedisCache(
         redis=app.state.redis,
         key_prefix="rgdps:cache:user",
+        deserialise=user_codec.decode,
+        serialise=user_codec.encode,
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
     )
-    app.state.password_cache = SimpleRedisCache(
+    app.state.user_name_cache = LayeredRedisCache(
+        redis=app.state.redis,
+        key_prefix="rgdps:cache:user_name",
+        deserialise=lambda x: int(x),
+        serialise=lambda x: str(x).encode(),
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
+    )
+    app.state.password_cache = LayeredRedisCache(
         redis=app.state.redis,
         key_prefix="rgdps:cache:password",
         deserialise=lambda x: x.decode(),
         serialise=lambda x: x.encode(),
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
+    )
+    app.state.level_cache = LayeredRedisCache(
+        redis=app.state.redis,
+        key_prefix="rgdps:cache:level",
+        deserialise=level_codec.decode,
+        serialise=level_codec.encode,
+        expiry=timedelta(seconds=config.cache_level_ttl),
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
+    )
+    app.state.song_cache = LayeredRedisCache(
+        redis=app.state.redis,
+        key_prefix="rgdps:cache:song",
+        deserialise=song_codec.decode,
+        serialise=song_codec.encode,
+        expiry=timedelta(seconds=config.cache_song_ttl),
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
+    )
+    app.state.song_miss_cache = LayeredRedisCache(
+        redis=app.state.redis,
+        key_prefix="rgdps:cache:song_miss",
+        deserialise=lambda x: x == b"1",
+        serialise=lambda x: b"1" if x else b"0",
+        expiry=timedelta(seconds=config.cache_song_miss_ttl),
+        local_capacity=config.cache_local_capacity,
+        local_expiry=local_expiry,
     )
 
     logger.info("Initialised stateless caching.")
 
 
-def init_routers(app: FastAPI) -> None:
-    import rgdps.api
+def _cache_metrics_extra(metrics: CacheMetrics) -> dict[str, int | float]:
+    return {
+        "hits": metrics.hits,
+        "misses": metrics.misses,
+        "hit_ratio": metrics.hit_ratio,
+        "hit_bytes": metrics.hit_bytes,
+        "evictions": metrics.evictions,
+        "size": metrics.size,
+    }
 
-    app.include_router(rgdps.api.gd.router)
 
+async def _log_memory_cache_metrics(
+    caches: dict[str, LRUAsyncMemoryCache],
+) -> None:
+    while True:
+        await asyncio.sleep(CACHE_METRICS_INTERVAL)
 
-def init_middlewares(app: FastAPI) -> None:
-    @app.middleware("http")
-    async def mysql_transaction(request: Request, call_next):
-        logger.debug(
-            "Opened a new MySQL transaction for request.",
-            extra={
-                "uuid": request.state.uuid,
-            },
+        for name, cache in caches.items():
+            logger.info(
+                "Memory cache metrics.",
+                extra={
+                    "cache": name,
+                    "count": len(cache),
+                    **_cache_metrics_extra(cache.metrics),
+                },
+            )
+
+
+async def _log_level_data_cache_metrics(
+    memory_cache: SizedLRUAsyncMemoryCache,
+    disk_cache: SizedLRUAsyncDiskCache | None,
+) -> None:
+    while True:
+        await asyncio.sleep(CACHE_METRICS_INTERVAL)
+
+        logger.info(
+            "Level data memory cache metrics.",
+            extra=_cache_metrics_extra(memory_cache.metrics),
         )
-        async with app.state.mysql.transaction() as sql:
-            request.state.mysql = sql
-            return await call_next(request)
+        if disk_cache is not None:
+            logger.info(
+                "Level data disk cache metrics.",
+                extra=_cache_metrics_extra(disk_cache.metrics),
+            )
+
+
+def init_level_data_cache(app: FastAPI) -> None:
+    # Level data is immutable once stored, so an in-process cache is safe
+    # even when running stateless.
+    memory_cache = SizedLRUAsyncMemoryCache(
+        capacity=config.cache_level_data_capacity,
+    )
+    disk_cache = None
+
+    level_data_cache: AbstractAsyncCache[bytes] = memory_cache
+    if config.cache_level_data_disk_root:
+        disk_cache = SizedLRUAsyncDiskCache(
+            root=config.cache_level_data_disk_root,
+            capacity=config.cache_level_data_disk_capacity,
+        )
+        level_data_cache = TieredAsyncCache(memory_cache, disk_cache)
+
+    app.state.level_data_cache = level_data_cache
+
+    @app.on_event("startup")
+    async def startup() -> None:
+        if disk_cache is not None:
+            await disk_cache.load()
+
+        app.state.level_data_cache_metrics_task = asyncio.create_task(
+            _log_level_data_cache_metrics(memory_cache, disk_cache),
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        app.state.level_data_cache_metrics_task.cancel()
+
+
+async def _flush_level_downloads(
+    ctx: context.PubsubContext,
+    stop: asyncio.Event,
+) -> None:
+    # Flushes once more after `stop` is set, rather than being cancelled, as
+    # increments taken from Redis mid-flush would otherwise be lost.
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(
+                stop.wait(),
+                config.level_downloads_flush_interval,
+            )
+        except asyncio.TimeoutError:
+            pass
 
-    @app.middleware("http")
-    async def enforce_user_agent(
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        # Verifying request header for client endpoints.
-        if str(request.url).startswith(config.http_url_prefix):
-            # GD sends an empty User-Agent header.
-            user_agent = request.headers.get("User-Agent")
-            if user_agent != "":
-                logger.info(
-                    "Client request stopped due to invalid User-Agent header.",
-                    extra={
-                        "url": str(request.url),
-                        "uuid": request.state.uuid,
-                        "user_agent": user_agent,
-                    },
-                )
-                return Response(str(GenericResponse.FAIL))
-
-        return await call_next(request)
-
-    @app.middleware("http")
-    async def exception_logging(
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
         try:
-            return await call_next(request)
-        except Exception as e:
-            logger.exception(
-                f"An exception has occured while processing a request!",
+            flushed_count = await levels.flush_pending_downloads(ctx)
+        except Exception:
+            logger.exception("Failed to flush buffered level downloads.")
+            continue
+
+        if flushed_count:
+            logger.debug(
+                "Flushed buffered level downloads.",
                 extra={
-                    "url": str(request.url),
-                    "method": request.method,
-                    "uuid": request.state.uuid,
+                    "level_count": flushed_count,
                 },
             )
-            raise e
 
-    @app.middleware("http")
-    async def assign_uuid(request: Request, call_next):
-        request.state.uuid = str(uuid.uuid4())
-        return await call_next(request)
+
+def init_level_downloads(app: FastAPI) -> None:
+    @app.on_event("startup")
+    async def startup() -> None:
+        shared_ctx = context.PubsubContext(app)
+        app.state.level_downloads_stop = asyncio.Event()
+        app.state.level_downloads_task = asyncio.create_task(
+            _flush_level_downloads(shared_ctx, app.state.level_downloads_stop),
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        # Performs a final flush. Any increments that fail to flush remain
+        # buffered in Redis and are picked up by the next process.
+        app.state.level_downloads_stop.set()
+        await app.state.level_downloads_task
+
+
+def init_routers(app: FastAPI) -> None:
+    import rgdps.api
+
+    app.include_router(rgdps.api.gd.router)
+
+
+def init_middlewares(app: FastAPI) -> None:
+    app.add_middleware(RequestMiddleware)
 
 
 def init_api() -> FastAPI:
@@ -290,6 +491,9 @@ def init_api() -> FastAPI:
 
     init_events(app)
     init_middlewares(app)
+    # Shutdown handlers run in the order they are registered, and the final
+    # flush of level downloads needs MySQL, Redis and the search queue.
+    init_level_downloads(app)
     init_mysql(app)
     init_redis(app)
     init_meili(app)
@@ -305,6 +509,7 @@ def init_api() -> FastAPI:
     else:
         init_cache_stateful(app)
 
+    init_level_data_cache(app)
     init_routers(app)
 
     return app
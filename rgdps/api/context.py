@@ -10,10 +10,13 @@ from types_aiobotocore_s3 import S3Client
 
 from rgdps.common.cache.base import AbstractAsyncCache
 from rgdps.common.context import Context
+from rgdps.services.meili import MeiliIndexQueue
 from rgdps.services.mysql import AbstractMySQLService
 from rgdps.services.storage import AbstractStorage
 
 if TYPE_CHECKING:
+    from rgdps.models.level import Level
+    from rgdps.models.song import Song
     from rgdps.models.user import User
 
 
@@ -34,6 +37,10 @@ class HTTPContext(Context):
     def meili(self) -> MeiliClient:
         return self.request.app.state.meili
 
+    @property
+    def meili_queue(self) -> MeiliIndexQueue:
+        return self.request.app.state.meili_queue
+
     @property
     def storage(self) -> AbstractStorage:
         return self.request.app.state.storage
@@ -42,6 +49,26 @@ class HTTPContext(Context):
     def user_cache(self) -> "AbstractAsyncCache[User]":
         return self.request.app.state.user_cache
 
+    @property
+    def user_name_cache(self) -> AbstractAsyncCache[int]:
+        return self.request.app.state.user_name_cache
+
+    @property
+    def level_cache(self) -> "AbstractAsyncCache[Level]":
+        return self.request.app.state.level_cache
+
+    @property
+    def level_data_cache(self) -> AbstractAsyncCache[bytes]:
+        return self.request.app.state.level_data_cache
+
+    @property
+    def song_cache(self) -> "AbstractAsyncCache[Song]":
+        return self.request.app.state.song_cache
+
+    @property
+    def song_miss_cache(self) -> AbstractAsyncCache[bool]:
+        return self.request.app.state.song_miss_cache
+
     @property
     def password_cache(self) -> AbstractAsyncCache[str]:
         return self.request.app.state.password_cache
@@ -70,14 +97,42 @@ class PubsubContext(HTTPContext):
     def meili(self) -> MeiliClient:
         return self.state.meili
 
+    @property
+    def meili_queue(self) -> MeiliIndexQueue:
+        return self.state.meili_queue
+
     @property
     def s3(self) -> S3Client | None:
         return self.state.s3
 
+    @property
+    def storage(self) -> AbstractStorage:
+        return self.state.storage
+
     @property
     def user_cache(self) -> "AbstractAsyncCache[User]":
         return self.state.user_cache
 
+    @property
+    def user_name_cache(self) -> AbstractAsyncCache[int]:
+        return self.state.user_name_cache
+
+    @property
+    def level_cache(self) -> "AbstractAsyncCache[Level]":
+        return self.state.level_cache
+
+    @property
+    def level_data_cache(self) -> AbstractAsyncCache[bytes]:
+        return self.state.level_data_cache
+
+    @property
+    def song_cache(self) -> "AbstractAsyncCache[Song]":
+        return self.state.song_cache
+
+    @property
+    def song_miss_cache(self) -> AbstractAsyncCache[bool]:
+        return self.state.song_miss_cache
+
     @property
     def password_cache(self) -> AbstractAsyncCache[str]:
         return self.state.password_cache
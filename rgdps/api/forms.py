@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import urllib.parse
+from typing import AsyncIterator
+
+from fastapi import Request
+
+# The largest size of a field that is read into memory as a whole. Only
+# the fields explicitly streamed may exceed this.
+FORM_MAX_FIELD_SIZE = 64 * 1024
+
+
+class FormError(Exception):
+    """Raised when a streamed form is malformed or exceeds its limits."""
+
+
+class StreamingURLDecoder:
+    """Decodes URL encoded (`application/x-www-form-urlencoded`) data split
+    across arbitrary chunks, holding back percent escapes cut in half."""
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def decode(self, data: bytes) -> bytes:
+        data = self._pending + data
+
+        escape_idx = data.rfind(b"%", -2)
+        if escape_idx != -1:
+            self._pending = data[escape_idx:]
+            data = data[:escape_idx]
+        else:
+            self._pending = b""
+
+        return urllib.parse.unquote_to_bytes(data.replace(b"+", b" "))
+
+    def flush(self) -> bytes:
+        data = self._pending
+        self._pending = b""
+        return urllib.parse.unquote_to_bytes(data.replace(b"+", b" "))
+
+
+class StreamingForm:
+    """Incrementally parses an URL encoded request body, allowing a large field
+    to be streamed rather than loaded into memory. All fields before it are
+    read into `fields`."""
+
+    def __init__(
+        self,
+        request: Request,
+        max_field_size: int = FORM_MAX_FIELD_SIZE,
+    ) -> None:
+        self.fields: dict[str, str] = {}
+
+        self._body = request.stream()
+        self._buffer = b""
+        self._ended = False
+        self._max_field_size = max_field_size
+
+    async def __fill(self) -> bool:
+        """Reads the next body chunk into the buffer, returning `False` if the
+        body has ended."""
+
+        if self._ended:
+            return False
+
+        async for chunk in self._body:
+            if chunk:
+                self._buffer += chunk
+                return True
+
+        self._ended = True
+        return False
+
+    async def __read_until(self, separators: bytes) -> tuple[bytes, bytes]:
+        """Reads up to the first occurence of any of `separators`, returning the
+        data and separator. The separator is empty if the body has ended."""
+
+        while True:
+            indices = [
+                idx
+                for separator in separators
+                if (idx := self._buffer.find(separator)) != -1
+            ]
+            if indices:
+                idx = min(indices)
+                data = self._buffer[:idx]
+                separator = self._buffer[idx : idx + 1]
+                self._buffer = self._buffer[idx + 1 :]
+                return data, separator
+
+            if len(self._buffer) > self._max_field_size:
+                raise FormError("A form field exceeds the maximum size.")
+
+            if not await self.__fill():
+                data = self._buffer
+                self._buffer = b""
+                return data, b""
+
+    async def __read_name(self) -> str | None:
+        """Reads the next field's name, storing it with an empty value if it
+        has no value. Returns `None` if the body has ended."""
+
+        while True:
+            name, separator = await self.__read_until(b"=&")
+            if not name and not separator:
+                return None
+
+            decoded_name = urllib.parse.unquote_plus(name.decode())
+            if separator == b"=":
+                return decoded_name
+
+            if decoded_name:
+                self.fields[decoded_name] = ""
+
+            if not separator:
+                return None
+
+    async def __read_value(self) -> str:
+        value, _ = await self.__read_until(b"&")
+        return urllib.parse.unquote_plus(value.decode())
+
+    async def __stream_value(self) -> AsyncIterator[bytes]:
+        decoder = StreamingURLDecoder()
+
+        while True:
+            separator_idx = self._buffer.find(b"&")
+            if separator_idx != -1:
+                data = self._buffer[:separator_idx]
+                self._buffer = self._buffer[separator_idx + 1 :]
+
+                if decoded := decoder.decode(data) + decoder.flush():
+                    yield decoded
+                return
+
+            if self._buffer:
+                data = self._buffer
+                self._buffer = b""
+
+                if decoded := decoder.decode(data):
+                    yield decoded
+
+            if not await self.__fill():
+                if decoded := decoder.flush():
+                    yield decoded
+                return
+
+    async def stream(self, field: str) -> AsyncIterator[bytes] | None:
+        """Reads fields up to `field`, returning an iterator over its decoded
+        value. Returns `None` if the body ends before the field is found.
+
+        The iterator must be exhausted before any further fields are read."""
+
+        while (name := await self.__read_name()) is not None:
+            if name == field:
+                return self.__stream_value()
+
+            self.fields[name] = await self.__read_value()
+
+        return None
+
+    async def read_remaining(self) -> dict[str, str]:
+        """Reads all remaining fields into `fields`, returning them."""
+
+        while (name := await self.__read_name()) is not None:
+            self.fields[name] = await self.__read_value()
+
+        return self.fields
@@ -9,15 +9,27 @@ from rgdps.api.context import HTTPContext
 from rgdps.common import gd_obj
 from rgdps.constants.errors import ServiceError
 from rgdps.constants.leaderboards import LeaderboardType
+from rgdps.models.user import User
 from rgdps.usecases import leaderboards
 
 
+def _render_leaderboard(leaderboard: list[User]) -> str:
+    return "|".join(
+        gd_obj.dumps(gd_obj.create_profile(user, rank=idx + 1))
+        for idx, user in enumerate(leaderboard)
+    )
+
+
 async def leaderboard_get(
     ctx: HTTPContext = Depends(),
     leaderboard_type: LeaderboardType = Form(..., alias="type"),
 ):
 
-    leaderboard = await leaderboards.get(ctx, leaderboard_type)
+    leaderboard = await leaderboards.get_rendered(
+        ctx,
+        leaderboard_type,
+        render=_render_leaderboard,
+    )
 
     if isinstance(leaderboard, ServiceError):
         logger.info(
@@ -36,7 +48,4 @@ async def leaderboard_get(
         },
     )
 
-    return "|".join(
-        gd_obj.dumps(gd_obj.create_profile(user, rank=idx + 1))
-        for idx, user in enumerate(leaderboard)
-    )
+    return leaderboard
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from fastapi import Depends
 from fastapi import Form
+from fastapi.responses import PlainTextResponse
 
 from rgdps import logger
 from rgdps.api import responses
@@ -119,6 +120,24 @@ async def level_post(
     return str(level.id)
 
 
+def _render_search(search_res: levels.SearchResponse, page: int) -> str:
+    return "#".join(
+        (
+            "|".join(
+                gd_obj.dumps(gd_obj.create_level_minimal(level))
+                for level in search_res.levels
+            ),
+            "|".join(gd_obj.create_user_str(user) for user in search_res.users),
+            "~:~".join(
+                gd_obj.dumps(gd_obj.create_song(song), sep="~|~")
+                for song in search_res.songs
+            ),
+            gd_obj.create_pagination_info(search_res.total, page, PAGE_SIZE),
+            gd_obj.create_search_security_str(search_res.levels),
+        ),
+    )
+
+
 async def levels_get(
     ctx: HTTPContext = Depends(),
     query: str = Form("", alias="str"),
@@ -152,8 +171,9 @@ async def levels_get(
     else:
         followed_list_list = None
 
-    level_res = await levels.search(
+    level_res = await levels.search_rendered(
         ctx,
+        render=lambda search_res: _render_search(search_res, page),
         page=page,
         page_size=PAGE_SIZE,
         query=query,
@@ -206,25 +226,10 @@ async def levels_get(
             "rated": rated,
             "song_id": song_id,
             "custom_song_id": custom_song_id,
-            "result_count": level_res.total,
         },
     )
 
-    return "#".join(
-        (
-            "|".join(
-                gd_obj.dumps(gd_obj.create_level_minimal(level))
-                for level in level_res.levels
-            ),
-            "|".join(gd_obj.create_user_str(user) for user in level_res.users),
-            "~:~".join(
-                gd_obj.dumps(gd_obj.create_song(song), sep="~|~")
-                for song in level_res.songs
-            ),
-            gd_obj.create_pagination_info(level_res.total, page, PAGE_SIZE),
-            gd_obj.create_search_security_str(level_res.levels),
-        ),
-    )
+    return level_res
 
 
 async def level_get(
@@ -250,12 +255,19 @@ async def level_get(
         },
     )
 
-    return "#".join(
-        (
-            gd_obj.dumps(gd_obj.create_level(level_res.level, level_res.data)),
-            gd_obj.create_level_data_security_str(level_res.data),
-            gd_obj.create_level_metadata_security_str_hashed(level_res.level),
-            gd_obj.create_level_metadata_security_str(level_res.level),
+    # The level data is kept as bytes to avoid decoding (and copying) it.
+    return PlainTextResponse(
+        b"#".join(
+            (
+                gd_obj.dumps(gd_obj.create_level(level_res.level)).encode()
+                + b":4:"
+                + level_res.data,
+                level_res.data_security_hash.encode(),
+                gd_obj.create_level_metadata_security_str_hashed(
+                    level_res.level,
+                ).encode(),
+                gd_obj.create_level_metadata_security_str(level_res.level).encode(),
+            ),
         ),
     )
 
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
 from fastapi import Depends
-from fastapi import Form
 from fastapi import Request
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 
 from rgdps import logger
 from rgdps.api import responses
 from rgdps.api.context import HTTPContext
 from rgdps.api.dependencies import password_authenticate_dependency
+from rgdps.api.forms import FormError
+from rgdps.api.forms import StreamingForm
 from rgdps.config import config
 from rgdps.constants.errors import ServiceError
 from rgdps.models.user import User
+from rgdps.usecases import auth
 from rgdps.usecases import save_data
 
 
@@ -19,8 +21,7 @@ async def save_data_get(
     ctx: HTTPContext = Depends(),
     user: User = Depends(password_authenticate_dependency()),
 ):
-    # TODO: Streaming
-    data = await save_data.get(ctx, user.id)
+    data = await save_data.stream(ctx, user.id)
 
     if isinstance(data, ServiceError):
         logger.info(
@@ -38,20 +39,81 @@ async def save_data_get(
             "user_id": user.id,
         },
     )
-    return data
+    return StreamingResponse(data, media_type="text/plain")
 
 
+# The form is parsed manually, as save data may reasonably exceed 200MB and
+# must therefore not be loaded into memory as a whole.
 async def save_data_post(
+    request: Request,
     ctx: HTTPContext = Depends(),
-    user: User = Depends(password_authenticate_dependency()),
-    data: str = Form(..., alias="saveData"),  # Pain.
-    game_version: int = Form(..., alias="gameVersion"),
-    binary_version: int = Form(..., alias="binaryVersion"),
 ):
-    res = await save_data.save(
-        ctx,
-        user.id,
-        data,
+    form = StreamingForm(request)
+
+    try:
+        data = await form.stream("saveData")
+        if data is None:
+            logger.info("Save data upload is missing the save data.")
+            return responses.fail()
+
+        # The user must be authenticated before the save data is streamed into
+        # their save, so only the fields sent before it are available.
+        if "userName" not in form.fields or "password" not in form.fields:
+            logger.info(
+                "Save data upload did not send the credentials before the save data.",
+                extra={
+                    "fields": list(form.fields.keys()),
+                },
+            )
+            return responses.fail()
+
+        user = await auth.authenticate_from_name(
+            ctx,
+            form.fields["userName"],
+            form.fields["password"],
+        )
+        if isinstance(user, ServiceError):
+            logger.debug(
+                "Authentication failed for user.",
+                extra={
+                    "username": form.fields["userName"],
+                    "error": user.value,
+                },
+            )
+            return responses.fail()
+
+        writer = await save_data.open_save(ctx, user.id)
+        try:
+            async for chunk in data:
+                await writer.write(chunk)
+
+            fields = await form.read_remaining()
+        except Exception:
+            await writer.abort()
+            raise
+    except (FormError, ValueError):
+        logger.info(
+            "Failed to parse the save data upload.",
+            exc_info=True,
+        )
+        return responses.fail()
+
+    versions = _parse_versions(fields)
+    if versions is None:
+        await writer.abort()
+        logger.info(
+            "Save data upload is missing valid game and binary versions.",
+            extra={
+                "user_id": user.id,
+                "game_version": fields.get("gameVersion"),
+                "binary_version": fields.get("binaryVersion"),
+            },
+        )
+        return responses.fail()
+
+    game_version, binary_version = versions
+    res = await save_data.finish_save(
+        writer,
         game_version,
         binary_version,
     )
@@ -75,6 +137,13 @@ async def save_data_post(
     return responses.success()
 
 
+def _parse_versions(fields: dict[str, str]) -> tuple[int, int] | None:
+    try:
+        return int(fields["gameVersion"]), int(fields["binaryVersion"])
+    except (KeyError, ValueError):
+        return None
+
+
 # An endpoint that specified which server to use for storing user save data.
 # TODO: Support an external save server.
 async def get_save_endpoint(request: Request) -> str:
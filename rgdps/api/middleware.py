@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import itertools
+import os
+
+from starlette.datastructures import URL
+from starlette.responses import Response
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from rgdps import logger
+from rgdps.config import config
+from rgdps.constants.responses import GenericResponse
+from rgdps.services.mysql import MySQLService
+
+# Request IDs only have to be unique for log correlation, so a random
+# per-process prefix with a counter is enough (and far cheaper than a uuid4).
+_REQUEST_ID_PREFIX = os.urandom(6).hex()
+_request_counter = itertools.count()
+
+
+def _next_request_id() -> str:
+    return f"{_REQUEST_ID_PREFIX}-{next(_request_counter)}"
+
+
+def _get_user_agent(scope: Scope) -> str | None:
+    for key, value in scope["headers"]:
+        if key == b"user-agent":
+            return value.decode("latin-1")
+
+    return None
+
+
+class RequestMiddleware:
+    """A single ASGI middleware handling all per-request concerns:
+    * Assigning the request a unique ID (`request.state.uuid`).
+    * Logging any unhandled exceptions.
+    * Rejecting client requests that do not come from the game.
+    * Providing a per-request MySQL transaction (`request.state.mysql`)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["uuid"] = request_id = _next_request_id()
+
+        try:
+            # Verifying request header for client endpoints.
+            if str(URL(scope=scope)).startswith(config.http_url_prefix):
+                # GD sends an empty User-Agent header.
+                user_agent = _get_user_agent(scope)
+                if user_agent != "":
+                    logger.info(
+                        "Client request stopped due to invalid User-Agent header.",
+                        extra={
+                            "url": str(URL(scope=scope)),
+                            "uuid": request_id,
+                            "user_agent": user_agent,
+                        },
+                    )
+                    response = Response(str(GenericResponse.FAIL))
+                    await response(scope, receive, send)
+                    return
+
+            await self.__call_with_transaction(scope, receive, send)
+        except Exception:
+            logger.exception(
+                f"An exception has occured while processing a request!",
+                extra={
+                    "url": str(URL(scope=scope)),
+                    "method": scope["method"],
+                    "uuid": request_id,
+                },
+            )
+            raise
+
+    async def __call_with_transaction(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        mysql: MySQLService = scope["app"].state.mysql
+
+        # NOTE: The connection and transaction are only acquired once the
+        # request first queries MySQL.
+        sql = mysql.transaction()
+        scope["state"]["mysql"] = sql
+        finished = False
+
+        async def send_after_commit(message: Message) -> None:
+            nonlocal finished
+
+            # The transaction is committed (and its connection released) before
+            # the response is started, so a response is never sent for a write
+            # that fails to commit, nor a connection held while the body (such
+            # as a large save) is streamed.
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                await sql.__aexit__(None, None, None)
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_commit)
+        except BaseException as e:
+            if not finished:
+                finished = True
+                await sql.__aexit__(type(e), e, e.__traceback__)
+            raise
+
+        if not finished:
+            await sql.__aexit__(None, None, None)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from rgdps import logger
+from rgdps.common.cache.redis import INVALIDATION_CHANNEL
+from rgdps.common.cache.redis import LayeredRedisCache
 from rgdps.common.context import Context
 from rgdps.services.pubsub import RedisPubsubRouter
 from rgdps.usecases import leaderboards
@@ -13,7 +15,7 @@ router = RedisPubsubRouter()
 # for easier identification in logging.
 
 
-@router.register("rgdps:ping")
+@router.register("rgdps:ping", concurrency=16)
 async def ping_handler(ctx: Context, data: bytes) -> None:
     logger.debug(
         "Redis received a ping.",
@@ -23,18 +25,44 @@ async def ping_handler(ctx: Context, data: bytes) -> None:
     )
 
 
+@router.register(INVALIDATION_CHANNEL, concurrency=16)
+async def cache_invalidate_handler(ctx: Context, data: bytes) -> None:
+    for cache in (
+        ctx.user_cache,
+        ctx.user_name_cache,
+        ctx.password_cache,
+        ctx.level_cache,
+        ctx.song_cache,
+        ctx.song_miss_cache,
+    ):
+        if isinstance(cache, LayeredRedisCache):
+            await cache.handle_invalidation(data)
+
+
 @router.register("rgdps:levels:sync_meili")
 async def level_sync_meili_handler(ctx: Context, _) -> None:
     logger.debug("Redis received a level sync request.")
     await levels.synchronise_search(ctx)
 
 
+@router.register("rgdps:levels:sync_meili_incremental")
+async def level_sync_meili_incremental_handler(ctx: Context, _) -> None:
+    logger.debug("Redis received an incremental level sync request.")
+    await levels.synchronise_search(ctx, incremental=True)
+
+
 @router.register("rgdps:users:sync_meili")
 async def user_sync_meili_handler(ctx: Context, _) -> None:
     logger.debug("Redis received a user sync request.")
     await users.synchronise_search(ctx)
 
 
+@router.register("rgdps:users:sync_meili_incremental")
+async def user_sync_meili_incremental_handler(ctx: Context, _) -> None:
+    logger.debug("Redis received an incremental user sync request.")
+    await users.synchronise_search(ctx, incremental=True)
+
+
 @router.register("rgdps:leaderboards:sync_stars")
 async def leaderboard_sync_stars_handler(ctx: Context, _) -> None:
     logger.debug("Redis received a leaderboard sync request.")
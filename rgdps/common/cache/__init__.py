@@ -1,5 +1,9 @@
 from __future__ import annotations
 
 from . import base
+from . import codec
+from . import disk
 from . import memory
 from . import redis
+from . import single_flight
+from . import tiered
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC
 from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
 from typing import Generic
+from typing import TYPE_CHECKING
 from typing import TypeVar
 
+if TYPE_CHECKING:
+    from .single_flight import SingleFlight
+
 __all__ = (
     "AbstractAsyncCache",
     "AbstractCache",
+    "CacheMetrics",
     "KeyType",
 )
 
@@ -15,6 +24,25 @@ T = TypeVar("T")
 KeyType = str | int
 
 
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    # The total size of the values returned by hits, where it is known.
+    hit_bytes: int = 0
+    evictions: int = 0
+    # The total size of the values cached, where it is known.
+    size: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+
+        return self.hits / lookups
+
+
 class AbstractCache(ABC, Generic[T]):
     @abstractmethod
     def get(self, key: KeyType) -> T | None:
@@ -30,14 +58,60 @@ class AbstractCache(ABC, Generic[T]):
 
 
 class AbstractAsyncCache(ABC, Generic[T]):
+    # Coalesces concurrent loads of missing keys within `get_or_load`.
+    _loads: SingleFlight[T | None]
+
     @abstractmethod
     async def get(self, key: KeyType) -> T | None:
         ...
 
+    @abstractmethod
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        """Fetches multiple keys at once, returning the results in the same
+        order as the keys (`None` for misses)."""
+        ...
+
     @abstractmethod
     async def set(self, key: KeyType, value: T) -> None:
         ...
 
+    @abstractmethod
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        """Sets multiple keys at once, with the same expiry as `set`."""
+        ...
+
     @abstractmethod
     async def delete(self, key: KeyType) -> None:
+        """Deletes a key, detaching any load of it in progress (see
+        `get_or_load`)."""
         ...
+
+    @abstractmethod
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        ...
+
+    async def get_or_load(
+        self,
+        key: KeyType,
+        load: Callable[[], Awaitable[T | None]],
+    ) -> T | None:
+        """Fetches a key, calling `load` to fetch and cache it on a miss.
+        Concurrent misses of the same key share a single call to `load`.
+
+        Deleting the key while it is being loaded detaches the load, as it may
+        have read the value from before the change that caused the deletion.
+        Its result is not cached, and later misses start a new load."""
+
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        async def load_and_set() -> T | None:
+            task = asyncio.current_task()
+            value = await load()
+            if value is not None and self._loads.is_current(key, task):
+                await self.set(key, value)
+
+            return value
+
+        return await self._loads.do(key, load_and_set)
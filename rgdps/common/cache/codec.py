@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import types
+import typing
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import TypeVar
+
+__all__ = ("DataclassCodec",)
+
+T = TypeVar("T")
+
+# Bumped whenever the encoding itself (rather than a model) changes.
+CODEC_FORMAT_VERSION = 1
+
+Encoder = Callable[[Any], Any]
+Decoder = Callable[[Any], Any]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _encode_datetime(value: datetime) -> float:
+    return value.timestamp()
+
+
+def _unwrap_optional(field_type: Any) -> tuple[Any, bool]:
+    if typing.get_origin(field_type) not in (typing.Union, types.UnionType):
+        return field_type, False
+
+    args = [arg for arg in typing.get_args(field_type) if arg is not type(None)]
+    if len(args) != 1:
+        raise TypeError(f"Unsupported union type {field_type!r}.")
+
+    return args[0], True
+
+
+def _field_converters(field_type: Any) -> tuple[Encoder, Decoder]:
+    field_type, optional = _unwrap_optional(field_type)
+
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        encode: Encoder = lambda value: value.value
+        decode: Decoder = field_type
+    elif field_type is datetime:
+        encode = _encode_datetime
+        decode = datetime.fromtimestamp
+    elif field_type in (int, float, str, bool):
+        return _identity, _identity
+    else:
+        raise TypeError(f"Unsupported field type {field_type!r}.")
+
+    if not optional:
+        return encode, decode
+
+    return (
+        lambda value: encode(value) if value is not None else None,
+        lambda value: decode(value) if value is not None else None,
+    )
+
+
+class DataclassCodec(Generic[T]):
+    """A compact serialisation of a flat dataclass, meant for caching it.
+
+    Values are stored positionally (without field names) as JSON, with enums
+    and datetimes stored as their underlying values. Every encoded value is
+    prefixed with a schema version derived from the dataclass's fields, and
+    values encoded with a different version (eg. by a deploy that changed
+    the model) are decoded as `None`, which the caches treat as a miss."""
+
+    __slots__ = ("_cls", "_names", "_encoders", "_decoders", "_schema_version")
+
+    def __init__(self, cls: type[T]) -> None:
+        self._cls = cls
+
+        type_hints = typing.get_type_hints(cls)
+        fields = dataclasses.fields(cls)  # type: ignore
+
+        self._names = [field.name for field in fields]
+        converters = [_field_converters(type_hints[name]) for name in self._names]
+        self._encoders = [encode for encode, _ in converters]
+        self._decoders = [decode for _, decode in converters]
+
+        schema = f"{CODEC_FORMAT_VERSION};" + ";".join(
+            f"{name}:{type_hints[name]!r}" for name in self._names
+        )
+        self._schema_version = zlib.crc32(schema.encode()).to_bytes(4, "big")
+
+    @property
+    def schema_version(self) -> bytes:
+        return self._schema_version
+
+    def encode(self, obj: T) -> bytes:
+        values = [
+            encode(getattr(obj, name))
+            for name, encode in zip(self._names, self._encoders)
+        ]
+        return (
+            self._schema_version
+            + json.dumps(
+                values,
+                separators=(",", ":"),
+                ensure_ascii=False,
+            ).encode()
+        )
+
+    def decode(self, data: bytes) -> T | None:
+        if data[:4] != self._schema_version:
+            return None
+
+        values = json.loads(data[4:])
+        return self._cls(
+            *(decode(value) for decode, value in zip(self._decoders, values)),
+        )
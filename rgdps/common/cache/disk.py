@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+
+from .base import AbstractAsyncCache
+from .base import CacheMetrics
+from .base import KeyType
+from .single_flight import SingleFlight
+
+__all__ = ("SizedLRUAsyncDiskCache",)
+
+
+def _file_name(key: KeyType) -> str:
+    # Keys may contain characters that are not valid in file names.
+    return hashlib.sha1(str(key).encode()).hexdigest()
+
+
+class SizedLRUAsyncDiskCache(AbstractAsyncCache[bytes]):
+    """An LRU cache of binary values stored as files within a local directory,
+    bounded by their total size in bytes. Meant as a second tier in front of
+    remote storage, as it persists across restarts once `load` is called."""
+
+    __slots__ = (
+        "_root",
+        "_capacity",
+        "_max_value_size",
+        "_index",
+        "_loads",
+        "metrics",
+    )
+
+    def __init__(
+        self,
+        root: str,
+        capacity: int,
+        max_value_size: int | None = None,
+    ) -> None:
+        self._root = root
+        self._capacity = capacity
+        self._max_value_size = (
+            max_value_size if max_value_size is not None else capacity // 16
+        )
+        # File name -> value size, from least to most recently used.
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._loads = SingleFlight()
+        self.metrics = CacheMetrics()
+
+    def __scan(self) -> list[tuple[str, int]]:
+        os.makedirs(self._root, exist_ok=True)
+
+        files = []
+        for entry in os.scandir(self._root):
+            if not entry.is_file():
+                continue
+
+            # Writes interrupted by a restart.
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+                continue
+
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        files.sort()
+        return [(name, size) for _, name, size in files]
+
+    async def load(self) -> None:
+        """Indexes the values already stored within the directory."""
+
+        for name, size in await asyncio.to_thread(self.__scan):
+            self._index[name] = size
+            self.metrics.size += size
+
+        await self.__evict()
+
+    def __read(self, name: str) -> bytes | None:
+        try:
+            with open(f"{self._root}/{name}", "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    async def get(self, key: KeyType) -> bytes | None:
+        name = _file_name(key)
+        if name not in self._index:
+            self.metrics.misses += 1
+            return None
+
+        value = await asyncio.to_thread(self.__read, name)
+        if value is None:
+            # Removed from outside of the cache.
+            self.metrics.size -= self._index.pop(name, 0)
+            self.metrics.misses += 1
+            return None
+
+        if name in self._index:
+            self._index.move_to_end(name)
+
+        self.metrics.hits += 1
+        self.metrics.hit_bytes += len(value)
+        return value
+
+    async def get_many(self, keys: list[KeyType]) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    def __write(self, name: str, value: bytes) -> None:
+        location = f"{self._root}/{name}"
+        temp_location = f"{location}.{uuid.uuid4().hex}.tmp"
+
+        with open(temp_location, "wb") as file:
+            file.write(value)
+        os.replace(temp_location, location)
+
+    def __remove(self, names: list[str]) -> None:
+        for name in names:
+            try:
+                os.remove(f"{self._root}/{name}")
+            except FileNotFoundError:
+                pass
+
+    async def __evict(self) -> None:
+        evicted = []
+        while self._index and self.metrics.size > self._capacity:
+            name, size = self._index.popitem(last=False)
+            self.metrics.size -= size
+            self.metrics.evictions += 1
+            evicted.append(name)
+
+        if evicted:
+            await asyncio.to_thread(self.__remove, evicted)
+
+    async def set(self, key: KeyType, value: bytes) -> None:
+        if len(value) > self._max_value_size:
+            await self.delete(key)
+            return
+
+        name = _file_name(key)
+        await asyncio.to_thread(self.__write, name, value)
+
+        self.metrics.size += len(value) - self._index.pop(name, 0)
+        self._index[name] = len(value)
+        await self.__evict()
+
+    async def set_many(self, items: dict[KeyType, bytes]) -> None:
+        for key, value in items.items():
+            await self.set(key, value)
+
+    async def delete(self, key: KeyType) -> None:
+        await self.delete_many([key])
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        removed = []
+        for key in keys:
+            self._loads.forget(key)
+            name = _file_name(key)
+            size = self._index.pop(name, None)
+            if size is None:
+                continue
+
+            self.metrics.size -= size
+            removed.append(name)
+
+        if removed:
+            await asyncio.to_thread(self.__remove, removed)
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import time
+from collections import OrderedDict
 from copy import copy
+from datetime import timedelta
 from typing import TypeVar
 
 from .base import AbstractAsyncCache
 from .base import AbstractCache
+from .base import CacheMetrics
 from .base import KeyType
+from .single_flight import SingleFlight
 
 __all__ = (
     "SimpleMemoryCache",
     "LRUMemoryCache",
     "SimpleAsyncMemoryCache",
     "LRUAsyncMemoryCache",
+    "SizedLRUAsyncMemoryCache",
 )
 
 T = TypeVar("T")
@@ -51,7 +57,7 @@ class SimpleMemoryCache(AbstractCache[T]):
 
 
 class LRUMemoryCache(AbstractCache[T]):
-    __slots__ = ("_cache", "_max_size")
+    __slots__ = ("_cache", "_capacity")
 
     def __init__(self, capacity: int) -> None:
         self._capacity = capacity
@@ -84,48 +90,175 @@ class LRUMemoryCache(AbstractCache[T]):
 
 # Async variants
 class SimpleAsyncMemoryCache(AbstractAsyncCache[T]):
-    __slots__ = ("_cache",)
+    __slots__ = ("_cache", "_loads")
 
     def __init__(self) -> None:
         self._cache: dict[str, T] = {}
+        self._loads = SingleFlight()
 
     async def get(self, key: KeyType) -> T | None:
         return self._cache.get(_ensure_key_type(key))
 
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        return [self._cache.get(_ensure_key_type(key)) for key in keys]
+
     async def set(self, key: KeyType, value: T) -> None:
         self._cache[_ensure_key_type(key)] = value
 
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        self._cache.update(
+            (_ensure_key_type(key), value) for key, value in items.items()
+        )
+
     async def delete(self, key: KeyType) -> None:
+        self._loads.forget(key)
         try:
             del self._cache[_ensure_key_type(key)]
         except KeyError:
             pass
 
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        for key in keys:
+            self._loads.forget(key)
+            self._cache.pop(_ensure_key_type(key), None)
+
 
 class LRUAsyncMemoryCache(AbstractAsyncCache[T]):
-    __slots__ = ("_cache", "_max_size")
+    """An LRU cache bounded by its number of entries, with an optional expiry
+    applied to every value. Expired values are dropped once accessed, or
+    evicted like any other value once they become the least recently used."""
 
-    def __init__(self, capacity: int) -> None:
+    __slots__ = ("_cache", "_capacity", "_expiry", "_loads", "metrics")
+
+    def __init__(
+        self,
+        capacity: int,
+        expiry: timedelta | None = None,
+    ) -> None:
         self._capacity = capacity
-        self._cache: dict[str, T] = {}
+        self._expiry = expiry.total_seconds() if expiry is not None else None
+        # Values are stored alongside their expiry timestamp (if any), from
+        # least to most recently used.
+        self._cache: OrderedDict[str, tuple[T, float | None]] = OrderedDict()
+        self._loads = SingleFlight()
+        self.metrics = CacheMetrics()
 
     async def get(self, key: KeyType) -> T | None:
         key_str = _ensure_key_type(key)
-        value = self._cache.get(key_str)
-        if value is not None:
+        entry = self._cache.get(key_str)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
             del self._cache[key_str]
-            self._cache[key_str] = value
+            self.metrics.misses += 1
+            return None
+
+        self._cache.move_to_end(key_str)
+        self.metrics.hits += 1
         return value
 
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        return [await self.get(key) for key in keys]
+
+    def __expires_at(self) -> float | None:
+        if self._expiry is None:
+            return None
+
+        return time.monotonic() + self._expiry
+
+    def __set(self, key: KeyType, value: T, expires_at: float | None) -> None:
+        key_str = _ensure_key_type(key)
+        if key_str in self._cache:
+            self._cache.move_to_end(key_str)
+        else:
+            while len(self._cache) >= self._capacity:
+                self._cache.popitem(last=False)
+                self.metrics.evictions += 1
+
+        self._cache[key_str] = (value, expires_at)
+
     async def set(self, key: KeyType, value: T) -> None:
-        while len(self._cache) >= self._capacity:
-            # Cursed but the most efficient approach for large datasets
-            del self._cache[next(iter(self._cache))]
+        self.__set(key, value, self.__expires_at())
+
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        expires_at = self.__expires_at()
+        for key, value in items.items():
+            self.__set(key, value, expires_at)
+
+    async def delete(self, key: KeyType) -> None:
+        self._loads.forget(key)
+        self._cache.pop(_ensure_key_type(key), None)
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        for key in keys:
+            self._loads.forget(key)
+            self._cache.pop(_ensure_key_type(key), None)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class SizedLRUAsyncMemoryCache(AbstractAsyncCache[bytes]):
+    """An LRU cache of binary values, bounded by their total size in bytes
+    rather than their count. Values larger than `max_value_size` are never
+    cached, so that a single large value cannot evict everything else."""
+
+    __slots__ = ("_cache", "_capacity", "_max_value_size", "_loads", "metrics")
+
+    def __init__(self, capacity: int, max_value_size: int | None = None) -> None:
+        self._capacity = capacity
+        self._max_value_size = (
+            max_value_size if max_value_size is not None else capacity // 16
+        )
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._loads = SingleFlight()
+        self.metrics = CacheMetrics()
+
+    async def get(self, key: KeyType) -> bytes | None:
+        key_str = _ensure_key_type(key)
+        value = self._cache.get(key_str)
+        if value is None:
+            self.metrics.misses += 1
+            return None
+
+        self._cache.move_to_end(key_str)
+        self.metrics.hits += 1
+        self.metrics.hit_bytes += len(value)
+        return value
+
+    async def get_many(self, keys: list[KeyType]) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: KeyType, value: bytes) -> None:
+        await self.delete(key)
+        if len(value) > self._max_value_size:
+            return
+
+        metrics = self.metrics
+        while self._cache and metrics.size + len(value) > self._capacity:
+            _, evicted = self._cache.popitem(last=False)
+            metrics.size -= len(evicted)
+            metrics.evictions += 1
 
         self._cache[_ensure_key_type(key)] = value
+        metrics.size += len(value)
+
+    async def set_many(self, items: dict[KeyType, bytes]) -> None:
+        for key, value in items.items():
+            await self.set(key, value)
 
     async def delete(self, key: KeyType) -> None:
-        try:
-            del self._cache[_ensure_key_type(key)]
-        except KeyError:
-            pass
+        self._loads.forget(key)
+        value = self._cache.pop(_ensure_key_type(key), None)
+        if value is not None:
+            self.metrics.size -= len(value)
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        for key in keys:
+            await self.delete(key)
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import pickle
+import uuid
 from datetime import timedelta
 from typing import Any
 from typing import Callable
@@ -10,10 +11,18 @@ from redis.asyncio import Redis
 
 from .base import AbstractAsyncCache
 from .base import KeyType
+from .memory import LRUAsyncMemoryCache
+from .single_flight import SingleFlight
 
 
 T = TypeVar("T")
-DESERIALISE_FUNCTION = Callable[[bytes], T]
+
+# The pubsub channel on which deletions from a `LayeredRedisCache` are
+# broadcast to all other processes.
+INVALIDATION_CHANNEL = "rgdps:cache:invalidate"
+# Deserialisers may return `None` for data they cannot read (such as data
+# written by an incompatible version), which is treated as a miss.
+DESERIALISE_FUNCTION = Callable[[bytes], T | None]
 SERIALISE_FUNCTION = Callable[[T], bytes]
 
 # Cast functions for common occurrences
@@ -35,6 +44,7 @@ class SimpleRedisCache(AbstractAsyncCache[T]):
         "_serialise",
         "_redis",
         "_expiry",
+        "_loads",
     )
 
     def __init__(
@@ -50,6 +60,7 @@ class SimpleRedisCache(AbstractAsyncCache[T]):
         self._serialise = serialise
         self._redis = redis
         self._expiry = expiry
+        self._loads = SingleFlight()
 
     def __create_key(self, key: KeyType) -> str:
         return f"{self._key_prefix}:{key}"
@@ -67,5 +78,170 @@ class SimpleRedisCache(AbstractAsyncCache[T]):
             return None
         return self._deserialise(data)
 
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        if not keys:
+            return []
+
+        data = await self._redis.mget([self.__create_key(key) for key in keys])
+        return [
+            self._deserialise(value) if value is not None else None for value in data
+        ]
+
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        if not items:
+            return
+
+        # MSET cannot set an expiry, so the individual sets are pipelined.
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(
+                    name=self.__create_key(key),
+                    value=self._serialise(value),
+                    ex=self._expiry,
+                )
+            await pipe.execute()
+
     async def delete(self, key: KeyType) -> None:
+        self._loads.forget(key)
         await self._redis.delete(self.__create_key(key))
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        if not keys:
+            return
+
+        for key in keys:
+            self._loads.forget(key)
+
+        await self._redis.delete(*(self.__create_key(key) for key in keys))
+
+
+class LayeredRedisCache(AbstractAsyncCache[T]):
+    """A small per-process LRU cache in front of a `SimpleRedisCache`, giving
+    most reads in-memory latency while remaining usable with many processes.
+
+    Deletions are broadcast over `INVALIDATION_CHANNEL`, with every other
+    process dropping the key from its own in-process cache once received (see
+    `handle_invalidation`). As a broadcast may be missed (eg. while the pubsub
+    connection is re-established) or race a concurrent read of the old
+    value, in-process values also expire after `local_expiry`, bounding how
+    stale they can be.
+
+    Only deletions are broadcast, as values are only ever set after loading
+    them from their source on a miss. Changes are made by deleting the key."""
+
+    __slots__ = (
+        "_key_prefix",
+        "_redis",
+        "_node_id",
+        "_local",
+        "_remote",
+        "_loads",
+    )
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_prefix: str,
+        deserialise: DESERIALISE_FUNCTION = deserialise_object,
+        serialise: SERIALISE_FUNCTION = serialise_object,
+        expiry: timedelta = timedelta(days=1),
+        local_capacity: int = 1000,
+        local_expiry: timedelta = timedelta(seconds=10),
+    ) -> None:
+        self._key_prefix = key_prefix
+        self._redis = redis
+        # Distinguishes our own broadcasts from those of other processes.
+        self._node_id = uuid.uuid4().hex
+
+        self._local = LRUAsyncMemoryCache[T](
+            capacity=local_capacity,
+            expiry=local_expiry,
+        )
+        self._remote = SimpleRedisCache[T](
+            redis=redis,
+            key_prefix=key_prefix,
+            deserialise=deserialise,
+            serialise=serialise,
+            expiry=expiry,
+        )
+        self._loads = SingleFlight()
+
+    async def get(self, key: KeyType) -> T | None:
+        value = await self._local.get(key)
+        if value is not None:
+            return value
+
+        value = await self._remote.get(key)
+        if value is not None:
+            await self._local.set(key, value)
+
+        return value
+
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        values = await self._local.get_many(keys)
+
+        missing_keys = [key for key, value in zip(keys, values) if value is None]
+        remote_values = dict(
+            zip(missing_keys, await self._remote.get_many(missing_keys)),
+        )
+
+        found_values = {}
+        for idx, key in enumerate(keys):
+            if values[idx] is not None:
+                continue
+
+            value = remote_values[key]
+            if value is not None:
+                found_values[key] = value
+                values[idx] = value
+
+        await self._local.set_many(found_values)
+        return values
+
+    async def set(self, key: KeyType, value: T) -> None:
+        await self._remote.set(key, value)
+        await self._local.set(key, value)
+
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        await self._remote.set_many(items)
+        await self._local.set_many(items)
+
+    def __invalidation_message(self, key: KeyType) -> str:
+        return f"{self._key_prefix} {self._node_id} {key}"
+
+    async def delete(self, key: KeyType) -> None:
+        self._loads.forget(key)
+        await self._remote.delete(key)
+        await self._local.delete(key)
+        await self._redis.publish(
+            INVALIDATION_CHANNEL,
+            self.__invalidation_message(key),
+        )
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        if not keys:
+            return
+
+        for key in keys:
+            self._loads.forget(key)
+
+        await self._remote.delete_many(keys)
+        await self._local.delete_many(keys)
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.publish(INVALIDATION_CHANNEL, self.__invalidation_message(key))
+            await pipe.execute()
+
+    async def handle_invalidation(self, data: bytes) -> None:
+        """Handles a deletion broadcast over `INVALIDATION_CHANNEL`, dropping
+        the key from the in-process cache if it belongs to this cache."""
+
+        key_prefix, node_id, key = data.decode().split(" ", 2)
+        if key_prefix != self._key_prefix or node_id == self._node_id:
+            return
+
+        # A load in progress here may have read the value from before the
+        # other process's change.
+        self._loads.forget(key)
+        await self._local.delete(key)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import Generic
+from typing import TypeVar
+
+from .base import KeyType
+
+__all__ = ("SingleFlight",)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls for the same key, so that only the first
+    caller runs the call and all others await its result (or exception).
+
+    The call runs as its own task, so a caller being cancelled does not
+    cancel it for everyone else. The task runs in an empty context rather
+    than a copy of the first caller's, as the call may outlive the caller
+    and must not share its context variables (such as the connection
+    `databases` binds to the current context)."""
+
+    __slots__ = ("_calls",)
+
+    def __init__(self) -> None:
+        # Keys are converted to strings, matching the caches.
+        self._calls: dict[str, asyncio.Task[T]] = {}
+
+    async def do(self, key: KeyType, call: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        key_str = str(key)
+        task = self._calls.get(key_str)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(
+                call(),
+                context=contextvars.Context(),
+            )
+            self._calls[key_str] = task
+            task.add_done_callback(functools.partial(self.__discard, key_str))
+
+        return await asyncio.shield(task)
+
+    def forget(self, key: KeyType) -> None:
+        """Detaches the call in progress for the key (if any), so that later
+        calls start a new one rather than joining it."""
+
+        self._calls.pop(str(key), None)
+
+    def is_current(self, key: KeyType, task: asyncio.Task[Any] | None) -> bool:
+        """Checks whether the task is the call in progress for the key, rather
+        than one that has been detached by `forget`."""
+
+        return task is not None and self._calls.get(str(key)) is task
+
+    def __discard(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+        # Mark the exception as retrieved in case every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
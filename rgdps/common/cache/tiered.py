@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import TypeVar
+
+from .base import AbstractAsyncCache
+from .base import KeyType
+from .single_flight import SingleFlight
+
+__all__ = ("TieredAsyncCache",)
+
+T = TypeVar("T")
+
+
+class TieredAsyncCache(AbstractAsyncCache[T]):
+    """Layers a faster, smaller cache (`first`) in front of a slower, larger
+    one (`second`). Hits in the second tier are copied into the first."""
+
+    __slots__ = ("first", "second", "_loads")
+
+    def __init__(
+        self,
+        first: AbstractAsyncCache[T],
+        second: AbstractAsyncCache[T],
+    ) -> None:
+        self.first = first
+        self.second = second
+        self._loads = SingleFlight()
+
+    async def get(self, key: KeyType) -> T | None:
+        value = await self.first.get(key)
+        if value is not None:
+            return value
+
+        value = await self.second.get(key)
+        if value is not None:
+            await self.first.set(key, value)
+
+        return value
+
+    async def get_many(self, keys: list[KeyType]) -> list[T | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: KeyType, value: T) -> None:
+        await self.second.set(key, value)
+        await self.first.set(key, value)
+
+    async def set_many(self, items: dict[KeyType, T]) -> None:
+        await self.second.set_many(items)
+        await self.first.set_many(items)
+
+    async def delete(self, key: KeyType) -> None:
+        self._loads.forget(key)
+        await self.second.delete(key)
+        await self.first.delete(key)
+
+    async def delete_many(self, keys: list[KeyType]) -> None:
+        for key in keys:
+            self._loads.forget(key)
+
+        await self.second.delete_many(keys)
+        await self.first.delete_many(keys)
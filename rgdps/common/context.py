@@ -1,22 +1,40 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 from abc import ABC
 from abc import abstractmethod
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Coroutine
 from typing import TYPE_CHECKING
+from typing import TypeVar
 
 import httpx
 from meilisearch_python_async import Client as MeiliClient
 from redis.asyncio import Redis
 from types_aiobotocore_s3 import S3Client
 
+from rgdps import logger
+
 if TYPE_CHECKING:
+    from rgdps.models.level import Level
+    from rgdps.models.song import Song
     from rgdps.models.user import User
     from rgdps.common.cache.base import AbstractAsyncCache
+    from rgdps.common.cache.base import KeyType
+    from rgdps.services.meili import MeiliIndexQueue
     from rgdps.services.mysql import AbstractMySQLService
     from rgdps.services.storage import AbstractStorage
 
+T = TypeVar("T")
+
+
+class DataContext(ABC):
+    """The services holding persistent data, for work that accesses them
+    directly (without caches or search), such as maintenance tools."""
 
-class Context(ABC):
     @property
     @abstractmethod
     def mysql(self) -> AbstractMySQLService:
@@ -27,6 +45,13 @@ class Context(ABC):
     def redis(self) -> Redis:
         ...
 
+    @property
+    @abstractmethod
+    def storage(self) -> AbstractStorage:
+        ...
+
+
+class Context(DataContext):
     @property
     @abstractmethod
     def meili(self) -> MeiliClient:
@@ -34,7 +59,7 @@ class Context(ABC):
 
     @property
     @abstractmethod
-    def storage(self) -> AbstractStorage:
+    def meili_queue(self) -> MeiliIndexQueue:
         ...
 
     @property
@@ -42,6 +67,33 @@ class Context(ABC):
     def user_cache(self) -> AbstractAsyncCache[User]:
         ...
 
+    @property
+    @abstractmethod
+    def user_name_cache(self) -> AbstractAsyncCache[int]:
+        """A cache of user IDs by their lowercase username."""
+        ...
+
+    @property
+    @abstractmethod
+    def level_cache(self) -> AbstractAsyncCache[Level]:
+        ...
+
+    @property
+    @abstractmethod
+    def level_data_cache(self) -> AbstractAsyncCache[bytes]:
+        ...
+
+    @property
+    @abstractmethod
+    def song_cache(self) -> AbstractAsyncCache[Song]:
+        ...
+
+    @property
+    @abstractmethod
+    def song_miss_cache(self) -> AbstractAsyncCache[bool]:
+        """A cache of song IDs known not to exist."""
+        ...
+
     @property
     @abstractmethod
     def password_cache(self) -> AbstractAsyncCache[str]:
@@ -51,3 +103,121 @@ class Context(ABC):
     @abstractmethod
     def http(self) -> httpx.AsyncClient:
         ...
+
+
+class SharedContext(Context):
+    """A view of a context for work shared between requests (such as cache
+    loads), running its MySQL queries on the pool rather than on the request's
+    own connection. The work may outlive the request, and must not observe
+    its uncommitted changes."""
+
+    def __init__(self, ctx: Context) -> None:
+        self._ctx = ctx
+
+    @property
+    def mysql(self) -> AbstractMySQLService:
+        return self._ctx.mysql.pool
+
+    @property
+    def redis(self) -> Redis:
+        return self._ctx.redis
+
+    @property
+    def meili(self) -> MeiliClient:
+        return self._ctx.meili
+
+    @property
+    def meili_queue(self) -> MeiliIndexQueue:
+        return self._ctx.meili_queue
+
+    @property
+    def storage(self) -> AbstractStorage:
+        return self._ctx.storage
+
+    @property
+    def user_cache(self) -> AbstractAsyncCache[User]:
+        return self._ctx.user_cache
+
+    @property
+    def user_name_cache(self) -> AbstractAsyncCache[int]:
+        return self._ctx.user_name_cache
+
+    @property
+    def level_cache(self) -> AbstractAsyncCache[Level]:
+        return self._ctx.level_cache
+
+    @property
+    def level_data_cache(self) -> AbstractAsyncCache[bytes]:
+        return self._ctx.level_data_cache
+
+    @property
+    def song_cache(self) -> AbstractAsyncCache[Song]:
+        return self._ctx.song_cache
+
+    @property
+    def song_miss_cache(self) -> AbstractAsyncCache[bool]:
+        return self._ctx.song_miss_cache
+
+    @property
+    def password_cache(self) -> AbstractAsyncCache[str]:
+        return self._ctx.password_cache
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._ctx.http
+
+
+async def get_or_load(
+    ctx: Context,
+    cache: AbstractAsyncCache[T],
+    key: KeyType,
+    load: Callable[[Context], Awaitable[T | None]],
+) -> T | None:
+    """Fetches a key from the cache, calling `load` to fetch and cache it on a
+    miss. Concurrent misses share a single load, run with a `SharedContext`.
+
+    Once the request has written to MySQL, its misses are loaded within its
+    own transaction instead, so that it reads its own changes. These values
+    may not be committed yet, so they are neither shared nor cached."""
+
+    if ctx.mysql.in_transaction:
+        value = await cache.get(key)
+        if value is not None:
+            return value
+
+        return await load(ctx)
+
+    shared_ctx = SharedContext(ctx)
+    return await cache.get_or_load(key, lambda: load(shared_ctx))
+
+
+# Strong references to the background tasks, as the event loop only keeps
+# weak ones.
+_background_tasks: set[asyncio.Task[None]] = set()
+
+
+def _on_background_task_done(task: asyncio.Task[None]) -> None:
+    _background_tasks.discard(task)
+
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.error(
+            "An exception has occured in a background task!",
+            exc_info=exc,
+        )
+
+
+def run_in_background(
+    ctx: Context,
+    work: Callable[[Context], Coroutine[Any, Any, None]],
+) -> None:
+    """Starts `work` shared between requests (such as refreshing a cache)
+    without waiting for it, run with a `SharedContext`. As the work may
+    outlive the request, it runs in an empty context (see `SingleFlight`)."""
+
+    shared_ctx = SharedContext(ctx)
+    task = asyncio.get_running_loop().create_task(
+        work(shared_ctx),
+        context=contextvars.Context(),
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_task_done)
@@ -256,9 +256,10 @@ def create_level_minimal(level: Level) -> GDSerialisable:
     }
 
 
-def create_level(level: Level, level_data: str) -> GDSerialisable:
+def create_level(level: Level) -> GDSerialisable:
+    # NOTE: The level data (key 4) is left out so that it does not have to be
+    # decoded. It is appended to the serialised object by the caller.
     return create_level_minimal(level) | {
-        4: level_data,
         27: hashes.hash_level_password(level.copy_password),
         28: into_str_ts(level.upload_ts),
         29: into_str_ts(level.update_ts),
@@ -299,15 +300,6 @@ def create_search_security_str(levels: list[Level]) -> str:
     )
 
 
-def create_level_data_security_str(level_data: str) -> str:
-    res = ""
-    size = len(level_data) // 40
-    for i in range(40):
-        res += level_data[i * size]
-
-    return hashes.hash_sha1(res + "xI25fpAapCQg")
-
-
 def create_level_metadata_security_str(level: Level) -> str:
     return ",".join(
         (
@@ -62,6 +62,28 @@ def hash_sha1(plain: str) -> str:
     return hashlib.sha1(plain.encode()).hexdigest()
 
 
+def hash_level_data(level_data: bytes) -> str:
+    """Creates the security hash sent alongside downloaded level data, which
+    is a SHA1 of 40 evenly spaced characters of the data.
+
+    Args:
+        level_data (bytes): The level data as stored.
+
+    Returns:
+        str: The hex encoded SHA1 hash.
+    """
+
+    step = len(level_data) // 40
+    sample = bytes(level_data[i * step] for i in range(40))
+    return hashlib.sha1(sample + b"xI25fpAapCQg").hexdigest()
+
+
+def hash_level_data_content(level_data: bytes) -> str:
+    """Creates the SHA256 hash of the level data, by which it is stored."""
+
+    return hashlib.sha256(level_data).hexdigest()
+
+
 def hash_level_password(password: int) -> str:
     if not password:
         return "0"
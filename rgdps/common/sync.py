@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import TypeVar
+
+from rgdps.common.typing import HasId
+
+T = TypeVar("T", bound=HasId)
+U = TypeVar("U")
+
+ChunkFetcher = Callable[[int, int], Awaitable[list[T]]]
+ChunkHandler = Callable[[list[T]], Awaitable[None]]
+
+
+async def synchronise_chunked(
+    fetch_chunk: ChunkFetcher[T],
+    handle_chunk: ChunkHandler[T],
+    chunk_size: int,
+    concurrency: int,
+) -> int:
+    """Streams rows in keyset-paginated chunks, handling up to `concurrency`
+    chunks at once. Returns the number of rows processed.
+
+    Args:
+        fetch_chunk: Fetches up to `limit` rows with an ID greater than
+            `after_id`, ordered by ID. Called as `fetch_chunk(after_id, limit)`.
+        handle_chunk: Processes a single chunk of rows.
+        chunk_size: The maximum amount of rows per chunk.
+        concurrency: The maximum amount of chunks handled at once. Fetching
+            waits for a free slot, so at most this many chunks are in memory.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: list[asyncio.Task[None]] = []
+
+    async def handle(chunk: list[T]) -> None:
+        try:
+            await handle_chunk(chunk)
+        finally:
+            semaphore.release()
+
+    after_id = 0
+    row_count = 0
+    try:
+        while True:
+            await semaphore.acquire()
+            chunk = await fetch_chunk(after_id, chunk_size)
+            if not chunk:
+                semaphore.release()
+                break
+
+            after_id = chunk[-1].id
+            row_count += len(chunk)
+            tasks.append(asyncio.create_task(handle(chunk)))
+
+            if len(chunk) < chunk_size:
+                break
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    await asyncio.gather(*tasks)
+    return row_count
+
+
+async def iter_batches(
+    items: AsyncIterator[U],
+    batch_size: int,
+) -> AsyncIterator[list[U]]:
+    """Groups the items into lists of up to `batch_size` items."""
+
+    batch: list[U] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
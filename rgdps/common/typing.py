@@ -11,6 +11,12 @@ class HasIntValue(Protocol):
         ...
 
 
+class HasId(Protocol):
+    @property
+    def id(self) -> int:
+        ...
+
+
 class SupportsStr(Protocol):
     def __str__(self) -> str:
         ...
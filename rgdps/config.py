@@ -22,20 +22,45 @@ class Config:
     sql_port: int = 3306
     srv_name: str = "RealistikGDPS"
     srv_stateless: bool = False
+    cache_user_capacity: int = 100000
+    cache_user_ttl: int = 3600
+    cache_password_capacity: int = 100000
+    cache_password_ttl: int = 3600
+    cache_level_capacity: int = 10000
+    cache_level_ttl: int = 3600
+    cache_song_capacity: int = 10000
+    cache_song_ttl: int = 86400
+    cache_song_miss_ttl: int = 600
+    cache_local_capacity: int = 1000
+    cache_local_ttl: int = 10
+    cache_level_data_capacity: int = 256 * 1024 * 1024
+    cache_level_data_disk_root: str = ""
+    cache_level_data_disk_capacity: int = 4 * 1024 * 1024 * 1024
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
     meili_host: str = "localhost"
     meili_port: int = 7700
     meili_key: str = "master_key"
+    meili_queue_batch_size: int = 1000
+    meili_queue_flush_interval: float = 1.0
     s3_enabled: bool = False
     s3_bucket: str = "rgdps"
     s3_region: str = ""
     s3_endpoint: str = ""
     s3_access_key: str = ""
     s3_secret_key: str = ""
+    s3_upload_concurrency: int = 16
+    s3_upload_memory_budget: int = 256 * 1024 * 1024
     local_root: str = "/data"
+    local_io_threads: int = 8
+    storage_compression_level: int = 6
     log_level: str = "INFO"
+    level_downloads_flush_interval: int = 30
+    leaderboard_render_ttl: int = 300
+    leaderboard_render_stale_ttl: int = 3600
+    level_search_cache_ttl: int = 30
+    level_search_cache_stale_ttl: int = 600
     logzio_enabled: bool = False
     logzio_token: str = ""
 
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from enum import Enum
 
+# The amount of users shown on the global leaderboards.
+LEADERBOARD_SIZE = 100
+
 
 class LeaderboardType(str, Enum):
     STAR = "top"
@@ -49,6 +49,12 @@ class Level:
     update_locked: bool
     deleted: bool
 
+    # Computed from the level data on upload, so downloads never re-scan it.
+    # Levels uploaded before these were stored have them filled in lazily.
+    data_security_hash: str | None
+    data_size: int
+    data_hash: str | None
+
     # verification_replay: str
 
     @property
@@ -98,6 +104,10 @@ class Level:
             building_time=level_dict["building_time"],
             update_locked=bool(level_dict["update_locked"]),
             deleted=bool(level_dict["deleted"]),
+            # Not included in search documents.
+            data_security_hash=level_dict.get("data_security_hash"),
+            data_size=level_dict.get("data_size", 0),
+            data_hash=level_dict.get("data_hash"),
         )
 
     def as_dict(self, *, include_id: bool) -> dict[str, Any]:
@@ -135,6 +145,9 @@ class Level:
             "building_time": self.building_time,
             "update_locked": self.update_locked,
             "deleted": self.deleted,
+            "data_security_hash": self.data_security_hash,
+            "data_size": self.data_size,
+            "data_hash": self.data_hash,
         }
 
         if include_id:
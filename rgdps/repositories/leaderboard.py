@@ -1,6 +1,177 @@
 from __future__ import annotations
 
+import time
+import uuid
+from typing import NamedTuple
+
 from rgdps.common.context import Context
+from rgdps.constants.leaderboards import LEADERBOARD_SIZE
+from rgdps.constants.leaderboards import LeaderboardType
+
+# Rebuilds are written to a temporary key which is renamed over the live one
+# once complete. Every rebuild has its own temporary key, as every worker may
+# rebuild at once. The expiry cleans up after rebuilds that never finish.
+REBUILD_KEY_INFIX = ":rebuild:"
+REBUILD_KEY_EXPIRY = 60 * 60
+
+# Swaps a finished rebuild (KEYS[1]) in for the live leaderboard (KEYS[2]).
+# An empty rebuild never creates its key, leaving the leaderboard empty.
+FINISH_REBUILD_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("RENAME", KEYS[1], KEYS[2])
+    redis.call("PERSIST", KEYS[2])
+else
+    redis.call("DEL", KEYS[2])
+end
+"""
+
+
+def _start_rebuild(key: str) -> str:
+    """Returns the temporary key to write a new rebuild of the key to."""
+
+    return f"{key}{REBUILD_KEY_INFIX}{uuid.uuid4().hex}"
+
+
+async def _add_rebuild_scores(
+    ctx: Context,
+    rebuild_key: str,
+    scores: dict[int, int],
+) -> None:
+    if not scores:
+        return
+
+    async with ctx.redis.pipeline(transaction=False) as pipe:
+        pipe.zadd(
+            rebuild_key,
+            {str(user_id): score for user_id, score in scores.items()},
+        )
+        pipe.expire(rebuild_key, REBUILD_KEY_EXPIRY)
+        await pipe.execute()
+
+
+async def _finish_rebuild(ctx: Context, key: str, rebuild_key: str) -> None:
+    await ctx.redis.eval(FINISH_REBUILD_SCRIPT, 2, rebuild_key, key)
+
+
+async def _set_score(ctx: Context, key: str, user_id: int, score: int) -> bool:
+    """Sets (or removes, for a non-positive score) a user's score. Returns
+    whether the user was or is now within the top of the leaderboard."""
+
+    async with ctx.redis.pipeline(transaction=True) as pipe:
+        pipe.zrevrank(key, user_id)
+        if score <= 0:
+            pipe.zrem(key, user_id)
+        else:
+            pipe.zadd(key, {str(user_id): score})
+        pipe.zrevrank(key, user_id)
+        old_rank, _, new_rank = await pipe.execute()
+
+    # NOTE: The top page holds `LEADERBOARD_SIZE + 1` entries.
+    return any(
+        rank is not None and rank <= LEADERBOARD_SIZE for rank in (old_rank, new_rank)
+    )
+
+
+# How long after being dropped renders of a leaderboard are still stale.
+RENDERED_INVALIDATION_DELAY = 5
+
+
+def _rendered_key(lb_type: LeaderboardType) -> str:
+    return f"rgdps:leaderboards:{lb_type.value}:rendered"
+
+
+def _rendered_invalidated_key(lb_type: LeaderboardType) -> str:
+    return f"rgdps:leaderboards:{lb_type.value}:rendered_invalidated_ts"
+
+
+class RenderedLeaderboard(NamedTuple):
+    rendered: str
+    # Unix timestamp of when the leaderboard started rendering.
+    rendered_ts: float
+
+
+async def get_rendered(
+    ctx: Context,
+    lb_type: LeaderboardType,
+) -> tuple[RenderedLeaderboard | None, float]:
+    """Fetches the rendered leaderboard alongside the timestamp of its last
+    invalidation."""
+
+    rendered, invalidated_ts = await ctx.redis.mget(
+        _rendered_key(lb_type),
+        _rendered_invalidated_key(lb_type),
+    )
+    invalidated_ts = float(invalidated_ts) if invalidated_ts is not None else 0.0
+
+    if rendered is None:
+        return None, invalidated_ts
+
+    rendered_ts, rendered = rendered.split(b":", 1)
+    return RenderedLeaderboard(rendered.decode(), float(rendered_ts)), invalidated_ts
+
+
+async def set_rendered(
+    ctx: Context,
+    lb_type: LeaderboardType,
+    leaderboard: RenderedLeaderboard,
+    expiry: int,
+) -> None:
+    await ctx.redis.set(
+        _rendered_key(lb_type),
+        f"{leaderboard.rendered_ts!r}:{leaderboard.rendered}",
+        ex=expiry,
+    )
+
+
+async def lock_rendered(
+    ctx: Context,
+    lb_type: LeaderboardType,
+    expiry: int,
+) -> bool:
+    """Attempts to claim the right to re-render the leaderboard. Returns
+    whether the lock was acquired."""
+
+    return bool(
+        await ctx.redis.set(
+            f"{_rendered_key(lb_type)}:lock",
+            1,
+            ex=expiry,
+            nx=True,
+        ),
+    )
+
+
+async def unlock_rendered(ctx: Context, lb_type: LeaderboardType) -> None:
+    await ctx.redis.delete(f"{_rendered_key(lb_type)}:lock")
+
+
+async def drop_rendered(ctx: Context, lb_type: LeaderboardType) -> None:
+    """Marks the rendered leaderboard as stale."""
+
+    # The change may not be committed yet, so renders starting shortly after
+    # are marked as stale too.
+    await ctx.redis.set(
+        _rendered_invalidated_key(lb_type),
+        repr(time.time() + RENDERED_INVALIDATION_DELAY),
+    )
+
+
+async def drop_rendered_with_user(ctx: Context, user_id: int) -> None:
+    """Marks the rendered leaderboards listing the user as stale, as their
+    profile is rendered within them."""
+
+    async with ctx.redis.pipeline(transaction=False) as pipe:
+        pipe.zrevrank("rgdps:leaderboards:stars", user_id)
+        pipe.zrevrank("rgdps:leaderboards:creators", user_id)
+        star_rank, creator_rank = await pipe.execute()
+
+    # NOTE: The top page holds `LEADERBOARD_SIZE + 1` entries.
+    for lb_type, rank in (
+        (LeaderboardType.STAR, star_rank),
+        (LeaderboardType.CREATOR, creator_rank),
+    ):
+        if rank is not None and rank <= LEADERBOARD_SIZE:
+            await drop_rendered(ctx, lb_type)
 
 
 async def get_star_rank(ctx: Context, user_id: int) -> int:
@@ -16,16 +187,8 @@ async def get_star_rank(ctx: Context, user_id: int) -> int:
 
 
 async def set_star_count(ctx: Context, user_id: int, stars: int) -> None:
-    if stars <= 0:
-        await ctx.redis.zrem(
-            "rgdps:leaderboards:stars",
-            user_id,
-        )
-        return
-    await ctx.redis.zadd(
-        "rgdps:leaderboards:stars",
-        {str(user_id): stars},  # is str necessary?
-    )
+    if await _set_score(ctx, "rgdps:leaderboards:stars", user_id, stars):
+        await drop_rendered(ctx, LeaderboardType.STAR)
 
 
 async def get_top_stars_paginated(
@@ -33,18 +196,17 @@ async def get_top_stars_paginated(
     page: int,
     page_size: int,
 ) -> list[int]:
-    return await ctx.redis.zrevrange(
+    top_stars = await ctx.redis.zrevrange(
         "rgdps:leaderboards:stars",
         page * page_size,
         (page + 1) * page_size,
     )
+    return [int(user_id) for user_id in top_stars]
 
 
 async def remove_star_count(ctx: Context, user_id: int) -> None:
-    await ctx.redis.zrem(
-        "rgdps:leaderboards:stars",
-        user_id,
-    )
+    if await _set_score(ctx, "rgdps:leaderboards:stars", user_id, 0):
+        await drop_rendered(ctx, LeaderboardType.STAR)
 
 
 async def get_creator_rank(ctx: Context, user_id: int) -> int:
@@ -60,17 +222,8 @@ async def get_creator_rank(ctx: Context, user_id: int) -> int:
 
 
 async def set_creator_count(ctx: Context, user_id: int, points: int) -> None:
-    if points <= 0:
-        await ctx.redis.zrem(
-            "rgdps:leaderboards:creators",
-            user_id,
-        )
-        return
-
-    await ctx.redis.zadd(
-        "rgdps:leaderboards:creators",
-        {str(user_id): points},
-    )
+    if await _set_score(ctx, "rgdps:leaderboards:creators", user_id, points):
+        await drop_rendered(ctx, LeaderboardType.CREATOR)
 
 
 async def get_top_creators_paginated(
@@ -78,8 +231,47 @@ async def get_top_creators_paginated(
     page: int,
     page_size: int,
 ) -> list[int]:
-    return await ctx.redis.zrevrange(
+    top_creators = await ctx.redis.zrevrange(
         "rgdps:leaderboards:creators",
         page * page_size,
         (page + 1) * page_size,
     )
+    return [int(user_id) for user_id in top_creators]
+
+
+def start_star_rebuild() -> str:
+    """Starts a rebuild of the star leaderboard, returning its key."""
+
+    return _start_rebuild("rgdps:leaderboards:stars")
+
+
+async def add_star_rebuild_counts(
+    ctx: Context,
+    rebuild_key: str,
+    star_counts: dict[int, int],
+) -> None:
+    await _add_rebuild_scores(ctx, rebuild_key, star_counts)
+
+
+async def finish_star_rebuild(ctx: Context, rebuild_key: str) -> None:
+    await _finish_rebuild(ctx, "rgdps:leaderboards:stars", rebuild_key)
+    await drop_rendered(ctx, LeaderboardType.STAR)
+
+
+def start_creator_rebuild() -> str:
+    """Starts a rebuild of the creator leaderboard, returning its key."""
+
+    return _start_rebuild("rgdps:leaderboards:creators")
+
+
+async def add_creator_rebuild_counts(
+    ctx: Context,
+    rebuild_key: str,
+    point_counts: dict[int, int],
+) -> None:
+    await _add_rebuild_scores(ctx, rebuild_key, point_counts)
+
+
+async def finish_creator_rebuild(ctx: Context, rebuild_key: str) -> None:
+    await _finish_rebuild(ctx, "rgdps:leaderboards:creators", rebuild_key)
+    await drop_rendered(ctx, LeaderboardType.CREATOR)
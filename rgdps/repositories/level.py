@@ -4,9 +4,13 @@ from datetime import datetime
 from typing import Any
 from typing import NamedTuple
 
+from meilisearch_python_async.task import wait_for_task
+
 from rgdps.common import data_utils
 from rgdps.common import time as time_utils
 from rgdps.common.context import Context
+from rgdps.common.context import DataContext
+from rgdps.common.context import get_or_load
 from rgdps.common.typing import is_set
 from rgdps.common.typing import UNSET
 from rgdps.common.typing import Unset
@@ -18,23 +22,21 @@ from rgdps.constants.levels import LevelSearchFlag
 from rgdps.constants.levels import LevelSearchType
 from rgdps.models.level import Level
 
+PENDING_DOWNLOADS_KEY = "rgdps:levels:pending_downloads"
+MEILI_SYNC_TS_KEY = "rgdps:levels:meili_sync_ts"
+SEARCH_CACHE_KEY_PREFIX = "rgdps:levels:search_cache"
+SEARCH_CACHE_INVALIDATED_KEY = "rgdps:levels:search_cache_invalidated_ts"
 
-async def from_id(
-    ctx: Context,
-    level_id: int,
-    include_deleted: bool = False,
-) -> Level | None:
-    condition = ""
-    if not include_deleted:
-        condition = " AND NOT deleted"
 
+async def from_db(ctx: Context, level_id: int) -> Level | None:
     level_db = await ctx.mysql.fetch_one(
         "SELECT id, name, user_id, description, custom_song_id, official_song_id, "
         "version, length, two_player, publicity, render_str, game_version, "
         "binary_version, upload_ts, update_ts, original_id, downloads, likes, stars, difficulty, "
         "demon_difficulty, coins, coins_verified, requested_stars, feature_order, "
         "search_flags, low_detail_mode, object_count, copy_password, building_time, "
-        "update_locked, deleted FROM levels WHERE id = :id" + condition,
+        "update_locked, deleted, data_security_hash, data_size, data_hash FROM levels "
+        "WHERE id = :id",
         {
             "id": level_id,
         },
@@ -46,6 +48,67 @@ async def from_id(
     return Level.from_mapping(level_db)
 
 
+async def from_id(
+    ctx: Context,
+    level_id: int,
+    include_deleted: bool = False,
+) -> Level | None:
+    level = await get_or_load(
+        ctx,
+        ctx.level_cache,
+        level_id,
+        lambda load_ctx: from_db(load_ctx, level_id),
+    )
+    if level is None:
+        return None
+
+    # Deleted levels are cached too, so we have to filter them here.
+    if level.deleted and not include_deleted:
+        return None
+
+    return level
+
+
+async def from_db_after_id(
+    ctx: DataContext,
+    after_id: int,
+    limit: int,
+    modified_since: datetime | None = None,
+    missing_data_security: bool = False,
+) -> list[Level]:
+    """Fetches up to `limit` levels with an ID greater than `after_id`, ordered
+    by ID. Includes deleted levels."""
+
+    condition = ""
+    values: dict[str, Any] = {
+        "after_id": after_id,
+        "limit": limit,
+    }
+    if modified_since is not None:
+        condition += " AND modified_ts >= :modified_since"
+        values["modified_since"] = modified_since
+
+    if missing_data_security:
+        condition += " AND data_security_hash IS NULL"
+
+    levels_db = await ctx.mysql.fetch_all(
+        "SELECT id, name, user_id, description, custom_song_id, official_song_id, "
+        "version, length, two_player, publicity, render_str, game_version, "
+        "binary_version, upload_ts, update_ts, original_id, downloads, likes, stars, difficulty, "
+        "demon_difficulty, coins, coins_verified, requested_stars, feature_order, "
+        "search_flags, low_detail_mode, object_count, copy_password, building_time, "
+        "update_locked, deleted, data_security_hash, data_size, data_hash FROM levels "
+        "WHERE id > :after_id" + condition + " ORDER BY id LIMIT :limit",
+        values,
+    )
+
+    return [Level.from_mapping(level_db) for level_db in levels_db]
+
+
+async def drop_cache(ctx: Context, level_id: int) -> None:
+    await ctx.level_cache.delete(level_id)
+
+
 async def create(
     ctx: Context,
     name: str,
@@ -79,6 +142,9 @@ async def create(
     building_time: int = 0,
     update_locked: bool = False,
     deleted: bool = False,
+    data_security_hash: str | None = None,
+    data_size: int = 0,
+    data_hash: str | None = None,
     level_id: int = 0,
 ) -> Level:
     if upload_ts is None:
@@ -119,6 +185,9 @@ async def create(
         building_time=building_time,
         update_locked=update_locked,
         deleted=deleted,
+        data_security_hash=data_security_hash,
+        data_size=data_size,
+        data_hash=data_hash,
     )
 
     level.id = await create_sql(ctx, level)
@@ -133,19 +202,27 @@ async def create_sql(ctx: Context, level: Level) -> int:
         "game_version, binary_version, upload_ts, update_ts, original_id, downloads, likes, "
         "stars, difficulty, demon_difficulty, coins, coins_verified, requested_stars, "
         "feature_order, search_flags, low_detail_mode, object_count, copy_password, "
-        "building_time, update_locked, deleted) VALUES (:id, :name, :user_id, "
+        "building_time, update_locked, deleted, data_security_hash, data_size, "
+        "data_hash) "
+        "VALUES (:id, :name, :user_id, "
         ":description, :custom_song_id, :official_song_id, :version, :length, "
         ":two_player, :publicity, :render_str, :game_version, :binary_version, "
         ":upload_ts, :update_ts, :original_id, :downloads, :likes, :stars, :difficulty, "
         ":demon_difficulty, :coins, :coins_verified, :requested_stars, :feature_order, "
         ":search_flags, :low_detail_mode, :object_count, :copy_password, "
-        ":building_time, :update_locked, :deleted)",
+        ":building_time, :update_locked, :deleted, :data_security_hash, :data_size, "
+        ":data_hash)",
         level.as_dict(include_id=True),
     )
 
 
 def _make_meili_dict(level_dict: dict[str, Any]) -> dict[str, Any]:
     level_dict = level_dict.copy()
+    # Only ever needed when downloading the level.
+    level_dict.pop("data_security_hash", None)
+    level_dict.pop("data_size", None)
+    level_dict.pop("data_hash", None)
+
     if "upload_ts" in level_dict:
         level_dict["upload_ts"] = time_utils.into_unix_ts(level_dict["upload_ts"])
 
@@ -191,9 +268,26 @@ def _from_meili_dict(level_dict: dict[str, Any]) -> dict[str, Any]:
 
 async def create_meili(ctx: Context, level: Level) -> None:
     level_dict = _make_meili_dict(level.as_dict(include_id=True))
+    ctx.meili_queue.add("levels", level_dict)
+
+
+async def create_meili_many(ctx: Context, levels: list[Level]) -> None:
+    """Adds or replaces multiple levels in the search index as a single task,
+    waiting for it to be processed."""
+
+    if not levels:
+        return
 
     index = ctx.meili.index("levels")
-    await index.add_documents([level_dict])
+    task = await index.add_documents(
+        [_make_meili_dict(level.as_dict(include_id=True)) for level in levels],
+    )
+    await wait_for_task(
+        ctx.meili.http_client,
+        task.task_uid,
+        timeout_in_ms=None,
+        raise_for_status=True,
+    )
 
 
 async def update_sql_full(ctx: Context, level: Level) -> None:
@@ -209,9 +303,11 @@ async def update_sql_full(ctx: Context, level: Level) -> None:
         "search_flags = :search_flags, low_detail_mode = :low_detail_mode, "
         "object_count = :object_count, copy_password = :copy_password, "
         "building_time = :building_time, update_locked = :update_locked, "
-        "deleted = :deleted WHERE id = :id",
+        "deleted = :deleted, data_security_hash = :data_security_hash, "
+        "data_size = :data_size, data_hash = :data_hash WHERE id = :id",
         level.as_dict(include_id=True),
     )
+    await drop_cache(ctx, level.id)
 
 
 async def update_sql_partial(
@@ -248,13 +344,16 @@ async def update_sql_partial(
     building_time: int | Unset = UNSET,
     update_locked: bool | Unset = UNSET,
     deleted: bool | Unset = UNSET,
+    data_security_hash: str | None | Unset = UNSET,
+    data_size: int | Unset = UNSET,
+    data_hash: str | None | Unset = UNSET,
 ) -> Level | None:
     changed_data = {}
 
     if is_set(name):
         changed_data["name"] = name
     if is_set(user_id):
-        changed_data["user_id"]
+        changed_data["user_id"] = user_id
     if is_set(description):
         changed_data["description"] = description
     if is_set(custom_song_id):
@@ -316,6 +415,12 @@ async def update_sql_partial(
         changed_data["update_locked"] = update_locked
     if is_set(deleted):
         changed_data["deleted"] = deleted
+    if is_set(data_security_hash):
+        changed_data["data_security_hash"] = data_security_hash
+    if is_set(data_size):
+        changed_data["data_size"] = data_size
+    if is_set(data_hash):
+        changed_data["data_hash"] = data_hash
 
     if not changed_data:
         return await from_id(ctx, level_id)
@@ -326,8 +431,10 @@ async def update_sql_partial(
 
     changed_data["id"] = level_id
     await ctx.mysql.execute(query, changed_data)
+    await drop_cache(ctx, level_id)
 
-    return await from_id(ctx, level_id, include_deleted=True)
+    # Read through our own transaction, as the change is not committed yet.
+    return await from_db(ctx, level_id)
 
 
 async def update_meili_partial(
@@ -372,7 +479,7 @@ async def update_meili_partial(
     if is_set(name):
         changed_data["name"] = name
     if is_set(user_id):
-        changed_data["user_id"]
+        changed_data["user_id"] = user_id
     if is_set(description):
         changed_data["description"] = description
     if is_set(custom_song_id):
@@ -436,9 +543,7 @@ async def update_meili_partial(
         changed_data["deleted"] = deleted
 
     changed_data = _make_meili_dict(changed_data)
-
-    index = ctx.meili.index("levels")
-    await index.update_documents([changed_data])
+    ctx.meili_queue.update("levels", changed_data)
 
 
 async def update_partial(
@@ -475,6 +580,9 @@ async def update_partial(
     building_time: int | Unset = UNSET,
     update_locked: bool | Unset = UNSET,
     deleted: bool | Unset = UNSET,
+    data_security_hash: str | None | Unset = UNSET,
+    data_size: int | Unset = UNSET,
+    data_hash: str | None | Unset = UNSET,
 ) -> Level | None:
     level = await update_sql_partial(
         ctx,
@@ -510,6 +618,9 @@ async def update_partial(
         building_time=building_time,
         update_locked=update_locked,
         deleted=deleted,
+        data_security_hash=data_security_hash,
+        data_size=data_size,
+        data_hash=data_hash,
     )
 
     if level is None:
@@ -554,9 +665,120 @@ async def update_partial(
     return level
 
 
+async def add_pending_downloads(
+    ctx: Context,
+    level_id: int,
+    amount: int = 1,
+) -> None:
+    """Buffers download increments in Redis to be flushed into MySQL in bulk
+    using `take_pending_downloads` and `increment_downloads`."""
+
+    await ctx.redis.hincrby(PENDING_DOWNLOADS_KEY, str(level_id), amount)
+
+
+async def take_pending_downloads(ctx: Context) -> dict[int, int]:
+    """Atomically fetches and clears all buffered download increments."""
+
+    async with ctx.redis.pipeline(transaction=True) as pipe:
+        pipe.hgetall(PENDING_DOWNLOADS_KEY)
+        pipe.delete(PENDING_DOWNLOADS_KEY)
+        pending_downloads, _ = await pipe.execute()
+
+    return {
+        int(level_id): int(amount) for level_id, amount in pending_downloads.items()
+    }
+
+
+async def increment_downloads(ctx: Context, downloads: dict[int, int]) -> None:
+    """Adds the given amounts to the download counts of multiple levels in a
+    single query."""
+
+    if not downloads:
+        return
+
+    values = {}
+    cases = []
+    for idx, (level_id, amount) in enumerate(downloads.items()):
+        values[f"id_{idx}"] = level_id
+        values[f"amount_{idx}"] = amount
+        cases.append(f"WHEN :id_{idx} THEN :amount_{idx}")
+
+    id_params = ", ".join(f":id_{idx}" for idx in range(len(downloads)))
+
+    await ctx.mysql.execute(
+        "UPDATE levels SET downloads = downloads + CASE id "
+        + " ".join(cases)
+        + f" ELSE 0 END WHERE id IN ({id_params})",
+        values,
+    )
+
+    for level_id in downloads:
+        await drop_cache(ctx, level_id)
+
+
+async def update_meili_downloads(ctx: Context, level_ids: list[int]) -> None:
+    """Copies the current download counts of the given levels from MySQL into
+    the search index as a single batch."""
+
+    if not level_ids:
+        return
+
+    values = {f"id_{idx}": level_id for idx, level_id in enumerate(level_ids)}
+    id_params = ", ".join(f":{key}" for key in values)
+
+    # Deleted levels are not in the index, and updating them would add them
+    # back as partial documents.
+    downloads_db = await ctx.mysql.fetch_all(
+        f"SELECT id, downloads FROM levels WHERE id IN ({id_params}) "
+        "AND deleted = 0",
+        values,
+    )
+
+    for row in downloads_db:
+        ctx.meili_queue.update(
+            "levels",
+            {"id": row["id"], "downloads": row["downloads"]},
+        )
+
+
 async def delete_meili(ctx: Context, level_id: int) -> None:
+    ctx.meili_queue.delete("levels", level_id)
+    await drop_cache(ctx, level_id)
+
+
+async def delete_meili_many(ctx: Context, level_ids: list[int]) -> None:
+    """Removes multiple levels from the search index as a single task, waiting
+    for it to be processed."""
+
+    if not level_ids:
+        return
+
     index = ctx.meili.index("levels")
-    await index.delete_documents([str(level_id)])
+    task = await index.delete_documents([str(level_id) for level_id in level_ids])
+    await wait_for_task(
+        ctx.meili.http_client,
+        task.task_uid,
+        timeout_in_ms=None,
+        raise_for_status=True,
+    )
+
+
+async def get_db_ts(ctx: Context) -> datetime:
+    """Fetches the current time from MySQL, as used for `modified_ts`."""
+
+    return await ctx.mysql.fetch_val("SELECT NOW()")
+
+
+async def get_meili_sync_ts(ctx: Context) -> datetime | None:
+    sync_ts = await ctx.redis.get(MEILI_SYNC_TS_KEY)
+    if sync_ts is None:
+        return None
+
+    return time_utils.from_unix_ts(int(sync_ts))
+
+
+async def set_meili_sync_ts(ctx: Context, sync_ts: datetime) -> None:
+    await ctx.redis.set(MEILI_SYNC_TS_KEY, time_utils.into_unix_ts(sync_ts))
 
 
 class LevelSearchResults(NamedTuple):
@@ -688,6 +910,63 @@ async def all_ids(ctx: Context, include_deleted: bool = False) -> list[int]:
     ]
 
 
+async def update_data_security(
+    ctx: DataContext,
+    level_id: int,
+    data_security_hash: str,
+    data_size: int,
+) -> None:
+    # NOTE: Cached copies of the level are left as they are, as the hash is
+    # computed from the data whenever it is missing.
+    await ctx.mysql.execute(
+        "UPDATE levels SET data_security_hash = :data_security_hash, "
+        "data_size = :data_size WHERE id = :id",
+        {
+            "id": level_id,
+            "data_security_hash": data_security_hash,
+            "data_size": data_size,
+        },
+    )
+
+
+async def referenced_data_hashes(
+    ctx: DataContext,
+    data_hashes: list[str],
+) -> set[str]:
+    """Returns which of the level data hashes are referenced by any level,
+    including deleted ones."""
+
+    if not data_hashes:
+        return set()
+
+    values = {f"hash_{idx}": data_hash for idx, data_hash in enumerate(data_hashes)}
+    hash_params = ", ".join(f":{key}" for key in values)
+
+    hashes_db = await ctx.mysql.fetch_all(
+        f"SELECT DISTINCT data_hash FROM levels WHERE data_hash IN ({hash_params})",
+        values,
+    )
+
+    return {row["data_hash"] for row in hashes_db}
+
+
+async def ids_with_data_hash(ctx: DataContext, level_ids: list[int]) -> set[int]:
+    """Returns which of the levels have their data stored by hash."""
+
+    if not level_ids:
+        return set()
+
+    values = {f"id_{idx}": level_id for idx, level_id in enumerate(level_ids)}
+    id_params = ", ".join(f":{key}" for key in values)
+
+    levels_db = await ctx.mysql.fetch_all(
+        f"SELECT id FROM levels WHERE id IN ({id_params}) AND data_hash IS NOT NULL",
+        values,
+    )
+
+    return {row["id"] for row in levels_db}
+
+
 async def get_count(ctx: Context) -> int:
     return await ctx.mysql.fetch_val("SELECT COUNT(*) FROM levels")
 
@@ -715,3 +994,66 @@ async def from_name_and_user_id(
         return None
 
     return await from_id(ctx, result_id, include_deleted)
+
+
+class CachedSearchPage(NamedTuple):
+    rendered: str
+    # Unix timestamp of when the page started rendering.
+    rendered_ts: float
+
+
+async def get_search_cache(
+    ctx: Context,
+    cache_key: str,
+) -> tuple[CachedSearchPage | None, float]:
+    """Fetches a cached search page alongside the timestamp of the last
+    search cache invalidation."""
+
+    cached_page, invalidated_ts = await ctx.redis.mget(
+        f"{SEARCH_CACHE_KEY_PREFIX}:{cache_key}",
+        SEARCH_CACHE_INVALIDATED_KEY,
+    )
+    invalidated_ts = float(invalidated_ts) if invalidated_ts is not None else 0.0
+
+    if cached_page is None:
+        return None, invalidated_ts
+
+    rendered_ts, rendered = cached_page.split(b":", 1)
+    return CachedSearchPage(rendered.decode(), float(rendered_ts)), invalidated_ts
+
+
+async def set_search_cache(
+    ctx: Context,
+    cache_key: str,
+    page: CachedSearchPage,
+    expiry: int,
+) -> None:
+    await ctx.redis.set(
+        f"{SEARCH_CACHE_KEY_PREFIX}:{cache_key}",
+        f"{page.rendered_ts!r}:{page.rendered}",
+        ex=expiry,
+    )
+
+
+async def lock_search_cache(ctx: Context, cache_key: str, expiry: int) -> bool:
+    """Attempts to claim the right to re-render a cached search page. Returns
+    whether the lock was acquired."""
+
+    return bool(
+        await ctx.redis.set(
+            f"{SEARCH_CACHE_KEY_PREFIX}:{cache_key}:lock",
+            1,
+            ex=expiry,
+            nx=True,
+        ),
+    )
+
+
+async def unlock_search_cache(ctx: Context, cache_key: str) -> None:
+    await ctx.redis.delete(f"{SEARCH_CACHE_KEY_PREFIX}:{cache_key}:lock")
+
+
+async def invalidate_search_cache(ctx: Context, invalidated_ts: float) -> None:
+    """Marks every search page rendered before `invalidated_ts` as stale."""
+
+    await ctx.redis.set(SEARCH_CACHE_INVALIDATED_KEY, repr(invalidated_ts))
@@ -1,23 +1,178 @@
 from __future__ import annotations
 
+import asyncio
+from typing import AsyncIterator
+
 from rgdps.common.context import Context
+from rgdps.common.context import DataContext
+
+# Level data is stored by the hash of its content, allowing identical data
+# (such as re-uploads or copies) to be stored once. Levels uploaded before
+# this are stored by their ID instead.
+DATA_HASH_KEY_PREFIX = "level_data/"
+LEVEL_ID_KEY_PREFIX = "levels/"
+
+# Level data found unreferenced by the garbage collector, by the time it was
+# first found.
+ORPHANS_KEY = "rgdps:level_data:orphans"
+# Set while the garbage collector deletes orphaned level data, so that uploads
+# of the same data can store it again once it is done.
+DELETING_KEY_PREFIX = "rgdps:level_data:deleting:"
+DELETING_KEY_EXPIRY = 60
+DELETING_POLL_INTERVAL = 0.1
+
+# Claims an orphan (ARGV[1]) for deletion, as long as it is still marked with
+# the same timestamp (ARGV[2]) and so has not been uploaded since.
+CLAIM_ORPHAN_SCRIPT = """
+if redis.call("HGET", KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call("HDEL", KEYS[1], ARGV[1])
+redis.call("SET", KEYS[2], 1, "EX", ARGV[3])
+return 1
+"""
+
+# Unmarks an orphan (ARGV[1]), returning whether it is being deleted.
+UNMARK_ORPHAN_SCRIPT = """
+redis.call("HDEL", KEYS[1], ARGV[1])
+return redis.call("EXISTS", KEYS[2])
+"""
+
+
+async def _load_cached(ctx: Context, key: str) -> bytes | None:
+    # Level data is never overwritten, as new uploads are stored by the hash
+    # of their content. Cached data therefore never has to be invalidated.
+    return await ctx.level_data_cache.get_or_load(
+        key,
+        lambda: ctx.storage.load(key),
+    )
 
 
 async def from_level_id(
     ctx: Context,
     level_id: int,
-) -> str | None:
-    res = await ctx.storage.load(f"levels/{level_id}")
+) -> bytes | None:
+    return await _load_cached(ctx, f"{LEVEL_ID_KEY_PREFIX}{level_id}")
+
 
-    if res is not None:
-        return res.decode()
+async def from_data_hash(
+    ctx: Context,
+    data_hash: str,
+) -> bytes | None:
+    return await _load_cached(ctx, f"{DATA_HASH_KEY_PREFIX}{data_hash}")
 
-    return None
+
+async def load_uncached(
+    ctx: DataContext,
+    level_id: int,
+    data_hash: str | None,
+) -> bytes | None:
+    """Loads a level's data directly from storage, for work that should not
+    fill the cache."""
+
+    if data_hash is not None:
+        return await ctx.storage.load(f"{DATA_HASH_KEY_PREFIX}{data_hash}")
+
+    return await ctx.storage.load(f"{LEVEL_ID_KEY_PREFIX}{level_id}")
 
 
 async def create(
     ctx: Context,
-    level_id: int,
-    data: str,
+    data_hash: str,
+    data: bytes,
 ) -> None:
-    return await ctx.storage.save(f"levels/{level_id}", data.encode())
+    return await ctx.storage.save(f"{DATA_HASH_KEY_PREFIX}{data_hash}", data)
+
+
+async def delete_from_level_id(ctx: DataContext, level_id: int) -> None:
+    await ctx.storage.delete(f"{LEVEL_ID_KEY_PREFIX}{level_id}")
+
+
+async def delete_from_data_hash(ctx: DataContext, data_hash: str) -> None:
+    await ctx.storage.delete(f"{DATA_HASH_KEY_PREFIX}{data_hash}")
+
+
+async def iter_data_hashes(ctx: DataContext) -> AsyncIterator[str]:
+    async for key in ctx.storage.iter_keys(DATA_HASH_KEY_PREFIX):
+        yield key.removeprefix(DATA_HASH_KEY_PREFIX)
+
+
+async def iter_legacy_level_ids(ctx: DataContext) -> AsyncIterator[int]:
+    async for key in ctx.storage.iter_keys(LEVEL_ID_KEY_PREFIX):
+        level_id = key.removeprefix(LEVEL_ID_KEY_PREFIX)
+        if level_id.isdigit():
+            yield int(level_id)
+
+
+async def mark_orphans(
+    ctx: DataContext,
+    data_hashes: list[str],
+    marked_ts: float,
+) -> dict[str, float]:
+    """Marks the level data as unreferenced, returning the timestamp each was
+    first marked at."""
+
+    if not data_hashes:
+        return {}
+
+    async with ctx.redis.pipeline() as pipe:
+        for data_hash in data_hashes:
+            pipe.hsetnx(ORPHANS_KEY, data_hash, marked_ts)
+        pipe.hmget(ORPHANS_KEY, data_hashes)
+        res = await pipe.execute()
+
+    return {
+        data_hash: float(marked_ts)
+        for data_hash, marked_ts in zip(data_hashes, res[-1])
+    }
+
+
+async def unmark_orphans(ctx: DataContext, data_hashes: list[str]) -> None:
+    if not data_hashes:
+        return
+
+    await ctx.redis.hdel(ORPHANS_KEY, *data_hashes)
+
+
+async def unmark_orphan(ctx: DataContext, data_hash: str) -> bool:
+    """Unmarks the level data as unreferenced, returning whether the garbage
+    collector is deleting it."""
+
+    return bool(
+        await ctx.redis.eval(
+            UNMARK_ORPHAN_SCRIPT,
+            2,
+            ORPHANS_KEY,
+            DELETING_KEY_PREFIX + data_hash,
+            data_hash,
+        ),
+    )
+
+
+async def claim_orphan(ctx: DataContext, data_hash: str, marked_ts: float) -> bool:
+    """Claims the level data for deletion if it is still marked as unreferenced
+    since `marked_ts`. Claimed data has to be released once deleted."""
+
+    return bool(
+        await ctx.redis.eval(
+            CLAIM_ORPHAN_SCRIPT,
+            2,
+            ORPHANS_KEY,
+            DELETING_KEY_PREFIX + data_hash,
+            data_hash,
+            # Matches how the timestamp was written by `mark_orphans`.
+            repr(marked_ts),
+            DELETING_KEY_EXPIRY,
+        ),
+    )
+
+
+async def release_orphan(ctx: DataContext, data_hash: str) -> None:
+    await ctx.redis.delete(DELETING_KEY_PREFIX + data_hash)
+
+
+async def wait_for_deletion(ctx: DataContext, data_hash: str) -> None:
+    """Waits for the garbage collector to finish deleting the level data."""
+
+    while await ctx.redis.exists(DELETING_KEY_PREFIX + data_hash):
+        await asyncio.sleep(DELETING_POLL_INTERVAL)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
+
 from rgdps.common.context import Context
+from rgdps.services.storage import BlobWriter
 
 
 async def from_user_id(
@@ -15,9 +18,23 @@ async def from_user_id(
     return None
 
 
+async def stream_from_user_id(
+    ctx: Context,
+    user_id: int,
+) -> AsyncIterator[bytes] | None:
+    return await ctx.storage.open_read(f"saves/{user_id}")
+
+
 async def create(
     ctx: Context,
     user_id: int,
     data: str,
 ) -> None:
     await ctx.storage.save(f"saves/{user_id}", data.encode())
+
+
+async def open_create(
+    ctx: Context,
+    user_id: int,
+) -> BlobWriter:
+    return await ctx.storage.open_write(f"saves/{user_id}")
@@ -5,6 +5,7 @@ import urllib.parse
 from rgdps import logger
 from rgdps.common import gd_obj
 from rgdps.common.context import Context
+from rgdps.common.context import get_or_load
 from rgdps.constants.songs import SongSource
 from rgdps.models.song import Song
 
@@ -14,12 +15,13 @@ async def from_db(
     song_id: int,
     allow_blocked: bool = False,
 ) -> Song | None:
+    condition = ""
+    if not allow_blocked:
+        condition = " AND blocked = 0"
+
     song_db = await ctx.mysql.fetch_one(
         "SELECT id, name, author_id, author, author_youtube, size, "
-        "download_url, source, blocked FROM songs WHERE id = :song_id"
-        + " AND blocked = 0"
-        if not allow_blocked
-        else "",
+        "download_url, source, blocked FROM songs WHERE id = :song_id" + condition,
         {
             "song_id": song_id,
         },
@@ -31,12 +33,16 @@ async def from_db(
     return Song.from_mapping(song_db)
 
 
-async def _create_sql(ctx: Context, song: Song) -> int:
-    return await ctx.mysql.execute(
+async def _create_sql(ctx: Context, song: Song) -> None:
+    # Written outside of the request's transaction, so that a rollback cannot
+    # lose a song which has since been cached. Another load may have inserted
+    # it first.
+    await ctx.mysql.pool.execute(
         "INSERT INTO songs (name, author_id, author, author_youtube, size, "
         "download_url, source, blocked, id) VALUES "
         "(:name, :author_id, :author, :author_youtube, :size, "
-        ":download_url, :source, :blocked, :id)",
+        ":download_url, :source, :blocked, :id) "
+        "ON DUPLICATE KEY UPDATE id = id",
         song.as_dict(include_id=True),
     )
 
@@ -124,22 +130,43 @@ async def from_boomlings(ctx: Context, song_id: int) -> Song | None:
     )
 
 
+async def _load(ctx: Context, song_id: int) -> Song | None:
+    if await ctx.song_miss_cache.get(song_id):
+        return None
+
+    song = await from_db(ctx, song_id, allow_blocked=True)
+    if song is None:
+        song = await from_boomlings(ctx, song_id)
+        if song is not None:
+            await _create_sql(ctx, song)
+
+    if song is None:
+        await ctx.song_miss_cache.set(song_id, True)
+
+    return song
+
+
 async def from_id(
     ctx: Context,
     song_id: int,
     allow_blocked: bool = False,
 ) -> Song | None:
-    # TODO: Implement song LRU Caching
-    song_db = await from_db(ctx, song_id, allow_blocked)
-    if song_db is not None:
-        return song_db
+    # Concurrent misses share a single load, and therefore a single outbound
+    # request to Boomlings.
+    song = await get_or_load(
+        ctx,
+        ctx.song_cache,
+        song_id,
+        lambda load_ctx: _load(load_ctx, song_id),
+    )
+    if song is None:
+        return None
 
-    song_boomlings = await from_boomlings(ctx, song_id)
-    if song_boomlings is not None:
-        await _create_sql(ctx, song_boomlings)
-        return song_boomlings
+    # Blocked songs are cached too, so we have to filter them here.
+    if song.blocked and not allow_blocked:
+        return None
 
-    return None
+    return song
 
 
 async def get_count(ctx: Context) -> int:
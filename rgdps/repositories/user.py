@@ -4,8 +4,11 @@ from datetime import datetime
 from typing import Any
 from typing import NamedTuple
 
+from meilisearch_python_async.task import wait_for_task
+
 from rgdps.common import time as time_utils
 from rgdps.common.context import Context
+from rgdps.common.context import get_or_load
 from rgdps.common.typing import is_set
 from rgdps.common.typing import UNSET
 from rgdps.common.typing import Unset
@@ -14,6 +17,8 @@ from rgdps.constants.users import UserPrivacySetting
 from rgdps.constants.users import UserPrivileges
 from rgdps.models.user import User
 
+MEILI_SYNC_TS_KEY = "rgdps:users:meili_sync_ts"
+
 
 async def from_db(ctx: Context, user_id: int) -> User | None:
     user_db = await ctx.mysql.fetch_one(
@@ -31,6 +36,57 @@ async def from_db(ctx: Context, user_id: int) -> User | None:
     return User.from_mapping(user_db)
 
 
+async def from_db_many(ctx: Context, user_ids: list[int]) -> list[User]:
+    if not user_ids:
+        return []
+
+    values = {f"id_{idx}": user_id for idx, user_id in enumerate(user_ids)}
+    id_params = ", ".join(f":{key}" for key in values)
+
+    users_db = await ctx.mysql.fetch_all(
+        "SELECT id, username, email, password, privileges, message_privacy, friend_privacy, "
+        "comment_privacy, twitter_name, youtube_name, twitch_name, register_ts, "
+        "stars, demons, primary_colour, secondary_colour, display_type, icon, ship, "
+        "ball, ufo, wave, robot, spider, explosion, glow, creator_points, coins, "
+        f"user_coins, diamonds FROM users WHERE id IN ({id_params})",
+        values,
+    )
+
+    return [User.from_mapping(user_db) for user_db in users_db]
+
+
+async def from_db_after_id(
+    ctx: Context,
+    after_id: int,
+    limit: int,
+    modified_since: datetime | None = None,
+) -> list[User]:
+    """Fetches up to `limit` users with an ID greater than `after_id`, ordered
+    by ID."""
+
+    condition = ""
+    values: dict[str, Any] = {
+        "after_id": after_id,
+        "limit": limit,
+    }
+    if modified_since is not None:
+        condition = " AND modified_ts >= :modified_since"
+        values["modified_since"] = modified_since
+
+    users_db = await ctx.mysql.fetch_all(
+        "SELECT id, username, email, password, privileges, message_privacy, friend_privacy, "
+        "comment_privacy, twitter_name, youtube_name, twitch_name, register_ts, "
+        "stars, demons, primary_colour, secondary_colour, display_type, icon, ship, "
+        "ball, ufo, wave, robot, spider, explosion, glow, creator_points, coins, "
+        "user_coins, diamonds FROM users WHERE id > :after_id"
+        + condition
+        + " ORDER BY id LIMIT :limit",
+        values,
+    )
+
+    return [User.from_mapping(user_db) for user_db in users_db]
+
+
 async def create(
     ctx: Context,
     username: str,
@@ -155,9 +211,44 @@ async def create_sql(ctx: Context, user: User) -> int:
 
 async def create_meili(ctx: Context, user: User) -> None:
     user_dict = _make_meili_dict(user.as_dict(include_id=True))
+    ctx.meili_queue.add("users", user_dict)
+
+
+async def create_meili_many(ctx: Context, users: list[User]) -> None:
+    """Adds or replaces multiple users in the search index as a single task,
+    waiting for it to be processed."""
+
+    if not users:
+        return
 
     index = ctx.meili.index("users")
-    await index.add_documents([user_dict])
+    task = await index.add_documents(
+        [_make_meili_dict(user.as_dict(include_id=True)) for user in users],
+    )
+    await wait_for_task(
+        ctx.meili.http_client,
+        task.task_uid,
+        timeout_in_ms=None,
+        raise_for_status=True,
+    )
+
+
+async def get_db_ts(ctx: Context) -> datetime:
+    """Fetches the current time from MySQL, as used for `modified_ts`."""
+
+    return await ctx.mysql.fetch_val("SELECT NOW()")
+
+
+async def get_meili_sync_ts(ctx: Context) -> datetime | None:
+    sync_ts = await ctx.redis.get(MEILI_SYNC_TS_KEY)
+    if sync_ts is None:
+        return None
+
+    return time_utils.from_unix_ts(int(sync_ts))
+
+
+async def set_meili_sync_ts(ctx: Context, sync_ts: datetime) -> None:
+    await ctx.redis.set(MEILI_SYNC_TS_KEY, time_utils.into_unix_ts(sync_ts))
 
 
 async def update_sql_partial(
@@ -260,10 +351,19 @@ async def update_sql_partial(
 
     changed_data["id"] = user_id
 
+    # Renames have to drop the cached ID of the previous username.
+    previous_user = None
+    if is_set(username):
+        previous_user = await from_id(ctx, user_id)
+
     await ctx.mysql.execute(query, changed_data)
     await drop_cache(ctx, user_id)
 
-    return await from_id(ctx, user_id)
+    if previous_user is not None:
+        await drop_name_cache(ctx, previous_user.username)
+
+    # Read through our own transaction, as the change is not committed yet.
+    return await from_db(ctx, user_id)
 
 
 async def update_meili_partial(
@@ -309,7 +409,7 @@ async def update_meili_partial(
     if is_set(password):
         changed_data["password"] = password
     if is_set(privileges):
-        changed_data["privileges"] = privileges
+        changed_data["privileges"] = privileges.as_bytes()
     if is_set(message_privacy):
         changed_data["message_privacy"] = message_privacy.value
     if is_set(friend_privacy):
@@ -360,9 +460,7 @@ async def update_meili_partial(
         changed_data["diamonds"] = diamonds
 
     changed_data = _make_meili_dict(changed_data)
-
-    index = ctx.meili.index("users")
-    await index.update_documents([changed_data])
+    ctx.meili_queue.update("users", changed_data)
 
 
 async def update_partial(
@@ -476,15 +574,37 @@ async def drop_cache(ctx: Context, user_id: int) -> None:
 
 
 async def from_id(ctx: Context, user_id: int) -> User | None:
-    cache_user = await ctx.user_cache.get(user_id)
-    if cache_user is not None:
-        return cache_user
+    return await get_or_load(
+        ctx,
+        ctx.user_cache,
+        user_id,
+        lambda load_ctx: from_db(load_ctx, user_id),
+    )
 
-    user = await from_db(ctx, user_id)
-    if user is not None:
-        await ctx.user_cache.set(user_id, user)
 
-    return user
+async def from_ids(ctx: Context, user_ids: list[int]) -> dict[int, User]:
+    """Fetches multiple users at once, returning a mapping of user ID to user.
+    Users that do not exist are not present in the result."""
+
+    # Remove duplicates while preserving order.
+    user_ids = list(dict.fromkeys(user_ids))
+    users: dict[int, User] = {}
+
+    cache_users = await ctx.user_cache.get_many(user_ids)  # type: ignore
+    for user_id, user in zip(user_ids, cache_users):
+        if user is not None:
+            users[user_id] = user
+
+    missing_ids = [user_id for user_id in user_ids if user_id not in users]
+    db_users = {user.id: user for user in await from_db_many(ctx, missing_ids)}
+    # Once the request has written to MySQL, these may include its uncommitted
+    # changes, so are not cached (see `get_or_load`).
+    if db_users and not ctx.mysql.in_transaction:
+        await ctx.user_cache.set_many(db_users)  # type: ignore
+
+    users.update(db_users)
+
+    return users
 
 
 async def check_email_exists(ctx: Context, email: str) -> bool:
@@ -505,14 +625,44 @@ async def check_username_exists(ctx: Context, username: str) -> bool:
     )
 
 
-async def from_name(ctx: Context, username: str) -> User | None:
-    user_id = await ctx.mysql.fetch_val(
+def _user_name_key(username: str) -> str:
+    # Usernames are compared case-insensitively by the database.
+    return username.lower()
+
+
+async def id_from_name(ctx: Context, username: str) -> int | None:
+    return await ctx.mysql.fetch_val(
         "SELECT id FROM users WHERE username = :username",
         {
             "username": username,
         },
     )
 
+
+async def drop_name_cache(ctx: Context, username: str) -> None:
+    await ctx.user_name_cache.delete(_user_name_key(username))
+
+
+async def from_name(ctx: Context, username: str) -> User | None:
+    name_key = _user_name_key(username)
+    user_id = await get_or_load(
+        ctx,
+        ctx.user_name_cache,
+        name_key,
+        lambda load_ctx: id_from_name(load_ctx, username),
+    )
+
+    if user_id is None:
+        return None
+
+    user = await from_id(ctx, user_id)
+    if user is not None and _user_name_key(user.username) == name_key:
+        return user
+
+    # The cached ID is stale (eg. a rename raced the lookup), so we fall back
+    # to the database.
+    await drop_name_cache(ctx, username)
+    user_id = await id_from_name(ctx, username)
     if user_id is None:
         return None
 
@@ -527,6 +677,38 @@ async def all_ids(ctx: Context) -> list[int]:
     return [x["id"] for x in await ctx.mysql.fetch_all("SELECT id FROM users")]
 
 
+class UserLeaderboardStats(NamedTuple):
+    id: int
+    stars: int
+    creator_points: int
+    privileges: UserPrivileges
+
+
+async def leaderboard_stats_after_id(
+    ctx: Context,
+    after_id: int,
+    limit: int,
+) -> list[UserLeaderboardStats]:
+    """Fetches the leaderboard stats of up to `limit` users with an ID greater
+    than `after_id`, ordered by ID."""
+
+    stats_db = await ctx.mysql.fetch_all(
+        "SELECT id, stars, creator_points, privileges FROM users "
+        "WHERE id > :after_id ORDER BY id LIMIT :limit",
+        {"after_id": after_id, "limit": limit},
+    )
+
+    return [
+        UserLeaderboardStats(
+            id=stats["id"],
+            stars=stats["stars"],
+            creator_points=stats["creator_points"],
+            privileges=UserPrivileges.from_bytes(stats["privileges"]),
+        )
+        for stats in stats_db
+    ]
+
+
 class UserSearchResults(NamedTuple):
     results: list[User]
     total: int
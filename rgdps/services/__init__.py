@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from . import meili
 from . import mysql
 from . import pubsub
 from . import storage
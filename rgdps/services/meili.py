@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+from meilisearch_python_async import Client as MeiliClient
+
+from rgdps import logger
+
+MeiliDocument = dict[str, Any]
+
+
+class MeiliOperation(Enum):
+    ADD = "add"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+@dataclass
+class _PendingWrite:
+    operation: MeiliOperation
+    document: MeiliDocument
+
+
+def _merge_writes(older: _PendingWrite, newer: _PendingWrite) -> _PendingWrite:
+    """Coalesces two writes to the same document into one with the same
+    end result."""
+
+    if newer.operation is not MeiliOperation.UPDATE:
+        return newer
+
+    # A partial update of a deleted document must not bring it back (as a
+    # partial document), so the deletion stands.
+    if older.operation is MeiliOperation.DELETE:
+        return older
+
+    # Partial updates are applied on top of whatever is already pending.
+    return _PendingWrite(
+        older.operation,
+        older.document | newer.document,
+    )
+
+
+class MeiliIndexQueue:
+    """A write-behind queue for MeiliSearch documents. Writes to the same
+    document are coalesced and sent in batches, either when `batch_size`
+    documents are pending or every `flush_interval` seconds. Failed batches
+    are re-queued and retried on the next flush."""
+
+    def __init__(
+        self,
+        meili: MeiliClient,
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._meili = meili
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        # Index name -> document ID -> write.
+        self._pending: dict[str, dict[str, _PendingWrite]] = {}
+        self._pending_count = 0
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def __queue(self, index: str, document_id: str, write: _PendingWrite) -> None:
+        index_pending = self._pending.setdefault(index, {})
+
+        existing_write = index_pending.get(document_id)
+        if existing_write is not None:
+            write = _merge_writes(existing_write, write)
+        else:
+            self._pending_count += 1
+
+        index_pending[document_id] = write
+
+        if self._pending_count >= self._batch_size:
+            self._flush_event.set()
+
+    def add(self, index: str, document: MeiliDocument) -> None:
+        """Queues adding or fully replacing a document."""
+        self.__queue(
+            index,
+            str(document["id"]),
+            _PendingWrite(MeiliOperation.ADD, document),
+        )
+
+    def update(self, index: str, document: MeiliDocument) -> None:
+        """Queues a partial update of a document."""
+        self.__queue(
+            index,
+            str(document["id"]),
+            _PendingWrite(MeiliOperation.UPDATE, document),
+        )
+
+    def delete(self, index: str, document_id: int | str) -> None:
+        """Queues the removal of a document."""
+        self.__queue(
+            index,
+            str(document_id),
+            _PendingWrite(MeiliOperation.DELETE, {"id": document_id}),
+        )
+
+    @property
+    def pending_count(self) -> int:
+        return self._pending_count
+
+    async def __send(
+        self,
+        index: str,
+        operation: MeiliOperation,
+        documents: list[MeiliDocument],
+    ) -> None:
+        meili_index = self._meili.index(index)
+
+        match operation:
+            case MeiliOperation.ADD:
+                await meili_index.add_documents(documents)
+            case MeiliOperation.UPDATE:
+                await meili_index.update_documents(documents)
+            case MeiliOperation.DELETE:
+                await meili_index.delete_documents(
+                    [str(document["id"]) for document in documents],
+                )
+
+    async def flush(self) -> None:
+        """Sends all pending writes to MeiliSearch."""
+
+        async with self._flush_lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_count = 0
+
+            for index, index_pending in pending.items():
+                for operation in MeiliOperation:
+                    writes = {
+                        document_id: write
+                        for document_id, write in index_pending.items()
+                        if write.operation is operation
+                    }
+                    if not writes:
+                        continue
+
+                    try:
+                        await self.__send(
+                            index,
+                            operation,
+                            [write.document for write in writes.values()],
+                        )
+                    except Exception:
+                        logger.warning(
+                            "Failed to send a MeiliSearch batch. Retrying later...",
+                            extra={
+                                "index": index,
+                                "operation": operation.value,
+                                "document_count": len(writes),
+                            },
+                            exc_info=True,
+                        )
+                        self.__requeue(index, writes)
+
+    def __requeue(self, index: str, writes: dict[str, _PendingWrite]) -> None:
+        index_pending = self._pending.setdefault(index, {})
+
+        for document_id, write in writes.items():
+            # Anything queued since the flush started is newer.
+            newer_write = index_pending.get(document_id)
+            if newer_write is not None:
+                write = _merge_writes(write, newer_write)
+            else:
+                self._pending_count += 1
+
+            index_pending[document_id] = write
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_event.wait(),
+                    timeout=self._flush_interval,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_event.clear()
+            if self._pending_count:
+                await self.flush()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """Stops the background flushing and sends any remaining writes."""
+
+        if self._task is not None:
+            # Holding the lock ensures we do not cancel a flush mid-batch.
+            async with self._flush_lock:
+                self._task.cancel()
+            self._task = None
+
+        await self.flush()
+
+        if self._pending_count:
+            logger.error(
+                "Failed to send all pending MeiliSearch writes on shutdown.",
+                extra={
+                    "document_count": self._pending_count,
+                },
+            )
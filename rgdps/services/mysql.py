@@ -3,6 +3,7 @@
 # silent `DeprecationWarning`, leading to a lot of wasted time.
 from __future__ import annotations
 
+import asyncio
 from abc import ABC
 from abc import abstractmethod
 from datetime import datetime
@@ -50,6 +51,18 @@ class AbstractMySQLService(ABC):
     async def execute(self, query: str, values: MySQLValues | None = None) -> Any:
         ...
 
+    @property
+    def in_transaction(self) -> bool:
+        """Whether writes have been made which are not yet visible to other
+        connections."""
+        return False
+
+    @property
+    def pool(self) -> AbstractMySQLService:
+        """The service to run queries shared between requests on, which must
+        not depend on any single request's connection or transaction."""
+        return self
+
 
 class MySQLService(AbstractMySQLService):
     def __init__(self, database_url: DatabaseURL) -> None:
@@ -89,37 +102,78 @@ class MySQLService(AbstractMySQLService):
         return await self._pool.execute(query, values)  # type: ignore
 
     def transaction(self) -> MySQLTransaction:
-        return MySQLTransaction(self._pool)
+        return MySQLTransaction(self)
 
 
 class MySQLTransaction(AbstractMySQLService):
     """A wrapper around a transaction that implements the same interface as
-    `MySQLService`."""
+    `MySQLService`.
 
-    def __init__(self, backend_pool: Database) -> None:
-        self._backend_pool: Database = backend_pool
+    The connection is only checked out of the pool on the first query, and the
+    transaction is only started on the first `execute`. Reads issued before
+    any write run on the same connection without an explicit transaction, so
+    read-only (or entirely SQL-free) usages never hold a transaction open."""
+
+    def __init__(self, service: MySQLService) -> None:
+        self._service = service
+        self._backend_pool: Database = service._pool
         self._connection: Connection | None = None
         self._transaction: Transaction | None = None
+        self._acquire_lock = asyncio.Lock()
 
     async def __aenter__(self) -> MySQLTransaction:
-        self._connection = await self._backend_pool.connection().__aenter__()
-        self._transaction = await self._connection.transaction().__aenter__()
         return self
 
     async def __aexit__(self, *args: Any) -> None:
         # NOTE: This handles rollback on exception using `args`.
+        try:
+            if self._transaction is not None:
+                transaction = self._transaction
+                self._transaction = None
+                await transaction.__aexit__(*args)
+        finally:
+            # The connection is released even if the commit or rollback fails.
+            if self._connection is not None:
+                connection = self._connection
+                self._connection = None
+                await connection.__aexit__(*args)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._transaction is not None
+
+    @property
+    def pool(self) -> MySQLService:
+        return self._service
+
+    async def __get_connection(self) -> Connection:
+        if self._connection is not None:
+            return self._connection
+
+        async with self._acquire_lock:
+            if self._connection is None:
+                self._connection = await self._backend_pool.connection().__aenter__()
+
+        return self._connection
+
+    async def __get_transaction_connection(self) -> Connection:
+        connection = await self.__get_connection()
         if self._transaction is not None:
-            await self._transaction.__aexit__(*args)
+            return connection
 
-        if self._connection is not None:
-            await self._connection.__aexit__(*args)
+        async with self._acquire_lock:
+            if self._transaction is None:
+                self._transaction = await connection.transaction().__aenter__()
+
+        return connection
 
     async def fetch_one(
         self,
         query: str,
         values: MySQLValues | None = None,
     ) -> MySQLRow | None:
-        res = await self._connection.fetch_one(query, values)  # type: ignore
+        connection = await self.__get_connection()
+        res = await connection.fetch_one(query, values)  # type: ignore
         return res._mapping if res is not None else None
 
     async def fetch_all(
@@ -127,7 +181,8 @@ class MySQLTransaction(AbstractMySQLService):
         query: str,
         values: MySQLValues | None = None,
     ) -> list[MySQLRow]:
-        res = await self._connection.fetch_all(query, values)  # type: ignore
+        connection = await self.__get_connection()
+        res = await connection.fetch_all(query, values)  # type: ignore
         return [res._mapping for res in res]
 
     async def fetch_val(
@@ -135,8 +190,10 @@ class MySQLTransaction(AbstractMySQLService):
         query: str,
         values: MySQLValues | None = None,
     ) -> Any:
-        res = await self._connection.fetch_val(query, values)  # type: ignore
+        connection = await self.__get_connection()
+        res = await connection.fetch_val(query, values)  # type: ignore
         return res
 
     async def execute(self, query: str, values: MySQLValues | None = None) -> Any:
-        return await self._connection.execute(query, values)  # type: ignore
+        connection = await self.__get_transaction_connection()
+        return await connection.execute(query, values)  # type: ignore
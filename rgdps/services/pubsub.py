@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Awaitable
 from typing import Callable
 
@@ -13,65 +14,139 @@ from rgdps.common.context import Context
 RedisHandler = Callable[[Context, bytes], Awaitable[None]]
 
 
-async def _listen_router(
-    ctx: Context,
-    redis: Redis,
-    router: RedisPubsubRouter,
-) -> None:
-    redis_handlers = router.route_map()
-    async with redis.pubsub() as pubsub:
-        for channel in redis_handlers:
-            await pubsub.subscribe(channel)
+PUBSUB_RECONNECT_MIN_DELAY = 0.5
+PUBSUB_RECONNECT_MAX_DELAY = 30.0
+PUBSUB_SHUTDOWN_TIMEOUT = 10.0
+
+
+class RedisPubsubListener:
+    """Listens to the channels of a router, blocking on the Redis connection.
+    Each message is handled in its own tracked task, limited by the
+    concurrency set for its channel. Lost connections are re-established
+    with an exponential backoff."""
+
+    def __init__(
+        self,
+        ctx: Context,
+        redis: Redis,
+        router: RedisPubsubRouter,
+    ) -> None:
+        self._ctx = ctx
+        self._redis = redis
+        self._router = router
+
+        self._semaphores = {
+            channel: asyncio.Semaphore(router.concurrency(channel))
+            for channel in router.route_map()
+        }
+        self._handler_tasks: set[asyncio.Task[None]] = set()
+        self._task: asyncio.Task[None] | None = None
+
+    async def __handle(self, channel: bytes, data: bytes) -> None:
+        async with self._semaphores[channel]:
+            try:
+                await self._router.route_map()[channel](self._ctx, data)
+            except Exception:
+                logger.exception(
+                    "Error while handling Redis message.",
+                    extra={
+                        "channel": channel.decode(),
+                        "data": data.decode(errors="replace"),
+                    },
+                )
+
+    def __dispatch(self, channel: bytes, data: bytes) -> None:
+        task = asyncio.create_task(self.__handle(channel, data))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def __listen_once(self) -> None:
+        channels = list(self._router.route_map())
+
+        async with self._redis.pubsub() as pubsub:
+            await pubsub.subscribe(*channels)
             logger.debug(
-                "Subscribed to Redis a channel.",
+                "Subscribed to Redis channels.",
                 extra={
-                    "channel": channel.decode(),
+                    "channels": [channel.decode() for channel in channels],
                 },
             )
 
-        while True:
-            # TODO: Handle errors (different message types)
-            message = await pubsub.get_message()
-            if message is not None:
-                if message.get("type") != "message":
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=None,
+                )
+                if message is None or message["type"] != "message":
                     continue
-                try:
-                    # TODO: Investigate if spinning up tasks for each message
-                    # is a good idea.
-                    handler = redis_handlers[message["channel"]]
-                    await handler(ctx, message["data"])
-                except Exception:
-                    logger.exception(
-                        "Error while handling Redis message.",
-                        extra={
-                            "channel": message["channel"].decode(),
-                            "data": message["data"].decode(),
-                        },
-                    )
-
-            # NOTE: This is a hack to prevent the event loop from blocking.
-            await asyncio.sleep(0.1)
-
-
-def listen_router(
-    ctx: Context,
-    redis: Redis,
-    router: RedisPubsubRouter,
-) -> None:
-    asyncio.create_task(_listen_router(ctx, redis, router))
+
+                self.__dispatch(message["channel"], message["data"])
+
+    async def __listen(self) -> None:
+        delay = PUBSUB_RECONNECT_MIN_DELAY
+
+        while True:
+            listen_started = time.monotonic()
+            try:
+                await self.__listen_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A connection that stayed up for a while resets the backoff.
+                if time.monotonic() - listen_started > PUBSUB_RECONNECT_MAX_DELAY:
+                    delay = PUBSUB_RECONNECT_MIN_DELAY
+
+                logger.warning(
+                    "Lost the Redis pubsub connection. Reconnecting...",
+                    extra={
+                        "delay": delay,
+                    },
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, PUBSUB_RECONNECT_MAX_DELAY)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.__listen())
+
+    async def stop(self, timeout: float = PUBSUB_SHUTDOWN_TIMEOUT) -> None:
+        """Stops listening and waits up to `timeout` seconds for in-progress
+        handlers to finish before cancelling them."""
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if not self._handler_tasks:
+            return
+
+        _, pending = await asyncio.wait(self._handler_tasks, timeout=timeout)
+        if pending:
+            logger.warning(
+                "Cancelling Redis pubsub handlers still running on shutdown.",
+                extra={
+                    "handler_count": len(pending),
+                },
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
 
 async def listen_pubsubs(
     ctx: Context,
     redis: Redis,
     *routers: RedisPubsubRouter,
-) -> None:
+) -> RedisPubsubListener:
     main_handler = RedisPubsubRouter()
 
     for router in routers:
         main_handler.merge(router)
 
-    listen_router(ctx, redis, main_handler)
+    listener = RedisPubsubListener(ctx, redis, main_handler)
+    listener.start()
+    return listener
 
 
 class RedisPubsubRouter:
@@ -80,13 +155,19 @@ class RedisPubsubRouter:
     def __init__(self) -> None:
         # NOTE: Redis pubsub channels are bytes, not strings.
         self._routes: dict[bytes, RedisHandler] = {}
+        self._concurrency: dict[bytes, int] = {}
 
     def register(
         self,
         channel: str,
+        concurrency: int = 1,
     ) -> Callable[[RedisHandler], RedisHandler]:
+        """Registers a handler for a channel. At most `concurrency` messages
+        on the channel are handled at once; the rest wait their turn."""
+
         def decorator(handler: RedisHandler) -> RedisHandler:
             self._routes[channel.encode()] = handler
+            self._concurrency[channel.encode()] = concurrency
             return handler
 
         return decorator
@@ -101,6 +182,10 @@ class RedisPubsubRouter:
                     },
                 )
             self._routes[channel] = handler
+            self._concurrency[channel] = other.concurrency(channel)
+
+    def concurrency(self, channel: bytes) -> int:
+        return self._concurrency.get(channel, 1)
 
     def route_map(self) -> dict[bytes, RedisHandler]:
         return self._routes
@@ -2,16 +2,64 @@ from __future__ import annotations
 
 import asyncio
 import os
+import uuid
+import zlib
 from abc import ABC
 from abc import abstractmethod
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import BinaryIO
+from typing import Callable
+from typing import TypeVar
 
 from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
 from types_aiobotocore_s3 import S3Client
 
 from rgdps import logger
 
 
+# The size of the chunks read from storage when streaming.
+STORAGE_CHUNK_SIZE = 64 * 1024
+
+T = TypeVar("T")
+
+
+class BlobWriter(ABC):
+    """Incrementally writes a single blob. Nothing is visible at the key until
+    the writer is committed, and an aborted writer leaves the key untouched.
+
+    When used as an async context manager, the writer is committed on exit,
+    or aborted if an exception was raised."""
+
+    @abstractmethod
+    async def write(self, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def commit(self) -> None:
+        ...
+
+    @abstractmethod
+    async def abort(self) -> None:
+        ...
+
+    async def __aenter__(self) -> BlobWriter:
+        return self
+
+    async def __aexit__(self, exc_type: Any, *_: Any) -> None:
+        if exc_type is not None:
+            await self.abort()
+        else:
+            await self.commit()
+
+
 class AbstractStorage(ABC):
     @abstractmethod
     async def load(self, key: str) -> bytes | None:
@@ -24,10 +72,97 @@ class AbstractStorage(ABC):
         that the file will be available immediately after this method."""
         ...
 
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Deletes a binary file from long-term storage, if it exists."""
+        ...
+
+    @abstractmethod
+    def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """Iterates over all keys in long-term storage starting with `prefix`."""
+        ...
+
+    @abstractmethod
+    async def open_read(self, key: str) -> AsyncIterator[bytes] | None:
+        """Opens a binary file in long-term storage for reading it in chunks,
+        without loading it into memory as a whole. Returns `None` if it does
+        not exist."""
+        ...
+
+    @abstractmethod
+    async def open_write(self, key: str) -> BlobWriter:
+        """Opens a binary file in long-term storage for writing it in chunks.
+        Unlike `save`, the file is available as soon as the writer is
+        committed."""
+        ...
+
+
+async def _run_in_executor(
+    executor: Executor,
+    func: Callable[..., T],
+    *args: Any,
+) -> T:
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def _iter_chunks(data: bytes) -> AsyncIterator[bytes]:
+    view = memoryview(data)
+    for idx in range(0, len(view), STORAGE_CHUNK_SIZE):
+        yield bytes(view[idx : idx + STORAGE_CHUNK_SIZE])
+
+
+def _temp_location(location: str) -> str:
+    return f"{location}.{uuid.uuid4().hex}.tmp"
+
+
+class LocalBlobWriter(BlobWriter):
+    """Writes to a temporary file, moved over the destination on commit."""
+
+    def __init__(self, executor: Executor, location: str) -> None:
+        self._executor = executor
+        self._location = location
+        self._temp_location = _temp_location(location)
+        self._file = open(self._temp_location, "wb")
+
+    async def write(self, data: bytes) -> None:
+        await _run_in_executor(self._executor, self._file.write, data)
+
+    def __commit(self) -> None:
+        self._file.close()
+        os.replace(self._temp_location, self._location)
+
+    async def commit(self) -> None:
+        await _run_in_executor(self._executor, self.__commit)
+
+    def __abort(self) -> None:
+        self._file.close()
+        # May already be gone if the commit failed part way through.
+        try:
+            os.remove(self._temp_location)
+        except FileNotFoundError:
+            pass
+
+    async def abort(self) -> None:
+        await _run_in_executor(self._executor, self.__abort)
+
 
 class LocalStorage(AbstractStorage):
-    def __init__(self, root: str) -> None:
+    """Stores files within a local directory. All file I/O is performed on a
+    dedicated, bounded thread pool to avoid blocking the event loop, and all
+    writes are atomic."""
+
+    def __init__(self, root: str, io_threads: int = 8) -> None:
         self._root = root
+        self._executor = ThreadPoolExecutor(
+            max_workers=io_threads,
+            thread_name_prefix="rgdps-storage",
+        )
+
+    async def disconnect(self) -> None:
+        await asyncio.to_thread(self._executor.shutdown)
+
+    async def __run(self, func: Callable[..., T], *args: Any) -> T:
+        return await _run_in_executor(self._executor, func, *args)
 
     def __ensure_subdirectories(self, key: str) -> None:
         if "/" not in key:
@@ -36,20 +171,409 @@ class LocalStorage(AbstractStorage):
         directory = os.path.dirname(f"{self._root}/{key}")
         os.makedirs(directory, exist_ok=True)
 
+    def __load(self, key: str) -> bytes | None:
+        try:
+            with open(f"{self._root}/{key}", "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
     async def load(self, key: str) -> bytes | None:
+        return await self.__run(self.__load, key)
+
+    def __save(self, key: str, data: bytes) -> None:
+        self.__ensure_subdirectories(key)
         location = f"{self._root}/{key}"
-        if not os.path.exists(location):
-            return None
+        temp_location = _temp_location(location)
 
-        with open(location, "rb") as file:
-            return file.read()
+        try:
+            with open(temp_location, "wb") as file:
+                file.write(data)
+            os.replace(temp_location, location)
+        except BaseException:
+            if os.path.exists(temp_location):
+                os.remove(temp_location)
+            raise
 
     async def save(self, key: str, data: bytes) -> None:
+        await self.__run(self.__save, key, data)
+
+    def __delete(self, key: str) -> None:
+        try:
+            os.remove(f"{self._root}/{key}")
+        except FileNotFoundError:
+            pass
+
+    async def delete(self, key: str) -> None:
+        await self.__run(self.__delete, key)
+
+    def __list_keys(self, prefix: str) -> list[str]:
+        directory, _ = os.path.split(prefix)
+        keys = []
+        for root, _, files in os.walk(f"{self._root}/{directory}"):
+            for file in files:
+                # Writes that are in progress (or were interrupted).
+                if file.endswith(".tmp"):
+                    continue
+
+                key = os.path.relpath(os.path.join(root, file), self._root)
+                if key.startswith(prefix):
+                    keys.append(key)
+
+        return keys
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        for key in await self.__run(self.__list_keys, prefix):
+            yield key
+
+    def __open(self, key: str) -> BinaryIO | None:
+        try:
+            return open(f"{self._root}/{key}", "rb")
+        except FileNotFoundError:
+            return None
+
+    async def __read_chunks(self, file: BinaryIO) -> AsyncIterator[bytes]:
+        try:
+            while chunk := await self.__run(file.read, STORAGE_CHUNK_SIZE):
+                yield chunk
+        finally:
+            file.close()
+
+    async def open_read(self, key: str) -> AsyncIterator[bytes] | None:
+        file = await self.__run(self.__open, key)
+        if file is None:
+            return None
+
+        return self.__read_chunks(file)
+
+    def __open_write(self, key: str) -> BlobWriter:
         self.__ensure_subdirectories(key)
-        location = f"{self._root}/{key}"
+        return LocalBlobWriter(self._executor, f"{self._root}/{key}")
+
+    async def open_write(self, key: str) -> BlobWriter:
+        return await self.__run(self.__open_write, key)
+
+
+# S3 requires every part but the last to be at least 5MiB.
+S3_PART_SIZE = 8 * 1024 * 1024
+
+
+class S3BlobWriter(BlobWriter):
+    """Writes using a multipart upload, completed on commit. Blobs smaller
+    than a single part are uploaded with a regular `PutObject` instead."""
+
+    def __init__(self, s3: S3Client, bucket: str, key: str) -> None:
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[dict[str, Any]] = []
+
+    async def __upload_part(self) -> None:
+        if self._upload_id is None:
+            upload = await self._s3.create_multipart_upload(
+                Bucket=self._bucket,
+                Key=self._key,
+            )
+            self._upload_id = upload["UploadId"]
+
+        part_number = len(self._parts) + 1
+        part = await self._s3.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": part["ETag"], "PartNumber": part_number})
+        self._buffer.clear()
+
+    async def write(self, data: bytes) -> None:
+        self._buffer += data
+        if len(self._buffer) >= S3_PART_SIZE:
+            await self.__upload_part()
+
+    async def commit(self) -> None:
+        if self._upload_id is None:
+            await self._s3.put_object(
+                Bucket=self._bucket,
+                Key=self._key,
+                Body=bytes(self._buffer),
+            )
+            self._buffer.clear()
+            return
+
+        if self._buffer:
+            await self.__upload_part()
+
+        await self._s3.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    async def abort(self) -> None:
+        self._buffer.clear()
+        if self._upload_id is not None:
+            await self._s3.abort_multipart_upload(
+                Bucket=self._bucket,
+                Key=self._key,
+                UploadId=self._upload_id,
+            )
+
+
+# Failed uploads are retried (with the data kept pending), waiting
+# exponentially longer between attempts up to the maximum.
+S3_UPLOAD_RETRY_DELAY = 1.0
+S3_UPLOAD_RETRY_MAX_DELAY = 60.0
+
+
+@dataclass
+class S3UploadMetrics:
+    pending_count: int = 0
+    pending_bytes: int = 0
+    in_flight: int = 0
+    uploaded: int = 0
+    uploaded_bytes: int = 0
+    superseded: int = 0
+    failed: int = 0
+    dead_lettered: int = 0
+    backpressure_waits: int = 0
+
+
+class S3UploadQueue:
+    """A write-behind queue for S3 uploads, performed by a fixed number of
+    workers. Saving a key that has not started uploading yet replaces the
+    pending data, and uploads of the same key never overlap.
+
+    The data pending upload is bounded by `memory_budget` bytes, with `put`
+    waiting for uploads to finish once exceeded. Until uploaded, data may be
+    read back using `get`.
+
+    Failed uploads keep their data pending and are retried with backoff, as
+    their saves have already been reported as successful. Uploads are given
+    up on (dead lettered, releasing their data) after `max_attempts`, on an
+    error `is_permanent_error` deems permanent, or once stopping."""
+
+    def __init__(
+        self,
+        upload: Callable[[str, bytes], Awaitable[None]],
+        concurrency: int = 16,
+        memory_budget: int = 256 * 1024 * 1024,
+        max_attempts: int = 10,
+        is_permanent_error: Callable[[Exception], bool] | None = None,
+    ) -> None:
+        self._upload = upload
+        self._concurrency = concurrency
+        self._memory_budget = memory_budget
+        self._max_attempts = max_attempts
+        self._is_permanent_error = is_permanent_error
+
+        # The latest data of every key not yet uploaded.
+        self._pending: dict[str, bytes] = {}
+        # The data of every key being uploaded.
+        self._uploading: dict[str, bytes] = {}
+        self._scheduled: set[str] = set()
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._budget_condition = asyncio.Condition()
+        self._scheduled_condition = asyncio.Condition()
+        self._workers: list[asyncio.Task[None]] = []
+        self._stopping = False
+
+        self.metrics = S3UploadMetrics()
+
+    def get(self, key: str) -> bytes | None:
+        return self._pending.get(key)
+
+    async def __reserve(self, size: int) -> None:
+        metrics = self.metrics
+
+        async with self._budget_condition:
+            if metrics.pending_bytes and (
+                metrics.pending_bytes + size > self._memory_budget
+            ):
+                metrics.backpressure_waits += 1
+
+            # A single blob larger than the budget is let through on its own.
+            await self._budget_condition.wait_for(
+                lambda: not metrics.pending_bytes
+                or metrics.pending_bytes + size <= self._memory_budget,
+            )
+            metrics.pending_bytes += size
+
+    async def __release(self, size: int) -> None:
+        async with self._budget_condition:
+            self.metrics.pending_bytes -= size
+            self._budget_condition.notify_all()
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self.__reserve(len(data))
+
+        superseded = self._pending.get(key)
+        self._pending[key] = data
+
+        if superseded is None:
+            self.metrics.pending_count += 1
+        elif superseded is not self._uploading.get(key):
+            # It was never picked up, so will never be uploaded.
+            self.metrics.superseded += 1
+            await self.__release(len(superseded))
+
+        if key not in self._scheduled:
+            self._scheduled.add(key)
+            self._queue.put_nowait(key)
+
+    def __should_retry(self, error: Exception, attempts: int) -> bool:
+        if self._stopping or attempts >= self._max_attempts:
+            return False
+
+        return self._is_permanent_error is None or not self._is_permanent_error(
+            error,
+        )
+
+    async def __upload_key(self, key: str) -> None:
+        metrics = self.metrics
+
+        attempts = 0
+
+        # Keep uploading the key while it is saved again mid-upload (or until
+        # the upload succeeds or is given up on).
+        while (data := self._pending.get(key)) is not None:
+            self._uploading[key] = data
+            metrics.in_flight += 1
+
+            error: Exception | None = None
+            try:
+                await self._upload(key, data)
+            except Exception as e:
+                error = e
+            finally:
+                metrics.in_flight -= 1
+                del self._uploading[key]
 
-        with open(location, "wb") as file:
-            file.write(data)
+            superseded = self._pending.get(key) is not data
+            if error is None:
+                metrics.uploaded += 1
+                metrics.uploaded_bytes += len(data)
+                attempts = 0
+            elif superseded:
+                # The newer data is uploaded next, with its own attempts.
+                metrics.failed += 1
+                attempts = 0
+            else:
+                metrics.failed += 1
+                attempts += 1
+
+                if self.__should_retry(error, attempts):
+                    retry_delay = min(
+                        S3_UPLOAD_RETRY_DELAY * 2 ** (attempts - 1),
+                        S3_UPLOAD_RETRY_MAX_DELAY,
+                    )
+                    logger.warning(
+                        "Failed to upload to S3. Retrying later...",
+                        extra={
+                            "key": key,
+                            "attempts": attempts,
+                            "retry_delay": retry_delay,
+                        },
+                        exc_info=error,
+                    )
+                    await asyncio.sleep(retry_delay)
+                    continue
+
+                metrics.dead_lettered += 1
+                logger.error(
+                    "Failed to upload to S3. The data is lost.",
+                    extra={
+                        "key": key,
+                        "size": len(data),
+                        "attempts": attempts,
+                    },
+                    exc_info=error,
+                )
+
+            await self.__release(len(data))
+            if not superseded:
+                del self._pending[key]
+                metrics.pending_count -= 1
+
+    async def __run_worker(self) -> None:
+        while True:
+            key = await self._queue.get()
+            try:
+                await self.__upload_key(key)
+            except Exception:
+                logger.exception(
+                    "Unexpected error while uploading to S3.",
+                    extra={
+                        "key": key,
+                    },
+                )
+            finally:
+                self._scheduled.discard(key)
+                self._queue.task_done()
+
+                async with self._scheduled_condition:
+                    self._scheduled_condition.notify_all()
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self.__run_worker()) for _ in range(self._concurrency)
+        ]
+
+    async def wait_for_key(self, key: str) -> None:
+        """Waits for any queued upload of the key to finish."""
+
+        async with self._scheduled_condition:
+            await self._scheduled_condition.wait_for(
+                lambda: key not in self._scheduled,
+            )
+
+    async def drain(self) -> None:
+        """Waits for all queued uploads to finish."""
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        """Uploads all queued data and stops the workers. Uploads failing from
+        this point on are no longer retried."""
+
+        self._stopping = True
+        await self.drain()
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        logger.info(
+            "Stopped the S3 upload queue.",
+            extra={
+                "uploaded": self.metrics.uploaded,
+                "uploaded_bytes": self.metrics.uploaded_bytes,
+                "superseded": self.metrics.superseded,
+                "failed": self.metrics.failed,
+                "dead_lettered": self.metrics.dead_lettered,
+                "backpressure_waits": self.metrics.backpressure_waits,
+            },
+        )
+
+
+def _is_permanent_s3_error(error: Exception) -> bool:
+    """Checks whether an S3 request failed due to the request itself (such as
+    denied access or a missing bucket), so would fail again if retried."""
+
+    if not isinstance(error, ClientError):
+        return False
+
+    status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    if status_code is None:
+        return False
+
+    # Request timeouts and throttling are worth retrying.
+    return 400 <= status_code < 500 and status_code not in (408, 429)
 
 
 class S3Storage(AbstractStorage):
@@ -62,6 +586,8 @@ class S3Storage(AbstractStorage):
         bucket: str,
         timeout: int,
         retries: int,
+        upload_concurrency: int = 16,
+        upload_memory_budget: int = 256 * 1024 * 1024,
     ) -> None:
         boto_config = AioConfig(
             timeout=timeout,
@@ -76,16 +602,29 @@ class S3Storage(AbstractStorage):
         )
         self._s3 = None
         self._bucket = bucket
-        self._retries = retries
+        self._uploads = S3UploadQueue(
+            self.__save,
+            concurrency=upload_concurrency,
+            memory_budget=upload_memory_budget,
+            max_attempts=retries,
+            is_permanent_error=_is_permanent_s3_error,
+        )
+
+    @property
+    def upload_metrics(self) -> S3UploadMetrics:
+        return self._uploads.metrics
 
     async def connect(self) -> None:
         self._s3 = await self._s3_creator.__aenter__()
+        self._uploads.start()
 
     async def disconnect(self) -> None:
+        await self._uploads.stop()
         await self._s3_creator.__aexit__(None, None, None)
         self._s3 = None
 
-    async def __save_file(self, key: str, data: bytes) -> None:
+    async def __save(self, key: str, data: bytes) -> None:
+        # NOTE: Failures are retried by the upload queue.
         assert self._s3 is not None
 
         await self._s3.put_object(
@@ -94,41 +633,27 @@ class S3Storage(AbstractStorage):
             Body=data,
         )
 
-    async def __save(self, key: str, data: bytes) -> None:
-        for i in range(self._retries):
-            try:
-                await self.__save_file(key, data)
-                return
-            except Exception as e:
-                sleep_time = i * 2
-                logger.warning(
-                    "Failed to save to S3. Retrying...",
-                    extra={
-                        "key": key,
-                        "sleep_time": sleep_time,
-                    },
-                    exc_info=e,
-                )
-                await asyncio.sleep(sleep_time)
-
-        logger.error(
-            "Failed to save to S3 after retries.",
-            extra={
-                "key": key,
-                "retries": self._retries,
-            },
-        )
-
     async def save(self, key: str, data: bytes) -> None:
+        """Queues the data to be uploaded in the background, waiting only if
+        too much data is already pending upload. The data may be loaded
+        immediately, even before it is uploaded."""
+
         if self._s3 is None:
             raise RuntimeError("The S3 client has not been connected!")
 
-        asyncio.create_task(self.__save(key, data))
+        await self._uploads.put(key, data)
+
+    async def drain(self) -> None:
+        """Waits for all saves in progress to finish."""
+        await self._uploads.drain()
 
     async def load(self, key: str) -> bytes | None:
         if self._s3 is None:
             raise RuntimeError("The S3 client has not been connected!")
 
+        if (pending_data := self._uploads.get(key)) is not None:
+            return pending_data
+
         try:
             response = await self._s3.get_object(
                 Bucket=self._bucket,
@@ -138,3 +663,216 @@ class S3Storage(AbstractStorage):
             return None
 
         return await response["Body"].read()
+
+    async def delete(self, key: str) -> None:
+        if self._s3 is None:
+            raise RuntimeError("The S3 client has not been connected!")
+
+        # Otherwise, a queued upload could recreate the key.
+        await self._uploads.wait_for_key(key)
+        await self._s3.delete_object(
+            Bucket=self._bucket,
+            Key=key,
+        )
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        if self._s3 is None:
+            raise RuntimeError("The S3 client has not been connected!")
+
+        paginator = self._s3.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self._bucket, Prefix=prefix):
+            for s3_object in page.get("Contents", []):
+                yield s3_object["Key"]
+
+    async def open_read(self, key: str) -> AsyncIterator[bytes] | None:
+        if self._s3 is None:
+            raise RuntimeError("The S3 client has not been connected!")
+
+        if (pending_data := self._uploads.get(key)) is not None:
+            return _iter_chunks(pending_data)
+
+        try:
+            response = await self._s3.get_object(
+                Bucket=self._bucket,
+                Key=key,
+            )
+        except self._s3.exceptions.NoSuchKey:
+            return None
+
+        async def read_chunks() -> AsyncIterator[bytes]:
+            body = response["Body"]
+            try:
+                async for chunk in body.iter_chunks(STORAGE_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                body.close()
+
+        return read_chunks()
+
+    async def open_write(self, key: str) -> BlobWriter:
+        if self._s3 is None:
+            raise RuntimeError("The S3 client has not been connected!")
+
+        # Ensure a queued upload of the key cannot overwrite this write.
+        await self._uploads.wait_for_key(key)
+        return S3BlobWriter(self._s3, self._bucket, key)
+
+
+# Encoded blobs start with a magic value followed by the codec byte. The
+# magic's first byte is never found at the start of the (text) data stored
+# before compression, so such data can be told apart and is read as is.
+BLOB_MAGIC = b"\xffRGB"
+BLOB_HEADER_SIZE = len(BLOB_MAGIC) + 1
+
+# Blobs at least this large are (de)compressed in a thread.
+BLOB_THREAD_THRESHOLD = 64 * 1024
+
+
+class BlobCodec(IntEnum):
+    RAW = 0
+    ZLIB = 1
+
+
+def is_encoded_blob(data: bytes) -> bool:
+    return data[: len(BLOB_MAGIC)] == BLOB_MAGIC
+
+
+def encode_blob(data: bytes, level: int) -> bytes:
+    """Compresses data, prefixing it with a header describing the codec used.
+    Data that does not compress is stored raw."""
+
+    compressed = zlib.compress(data, level)
+    if len(compressed) >= len(data):
+        return BLOB_MAGIC + bytes((BlobCodec.RAW,)) + data
+
+    return BLOB_MAGIC + bytes((BlobCodec.ZLIB,)) + compressed
+
+
+def decode_blob(data: bytes) -> bytes:
+    if not is_encoded_blob(data):
+        return data
+
+    codec = BlobCodec(data[len(BLOB_MAGIC)])
+    payload = memoryview(data)[BLOB_HEADER_SIZE:]
+
+    match codec:
+        case BlobCodec.RAW:
+            return bytes(payload)
+        case BlobCodec.ZLIB:
+            return zlib.decompress(payload)
+
+
+async def _decode_blob_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    header = b""
+    async for chunk in chunks:
+        header += chunk
+        if len(header) >= BLOB_HEADER_SIZE:
+            break
+
+    if not is_encoded_blob(header):
+        if header:
+            yield header
+
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    codec = BlobCodec(header[len(BLOB_MAGIC)])
+    remainder = header[BLOB_HEADER_SIZE:]
+
+    match codec:
+        case BlobCodec.RAW:
+            if remainder:
+                yield remainder
+
+            async for chunk in chunks:
+                yield chunk
+
+        case BlobCodec.ZLIB:
+            decompressor = zlib.decompressobj()
+            if remainder:
+                yield decompressor.decompress(remainder)
+
+            async for chunk in chunks:
+                if len(chunk) >= BLOB_THREAD_THRESHOLD:
+                    yield await asyncio.to_thread(decompressor.decompress, chunk)
+                else:
+                    yield decompressor.decompress(chunk)
+
+            yield decompressor.flush()
+
+
+class CompressedBlobWriter(BlobWriter):
+    def __init__(self, writer: BlobWriter, level: int) -> None:
+        self._writer = writer
+        self._compressor = zlib.compressobj(level)
+        self._header_written = False
+
+    async def write(self, data: bytes) -> None:
+        if not self._header_written:
+            await self._writer.write(BLOB_MAGIC + bytes((BlobCodec.ZLIB,)))
+            self._header_written = True
+
+        if len(data) >= BLOB_THREAD_THRESHOLD:
+            compressed = await asyncio.to_thread(self._compressor.compress, data)
+        else:
+            compressed = self._compressor.compress(data)
+
+        if compressed:
+            await self._writer.write(compressed)
+
+    async def commit(self) -> None:
+        if not self._header_written:
+            await self.write(b"")
+
+        await self._writer.write(self._compressor.flush())
+        await self._writer.commit()
+
+    async def abort(self) -> None:
+        await self._writer.abort()
+
+
+class CompressedStorage(AbstractStorage):
+    """Wraps another storage, transparently compressing everything saved to
+    it. Data saved before compression was enabled is still readable."""
+
+    def __init__(self, storage: AbstractStorage, level: int = 6) -> None:
+        self._storage = storage
+        self._level = level
+
+    async def load(self, key: str) -> bytes | None:
+        data = await self._storage.load(key)
+        if data is None:
+            return None
+
+        if len(data) >= BLOB_THREAD_THRESHOLD:
+            return await asyncio.to_thread(decode_blob, data)
+
+        return decode_blob(data)
+
+    async def save(self, key: str, data: bytes) -> None:
+        if len(data) >= BLOB_THREAD_THRESHOLD:
+            encoded = await asyncio.to_thread(encode_blob, data, self._level)
+        else:
+            encoded = encode_blob(data, self._level)
+
+        await self._storage.save(key, encoded)
+
+    async def delete(self, key: str) -> None:
+        await self._storage.delete(key)
+
+    def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        return self._storage.iter_keys(prefix)
+
+    async def open_read(self, key: str) -> AsyncIterator[bytes] | None:
+        chunks = await self._storage.open_read(key)
+        if chunks is None:
+            return None
+
+        return _decode_blob_stream(chunks)
+
+    async def open_write(self, key: str) -> BlobWriter:
+        return CompressedBlobWriter(
+            await self._storage.open_write(key),
+            self._level,
+        )
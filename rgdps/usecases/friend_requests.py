@@ -37,13 +37,16 @@ async def get_user(
         include_deleted=False,
     )
 
+    # Swap the sender and recipient according to the from_sender_id flag
+    target_user_ids = [
+        request.recipient_user_id if is_sender_user_id else request.sender_user_id
+        for request in requests
+    ]
+    users = await repositories.user.from_ids(ctx, target_user_ids)
+
     friend_request_responses = []
-    for request in requests:
-        # Swap the sender and recipient according to the from_sender_id flag
-        target_user_id = (
-            request.recipient_user_id if is_sender_user_id else request.sender_user_id
-        )
-        user = await repositories.user.from_id(ctx, target_user_id)
+    for request, target_user_id in zip(requests, target_user_ids):
+        user = users.get(target_user_id)
 
         if user is None:
             continue
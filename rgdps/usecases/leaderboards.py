@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import time
+from typing import Callable
+
 from rgdps import repositories
+from rgdps.common import sync
 from rgdps.common.context import Context
+from rgdps.common.context import run_in_background
+from rgdps.config import config
 from rgdps.constants.errors import ServiceError
+from rgdps.constants.leaderboards import LEADERBOARD_SIZE
 from rgdps.constants.leaderboards import LeaderboardType
 from rgdps.constants.users import CREATOR_PRIVILEGES
 from rgdps.constants.users import STAR_PRIVILEGES
 from rgdps.models.user import User
+from rgdps.repositories.user import UserLeaderboardStats
 
-LEADERBOARD_SIZE = 100
+LEADERBOARD_SYNC_CHUNK_SIZE = 5000
+LEADERBOARD_SYNC_CONCURRENCY = 4
+LEADERBOARD_RENDER_LOCK_EXPIRY = 10
 
 
 async def get(ctx: Context, lb_type: LeaderboardType) -> list[User] | ServiceError:
@@ -28,49 +38,137 @@ async def get(ctx: Context, lb_type: LeaderboardType) -> list[User] | ServiceErr
         case _:
             raise NotImplementedError
 
-    res = []
+    users = await repositories.user.from_ids(ctx, top_user_ids)
+
+    return [users[user_id] for user_id in top_user_ids if user_id in users]
 
-    for user_id in top_user_ids:
-        user = await repositories.user.from_id(ctx, user_id)
-        if user is None:
-            continue
 
-        res.append(user)
+async def get_rendered(
+    ctx: Context,
+    lb_type: LeaderboardType,
+    render: Callable[[list[User]], str],
+) -> str | ServiceError:
+    """Fetches the leaderboard as rendered by `render`.
 
-    return res
+    The rendered leaderboard is cached for `leaderboard_render_ttl` seconds,
+    or until a change to its users. Once stale, a single request starts
+    re-rendering it in the background while every request is served the
+    stale copy."""
+
+    async def render_and_cache(render_ctx: Context) -> str | ServiceError:
+        render_ts = time.time()
+        leaderboard = await get(render_ctx, lb_type)
+        if isinstance(leaderboard, ServiceError):
+            return leaderboard
+
+        rendered = render(leaderboard)
+        await repositories.leaderboard.set_rendered(
+            render_ctx,
+            lb_type,
+            repositories.leaderboard.RenderedLeaderboard(rendered, render_ts),
+            expiry=config.leaderboard_render_stale_ttl,
+        )
+        return rendered
+
+    async def refresh(refresh_ctx: Context) -> None:
+        try:
+            await render_and_cache(refresh_ctx)
+        finally:
+            await repositories.leaderboard.unlock_rendered(refresh_ctx, lb_type)
+
+    cached, invalidated_ts = await repositories.leaderboard.get_rendered(
+        ctx,
+        lb_type,
+    )
+    if cached is None:
+        return await render_and_cache(ctx)
+
+    if (
+        cached.rendered_ts <= invalidated_ts
+        or time.time() - cached.rendered_ts >= config.leaderboard_render_ttl
+    ) and await repositories.leaderboard.lock_rendered(
+        ctx,
+        lb_type,
+        expiry=LEADERBOARD_RENDER_LOCK_EXPIRY,
+    ):
+        run_in_background(ctx, refresh)
+
+    return cached.rendered
 
 
 async def synchronise_top_stars(ctx: Context) -> bool | ServiceError:
-    user_ids = await repositories.user.all_ids(ctx)
+    """Rebuilds the star leaderboard from the database. The live leaderboard
+    is swapped out in one step once the rebuild completes."""
 
-    for user_id in user_ids:
-        user = await repositories.user.from_id(ctx, user_id)
-        if user is None:
-            continue
+    rebuild_key = repositories.leaderboard.start_star_rebuild()
 
-        if not (user.privileges & STAR_PRIVILEGES == STAR_PRIVILEGES):
-            continue
+    async def fetch_chunk(
+        after_id: int,
+        limit: int,
+    ) -> list[UserLeaderboardStats]:
+        return await repositories.user.leaderboard_stats_after_id(
+            ctx,
+            after_id,
+            limit,
+        )
 
-        await repositories.leaderboard.set_star_count(ctx, user_id, user.stars)
+    async def handle_chunk(chunk: list[UserLeaderboardStats]) -> None:
+        await repositories.leaderboard.add_star_rebuild_counts(
+            ctx,
+            rebuild_key,
+            {
+                user.id: user.stars
+                for user in chunk
+                if user.stars > 0
+                and user.privileges & STAR_PRIVILEGES == STAR_PRIVILEGES
+            },
+        )
+
+    await sync.synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=LEADERBOARD_SYNC_CHUNK_SIZE,
+        concurrency=LEADERBOARD_SYNC_CONCURRENCY,
+    )
 
+    await repositories.leaderboard.finish_star_rebuild(ctx, rebuild_key)
     return True
 
 
 async def synchronise_top_creators(ctx: Context) -> bool | ServiceError:
-    user_ids = await repositories.user.all_ids(ctx)
+    """Rebuilds the creator leaderboard from the database. The live
+    leaderboard is swapped out in one step once the rebuild completes."""
 
-    for user_id in user_ids:
-        user = await repositories.user.from_id(ctx, user_id)
-        if user is None:
-            continue
+    rebuild_key = repositories.leaderboard.start_creator_rebuild()
 
-        if not (user.privileges & CREATOR_PRIVILEGES == CREATOR_PRIVILEGES):
-            continue
+    async def fetch_chunk(
+        after_id: int,
+        limit: int,
+    ) -> list[UserLeaderboardStats]:
+        return await repositories.user.leaderboard_stats_after_id(
+            ctx,
+            after_id,
+            limit,
+        )
 
-        await repositories.leaderboard.set_creator_count(
+    async def handle_chunk(chunk: list[UserLeaderboardStats]) -> None:
+        await repositories.leaderboard.add_creator_rebuild_counts(
             ctx,
-            user_id,
-            user.creator_points,
+            rebuild_key,
+            {
+                user.id: user.creator_points
+                for user in chunk
+                if user.creator_points > 0
+                and user.privileges & CREATOR_PRIVILEGES == CREATOR_PRIVILEGES
+            },
         )
 
+    await sync.synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=LEADERBOARD_SYNC_CHUNK_SIZE,
+        concurrency=LEADERBOARD_SYNC_CONCURRENCY,
+    )
+
+    await repositories.leaderboard.finish_creator_rebuild(ctx, rebuild_key)
     return True
@@ -37,9 +37,14 @@ async def get_level(
         sorting=sorting,
     )
 
+    users = await repositories.user.from_ids(
+        ctx,
+        [comment.user_id for comment in comments],
+    )
+
     level_comment_responses = []
     for comment in comments:
-        user = await repositories.user.from_id(ctx, comment.user_id)
+        user = users.get(comment.user_id)
 
         if user is None:
             continue
@@ -101,7 +106,7 @@ async def create(
     percent: int,
 ) -> LevelComment | ServiceError:
     # TODO: Spam protection
-    level = repositories.level.from_id(ctx, level_id=level_id)
+    level = await repositories.level.from_id(ctx, level_id=level_id)
     if level is None:
         return ServiceError.COMMENTS_TARGET_NOT_FOUND
 
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import hashlib
 import time
 from datetime import datetime
+from datetime import timedelta
+from typing import Callable
 from typing import NamedTuple
 
 from rgdps import repositories
 from rgdps.common import gd_logic
+from rgdps.common import hashes
+from rgdps.common import sync
 from rgdps.common.context import Context
+from rgdps.common.context import DataContext
+from rgdps.common.context import run_in_background
+from rgdps.config import config
 from rgdps.constants.errors import ServiceError
 from rgdps.constants.levels import LevelDifficulty
 from rgdps.constants.levels import LevelLength
@@ -17,6 +25,37 @@ from rgdps.models.level import Level
 from rgdps.models.song import Song
 from rgdps.models.user import User
 
+SEARCH_SYNC_CHUNK_SIZE = 1000
+SEARCH_SYNC_CONCURRENCY = 4
+# Incremental synchronisations also resend rows modified shortly before the
+# previous one started, as `modified_ts` is set when a row is written rather
+# than when its transaction commits.
+SEARCH_SYNC_OVERLAP = timedelta(minutes=5)
+SEARCH_CACHE_LOCK_EXPIRY = 10
+LEVEL_DATA_GC_BATCH_SIZE = 1000
+LEVEL_DATA_BACKFILL_CHUNK_SIZE = 100
+LEVEL_DATA_BACKFILL_CONCURRENCY = 4
+
+
+async def _store_level_data(ctx: Context, level_data: bytes) -> str:
+    """Stores the level data by its hash, returning the hash. Data already
+    referenced by another level is not stored again."""
+
+    data_hash = hashes.hash_level_data_content(level_data)
+
+    if not await repositories.level.referenced_data_hashes(ctx, [data_hash]):
+        # Restart the grace period if it was found orphaned before.
+        deleting = await repositories.level_data.unmark_orphan(ctx, data_hash)
+        await repositories.level_data.create(ctx, data_hash, level_data)
+
+        # The garbage collector may delete the data after we stored it, so it
+        # is stored again once the collector is done.
+        if deleting:
+            await repositories.level_data.wait_for_deletion(ctx, data_hash)
+            await repositories.level_data.create(ctx, data_hash, level_data)
+
+    return data_hash
+
 
 async def create_or_update(
     ctx: Context,
@@ -58,6 +97,9 @@ async def create_or_update(
     else:
         publicity = LevelPublicity.PUBLIC
 
+    level_data_bytes = level_data.encode()
+    data_security_hash = hashes.hash_level_data(level_data_bytes)
+
     # Check if we are updating or creating.
     old_level = await repositories.level.from_id(
         ctx,
@@ -81,6 +123,8 @@ async def create_or_update(
         if old_level.update_locked:
             return ServiceError.LEVELS_UPDATE_LOCKED
 
+        data_hash = await _store_level_data(ctx, level_data_bytes)
+
         # Apply new values to the old level.
         level = await repositories.level.update_partial(
             ctx,
@@ -102,14 +146,16 @@ async def create_or_update(
             low_detail_mode=low_detail_mode,
             building_time=building_time,
             update_ts=datetime.now(),
+            data_security_hash=data_security_hash,
+            data_size=len(level_data_bytes),
+            data_hash=data_hash,
         )
 
         # Should never happen.
         if level is None:
             return ServiceError.LEVELS_NOT_FOUND
-
-        await repositories.level_data.create(ctx, level.id, level_data)
     else:
+        data_hash = await _store_level_data(ctx, level_data_bytes)
         level = await repositories.level.create(
             ctx,
             name=name,
@@ -131,10 +177,11 @@ async def create_or_update(
             coins=coins,
             copy_password=copy_password,
             building_time=building_time,
+            data_security_hash=data_security_hash,
+            data_size=len(level_data_bytes),
+            data_hash=data_hash,
         )
 
-        await repositories.level_data.create(ctx, level.id, level_data)
-
     return level
 
 
@@ -195,11 +242,7 @@ async def search(
     )
 
     songs = set()
-    users = set()
     for level in levels_db.results:
-        user = await repositories.user.from_id(ctx, level.user_id)
-        assert user is not None, "User associated with level not found."
-        users.add(user)
         if level.custom_song_id:
             song = await repositories.song.from_id(ctx, level.custom_song_id)
             if song:
@@ -210,38 +253,217 @@ async def search(
         if lookup_level in levels_db.results:
             levels_db.results.remove(lookup_level)
         levels_db.results.insert(0, lookup_level)
-        users.add(await repositories.user.from_id(ctx, lookup_level.user_id))
+
+    users = await repositories.user.from_ids(
+        ctx,
+        [level.user_id for level in levels_db.results],
+    )
 
     return SearchResponse(
         levels=levels_db.results,
         total=levels_db.total + (1 if lookup_level else 0),
         songs=list(songs),
-        users=list(users),
+        users=list(users.values()),
+    )
+
+
+def _search_cache_key(
+    page: int,
+    page_size: int,
+    query: str | None,
+    search_type: LevelSearchType | None,
+    level_lengths: list[LevelLength] | None,
+    featured: bool,
+    original: bool,
+    two_player: bool,
+    unrated: bool,
+    rated: bool,
+    song_id: int | None,
+    custom_song_id: int | None,
+) -> str:
+    """Creates a canonical key for a set of search parameters, so that
+    equivalent searches share a cache entry."""
+
+    lengths_str = "-"
+    if level_lengths:
+        lengths_str = ",".join(
+            str(length.value) for length in sorted(set(level_lengths))
+        )
+
+    canonical = "|".join(
+        (
+            str(page),
+            str(page_size),
+            (query or "").strip().lower(),
+            str(search_type.value if search_type is not None else ""),
+            lengths_str,
+            str(int(featured)),
+            str(int(original)),
+            str(int(two_player)),
+            str(int(unrated)),
+            str(int(rated)),
+            str(song_id or ""),
+            str(custom_song_id or ""),
+        ),
+    )
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+async def search_rendered(
+    ctx: Context,
+    render: Callable[[SearchResponse], str],
+    page: int,
+    page_size: int,
+    query: str | None = None,
+    search_type: LevelSearchType | None = None,
+    level_lengths: list[LevelLength] | None = None,
+    completed_levels: list[int] | None = None,
+    featured: bool = False,
+    original: bool = False,
+    two_player: bool = False,
+    unrated: bool = False,
+    rated: bool = False,
+    song_id: int | None = None,
+    custom_song_id: int | None = None,
+    followed_list: list[int] | None = None,
+) -> str | ServiceError:
+    """Searches levels, returning the results as rendered by `render`.
+
+    Rendered pages are cached for `level_search_cache_ttl` seconds. Once
+    stale, a single request starts re-rendering the page in the background
+    while every request is served the stale copy, so a popular page is never
+    re-rendered more than once at a time."""
+
+    async def search_and_render(search_ctx: Context) -> str | ServiceError:
+        result = await search(
+            search_ctx,
+            page=page,
+            page_size=page_size,
+            query=query,
+            search_type=search_type,
+            level_lengths=level_lengths,
+            completed_levels=completed_levels,
+            featured=featured,
+            original=original,
+            two_player=two_player,
+            unrated=unrated,
+            rated=rated,
+            song_id=song_id,
+            custom_song_id=custom_song_id,
+            followed_list=followed_list,
+        )
+        if isinstance(result, ServiceError):
+            return result
+
+        return render(result)
+
+    # Personalised searches are not worth caching.
+    if completed_levels or followed_list:
+        return await search_and_render(ctx)
+
+    cache_key = _search_cache_key(
+        page,
+        page_size,
+        query,
+        search_type,
+        level_lengths,
+        featured,
+        original,
+        two_player,
+        unrated,
+        rated,
+        song_id,
+        custom_song_id,
+    )
+
+    async def render_and_cache(render_ctx: Context) -> str | ServiceError:
+        render_ts = time.time()
+        rendered = await search_and_render(render_ctx)
+        if isinstance(rendered, ServiceError):
+            return rendered
+
+        await repositories.level.set_search_cache(
+            render_ctx,
+            cache_key,
+            repositories.level.CachedSearchPage(rendered, render_ts),
+            expiry=config.level_search_cache_stale_ttl,
+        )
+        return rendered
+
+    async def refresh(refresh_ctx: Context) -> None:
+        try:
+            # Failing to refresh keeps serving the stale page until the lock
+            # is claimed again.
+            await render_and_cache(refresh_ctx)
+        finally:
+            await repositories.level.unlock_search_cache(refresh_ctx, cache_key)
+
+    cached_page, invalidated_ts = await repositories.level.get_search_cache(
+        ctx,
+        cache_key,
+    )
+    if cached_page is None:
+        return await render_and_cache(ctx)
+
+    if (
+        cached_page.rendered_ts <= invalidated_ts
+        or time.time() - cached_page.rendered_ts >= config.level_search_cache_ttl
+    ) and await repositories.level.lock_search_cache(
+        ctx,
+        cache_key,
+        expiry=SEARCH_CACHE_LOCK_EXPIRY,
+    ):
+        run_in_background(ctx, refresh)
+
+    return cached_page.rendered
+
+
+async def _invalidate_search_cache(ctx: Context) -> None:
+    # Meili writes are queued, so pages rendered before the queue is flushed
+    # may not reflect the change yet. They are marked as stale too.
+    await repositories.level.invalidate_search_cache(
+        ctx,
+        time.time() + config.meili_queue_flush_interval,
     )
 
 
 # Fun fact, gd relies on the search endpoint for song and user data.
 class LevelResponse(NamedTuple):
     level: Level
-    data: str
+    data: bytes
+    data_security_hash: str
 
 
 async def get(ctx: Context, level_id: int) -> LevelResponse | ServiceError:
     level = await repositories.level.from_id(ctx, level_id)
-    level_data = await repositories.level_data.from_level_id(ctx, level_id)
-    if not (level and level_data):
+    if level is None:
         return ServiceError.LEVELS_NOT_FOUND
 
-    # Handle stats updates
-    await repositories.level.update_partial(
-        ctx,
-        level.id,
-        downloads=level.downloads + 1,
-    )
+    if level.data_hash is not None:
+        level_data = await repositories.level_data.from_data_hash(
+            ctx,
+            level.data_hash,
+        )
+    else:
+        level_data = await repositories.level_data.from_level_id(ctx, level_id)
+
+    if not level_data:
+        return ServiceError.LEVELS_NOT_FOUND
+
+    data_security_hash = level.data_security_hash
+    if data_security_hash is None:
+        # Uploaded before the hash was stored alongside the level. These are
+        # stored by `backfill_data_security`, keeping this path write free.
+        data_security_hash = hashes.hash_level_data(level_data)
+
+    # Handle stats updates. These are buffered and written in bulk by
+    # `flush_pending_downloads`.
+    await repositories.level.add_pending_downloads(ctx, level.id)
 
     return LevelResponse(
         level=level,
         data=level_data,
+        data_security_hash=data_security_hash,
     )
 
 
@@ -262,23 +484,76 @@ async def delete(ctx: Context, level_id: int, user: User) -> bool | ServiceError
 
     # TODO: Creator point recalculation.
     await repositories.level.delete_meili(ctx, level_id)
+    await _invalidate_search_cache(ctx)
     return True
 
 
-async def synchronise_search(ctx: Context) -> bool | ServiceError:
+async def flush_pending_downloads(ctx: Context) -> int:
+    """Writes all buffered download increments into the database and search
+    index, returning the number of levels updated."""
+
+    pending_downloads = await repositories.level.take_pending_downloads(ctx)
+    if not pending_downloads:
+        return 0
+
+    try:
+        await repositories.level.increment_downloads(ctx, pending_downloads)
+    except Exception:
+        # Return the increments to the buffer so they are not lost.
+        for level_id, amount in pending_downloads.items():
+            await repositories.level.add_pending_downloads(ctx, level_id, amount)
+        raise
+
+    await repositories.level.update_meili_downloads(
+        ctx,
+        list(pending_downloads.keys()),
+    )
+
+    return len(pending_downloads)
+
+
+async def synchronise_search(
+    ctx: Context,
+    incremental: bool = False,
+) -> bool | ServiceError:
     """Synchronise the search index with the backing database.
-    Should be rarely used as its demanding on resources.
+    When `incremental` is set, only levels modified since the last
+    synchronisation are sent. A full synchronisation is demanding on
+    resources so it should be rarely used.
     """
 
-    levels = await repositories.level.all_ids(ctx)
+    # Taken from MySQL so that it is comparable with `modified_ts`.
+    sync_ts = await repositories.level.get_db_ts(ctx) - SEARCH_SYNC_OVERLAP
+    modified_since = None
+    if incremental:
+        modified_since = await repositories.level.get_meili_sync_ts(ctx)
+
+    async def fetch_chunk(after_id: int, limit: int) -> list[Level]:
+        return await repositories.level.from_db_after_id(
+            ctx,
+            after_id,
+            limit,
+            modified_since=modified_since,
+        )
+
+    async def handle_chunk(levels: list[Level]) -> None:
+        await repositories.level.create_meili_many(
+            ctx,
+            [level for level in levels if not level.deleted],
+        )
+        await repositories.level.delete_meili_many(
+            ctx,
+            [level.id for level in levels if level.deleted],
+        )
 
-    for level_id in levels:
-        level = await repositories.level.from_id(ctx, level_id)
-        # It got deleted while we were iterating.
-        if (not level) or level.deleted:
-            continue
-        await repositories.level.create_meili(ctx, level)
+    await sync.synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=SEARCH_SYNC_CHUNK_SIZE,
+        concurrency=SEARCH_SYNC_CONCURRENCY,
+    )
 
+    await repositories.level.set_meili_sync_ts(ctx, sync_ts)
     return True
 
 
@@ -315,10 +590,13 @@ async def suggest_stars(
     if level is None:
         return ServiceError.LEVELS_NOT_FOUND
 
+    await _invalidate_search_cache(ctx)
+
     new_creator_points = gd_logic.calculate_creator_points(level)
     creator_points += new_creator_points - current_creator_points
 
     await repositories.user.update_partial(ctx, user.id, creator_points=creator_points)
+    await repositories.leaderboard.drop_rendered_with_user(ctx, user.id)
 
     if user.privileges & CREATOR_PRIVILEGES == CREATOR_PRIVILEGES:
         await repositories.leaderboard.set_creator_count(ctx, user.id, creator_points)
@@ -350,3 +628,121 @@ async def update_description(
         return ServiceError.LEVELS_NOT_FOUND
 
     return result
+
+
+async def backfill_data_security(ctx: DataContext) -> int:
+    """Stores the data security hash and size of all levels uploaded before
+    they were stored alongside the level, returning the number of levels
+    updated."""
+
+    updated_count = 0
+
+    async def fetch_chunk(after_id: int, limit: int) -> list[Level]:
+        return await repositories.level.from_db_after_id(
+            ctx,
+            after_id,
+            limit,
+            missing_data_security=True,
+        )
+
+    async def handle_chunk(levels: list[Level]) -> None:
+        nonlocal updated_count
+
+        for level in levels:
+            level_data = await repositories.level_data.load_uncached(
+                ctx,
+                level.id,
+                level.data_hash,
+            )
+            if level_data is None:
+                continue
+
+            await repositories.level.update_data_security(
+                ctx,
+                level.id,
+                hashes.hash_level_data(level_data),
+                len(level_data),
+            )
+            updated_count += 1
+
+    await sync.synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=LEVEL_DATA_BACKFILL_CHUNK_SIZE,
+        concurrency=LEVEL_DATA_BACKFILL_CONCURRENCY,
+    )
+
+    return updated_count
+
+
+class LevelDataCollectionResult(NamedTuple):
+    orphaned_count: int
+    deleted_count: int
+    legacy_deleted_count: int
+
+
+async def collect_level_data(
+    ctx: DataContext,
+    grace_period: float,
+) -> LevelDataCollectionResult:
+    """Deletes stored level data no longer referenced by any level, alongside
+    data stored by level ID for levels since re-uploaded.
+
+    Unreferenced data is marked as orphaned, and is only deleted once it has
+    remained orphaned for `grace_period` seconds, as it may belong to a level
+    that is still being uploaded."""
+
+    current_ts = time.time()
+    orphaned_count = 0
+    deleted_count = 0
+
+    async for data_hashes in sync.iter_batches(
+        repositories.level_data.iter_data_hashes(ctx),
+        LEVEL_DATA_GC_BATCH_SIZE,
+    ):
+        referenced = await repositories.level.referenced_data_hashes(
+            ctx,
+            data_hashes,
+        )
+        await repositories.level_data.unmark_orphans(ctx, list(referenced))
+
+        orphans = await repositories.level_data.mark_orphans(
+            ctx,
+            [data_hash for data_hash in data_hashes if data_hash not in referenced],
+            current_ts,
+        )
+        orphaned_count += len(orphans)
+
+        # Data uploaded again since it was marked is no longer claimable.
+        claimed = [
+            data_hash
+            for data_hash, marked_ts in orphans.items()
+            if current_ts - marked_ts >= grace_period
+            and await repositories.level_data.claim_orphan(ctx, data_hash, marked_ts)
+        ]
+        referenced = await repositories.level.referenced_data_hashes(ctx, claimed)
+        for data_hash in claimed:
+            try:
+                if data_hash not in referenced:
+                    await repositories.level_data.delete_from_data_hash(
+                        ctx,
+                        data_hash,
+                    )
+                    deleted_count += 1
+            finally:
+                await repositories.level_data.release_orphan(ctx, data_hash)
+
+    legacy_deleted_count = 0
+    async for level_ids in sync.iter_batches(
+        repositories.level_data.iter_legacy_level_ids(ctx),
+        LEVEL_DATA_GC_BATCH_SIZE,
+    ):
+        for level_id in await repositories.level.ids_with_data_hash(ctx, level_ids):
+            await repositories.level_data.delete_from_level_id(ctx, level_id)
+            legacy_deleted_count += 1
+
+    return LevelDataCollectionResult(
+        orphaned_count=orphaned_count,
+        deleted_count=deleted_count,
+        legacy_deleted_count=legacy_deleted_count,
+    )
@@ -66,9 +66,14 @@ async def get_sent(
         include_deleted=include_deleted,
     )
 
+    users = await repositories.user.from_ids(
+        ctx,
+        [message.sender_user_id for message in messages],
+    )
+
     messages_resp = []
     for message in messages:
-        user = await repositories.user.from_id(ctx, message.sender_user_id)
+        user = users.get(message.sender_user_id)
 
         if user is None:
             continue
@@ -102,9 +107,14 @@ async def get_user(
         include_deleted=include_deleted,
     )
 
+    users = await repositories.user.from_ids(
+        ctx,
+        [message.recipient_user_id for message in messages],
+    )
+
     messages_resp = []
     for message in messages:
-        user = await repositories.user.from_id(ctx, message.recipient_user_id)
+        user = users.get(message.recipient_user_id)
 
         if user is None:
             continue
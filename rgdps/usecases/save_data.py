@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
+
 from rgdps import repositories
 from rgdps.common.context import Context
 from rgdps.constants.errors import ServiceError
+from rgdps.services.storage import BlobWriter
 
 
 async def get(ctx: Context, user_id: int) -> str | ServiceError:
-    """NOTE: This is memory expensive, with saves reasonably exceeding 200MB."""
+    """NOTE: This is memory expensive, with saves reasonably exceeding 200MB.
+    Prefer `stream` wherever possible."""
     data = await repositories.save_data.from_user_id(ctx, user_id)
 
     if data is None:
@@ -15,6 +19,25 @@ async def get(ctx: Context, user_id: int) -> str | ServiceError:
     return data
 
 
+async def stream(
+    ctx: Context,
+    user_id: int,
+) -> AsyncIterator[bytes] | ServiceError:
+    data = await repositories.save_data.stream_from_user_id(ctx, user_id)
+
+    if data is None:
+        return ServiceError.SAVE_DATA_NOT_FOUND
+
+    return data
+
+
+def _save_data_suffix(game_version: int, binary_version: int) -> str:
+    # the 'a' are a placeholder for mappack strings and completed levels.
+    # Unfortunately, afaik, they are only achievable through save data parsing
+    # which I currently don't want to do.
+    return f";{game_version};{binary_version};a;a"
+
+
 async def save(
     ctx: Context,
     user_id: int,
@@ -23,12 +46,32 @@ async def save(
     binary_version: int,
 ) -> None | ServiceError:
     # TODO: Data parsing
-
-    # the 'a' are a placeholder for mappack strings and completed levels.
-    # Unfortunately, afaik, they are only achievable through save data parsing
-    # which I currently don't want to do.
-    data += f";{game_version};{binary_version};a;a"
+    data += _save_data_suffix(game_version, binary_version)
 
     await repositories.save_data.create(ctx, user_id, data)
 
     return None
+
+
+async def open_save(ctx: Context, user_id: int) -> BlobWriter:
+    """Opens the user's save data for writing in chunks. The new save only
+    replaces the old one once finished with `finish_save`."""
+
+    return await repositories.save_data.open_create(ctx, user_id)
+
+
+async def finish_save(
+    writer: BlobWriter,
+    game_version: int,
+    binary_version: int,
+) -> None | ServiceError:
+    try:
+        await writer.write(_save_data_suffix(game_version, binary_version).encode())
+        await writer.commit()
+    except Exception:
+        # Otherwise the partially written save (such as a temporary file or
+        # a multipart upload) is left behind.
+        await writer.abort()
+        raise
+
+    return None
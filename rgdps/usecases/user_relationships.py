@@ -33,9 +33,14 @@ async def get_user(
         include_deleted=False,
     )
 
+    users = await repositories.user.from_ids(
+        ctx,
+        [relationship.target_user_id for relationship in relationships],
+    )
+
     relationships_responses = []
     for relationship in relationships:
-        user = await repositories.user.from_id(ctx, relationship.target_user_id)
+        user = users.get(relationship.target_user_id)
 
         if user is None:
             continue
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import NamedTuple
 
 from rgdps import repositories
 from rgdps.common import hashes
+from rgdps.common import sync
 from rgdps.common.context import Context
 from rgdps.constants.errors import ServiceError
 from rgdps.constants.friends import FriendStatus
@@ -15,6 +17,13 @@ from rgdps.constants.users import UserRelationshipType
 from rgdps.models.friend_request import FriendRequest
 from rgdps.models.user import User
 
+SEARCH_SYNC_CHUNK_SIZE = 1000
+SEARCH_SYNC_CONCURRENCY = 4
+# Incremental synchronisations also resend rows modified shortly before the
+# previous one started, as `modified_ts` is set when a row is written rather
+# than when its transaction commits.
+SEARCH_SYNC_OVERLAP = timedelta(minutes=5)
+
 
 async def register(
     ctx: Context,
@@ -205,6 +214,8 @@ async def update_stats(
     if updated_user is None:
         return ServiceError.USER_NOT_FOUND
 
+    await repositories.leaderboard.drop_rendered_with_user(ctx, user_id)
+
     if update_rank:
         await repositories.leaderboard.set_star_count(ctx, user.id, updated_user.stars)
 
@@ -240,6 +251,8 @@ async def update_user_settings(
     if updated_user is None:
         return ServiceError.USER_NOT_FOUND
 
+    await repositories.leaderboard.drop_rendered_with_user(ctx, user_id)
+
     return updated_user
 
 
@@ -275,6 +288,8 @@ async def update_privileges(
     if updated_user is None:
         return ServiceError.USER_NOT_FOUND
 
+    await repositories.leaderboard.drop_rendered_with_user(ctx, user_id)
+
     return updated_user
 
 
@@ -295,17 +310,40 @@ async def request_status(
     return UserPrivilegeLevel.NONE
 
 
-async def synchronise_search(ctx: Context) -> bool | ServiceError:
-    users = await repositories.user.all_ids(ctx)
-
-    for user_id in users:
-        user = await repositories.user.from_id(ctx, user_id)
+async def synchronise_search(
+    ctx: Context,
+    incremental: bool = False,
+) -> bool | ServiceError:
+    """Synchronise the search index with the backing database.
+    When `incremental` is set, only users modified since the last
+    synchronisation are sent.
+    """
+
+    # Taken from MySQL so that it is comparable with `modified_ts`.
+    sync_ts = await repositories.user.get_db_ts(ctx) - SEARCH_SYNC_OVERLAP
+    modified_since = None
+    if incremental:
+        modified_since = await repositories.user.get_meili_sync_ts(ctx)
+
+    async def fetch_chunk(after_id: int, limit: int) -> list[User]:
+        return await repositories.user.from_db_after_id(
+            ctx,
+            after_id,
+            limit,
+            modified_since=modified_since,
+        )
 
-        if not user:
-            continue
+    async def handle_chunk(users: list[User]) -> None:
+        await repositories.user.create_meili_many(ctx, users)
 
-        await repositories.user.create_meili(ctx, user)
+    await sync.synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=SEARCH_SYNC_CHUNK_SIZE,
+        concurrency=SEARCH_SYNC_CONCURRENCY,
+    )
 
+    await repositories.user.set_meili_sync_ts(ctx, sync_ts)
     return True
 
 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3.10
+from __future__ import annotations
+
+import sys
+
+# This is a hack to allow the script to be run from the root directory.
+sys.path.append(".")
+
+# A one-shot tool storing the data security hash and size of levels uploaded
+# before these were stored alongside the level. Levels missing them have the
+# hash computed on every download until then. Safe to re-run at any point.
+import asyncio
+import urllib.parse
+from dataclasses import dataclass
+
+from databases import DatabaseURL
+from redis.asyncio import Redis
+
+from rgdps import logger
+from rgdps.common.context import DataContext
+from rgdps.config import config
+from rgdps.services.mysql import MySQLService
+from rgdps.services.storage import AbstractStorage
+from rgdps.services.storage import CompressedStorage
+from rgdps.services.storage import LocalStorage
+from rgdps.services.storage import S3Storage
+from rgdps.usecases import levels
+
+
+@dataclass
+class BackfillContext(DataContext):
+    _mysql: MySQLService
+    _redis: Redis
+    _storage: AbstractStorage
+
+    @property
+    def mysql(self) -> MySQLService:
+        return self._mysql
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis
+
+    @property
+    def storage(self) -> AbstractStorage:
+        return self._storage
+
+
+async def main() -> int:
+    logger.init_basic_logging(config.log_level)
+
+    database_url = DatabaseURL(
+        "mysql+asyncmy://{username}:{password}@{host}:{port}/{db}".format(
+            username=config.sql_user,
+            password=urllib.parse.quote(config.sql_pass),
+            host=config.sql_host,
+            port=config.sql_port,
+            db=config.sql_db,
+        ),
+    )
+    mysql = MySQLService(database_url)
+    await mysql.connect()
+
+    redis = Redis.from_url(
+        f"redis://{config.redis_host}:{config.redis_port}/{config.redis_db}",
+    )
+    await redis.initialize()
+
+    if config.s3_enabled:
+        storage = S3Storage(
+            region=config.s3_region,
+            endpoint=config.s3_endpoint,
+            access_key=config.s3_access_key,
+            secret_key=config.s3_secret_key,
+            bucket=config.s3_bucket,
+            retries=10,
+            timeout=5,
+            upload_concurrency=config.s3_upload_concurrency,
+            upload_memory_budget=config.s3_upload_memory_budget,
+        )
+        await storage.connect()
+    else:
+        storage = LocalStorage(
+            root=config.local_root,
+            io_threads=config.local_io_threads,
+        )
+
+    # The level data is read, so has to be decompressed.
+    ctx = BackfillContext(
+        mysql,
+        redis,
+        CompressedStorage(storage, level=config.storage_compression_level),
+    )
+
+    try:
+        updated_count = await levels.backfill_data_security(ctx)
+    finally:
+        await storage.disconnect()
+        await redis.close()
+        await mysql.disconnect()
+
+    logger.info(
+        "Backfilled level data security hashes.",
+        extra={
+            "updated_count": updated_count,
+        },
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3.10
+from __future__ import annotations
+
+import sys
+
+# This is a hack to allow the script to be run from the root directory.
+sys.path.append(".")
+
+# The garbage collector for stored level data. Level data is only deleted
+# once it has been found unreferenced by two runs at least a grace period
+# apart, so it is meant to be run periodically (eg. daily).
+import asyncio
+import urllib.parse
+from dataclasses import dataclass
+
+from databases import DatabaseURL
+from redis.asyncio import Redis
+
+from rgdps import logger
+from rgdps.common.context import DataContext
+from rgdps.config import config
+from rgdps.services.mysql import MySQLService
+from rgdps.services.storage import AbstractStorage
+from rgdps.services.storage import LocalStorage
+from rgdps.services.storage import S3Storage
+from rgdps.usecases import levels
+
+# How long level data has to remain unreferenced before it is deleted.
+GRACE_PERIOD = 24 * 60 * 60
+
+
+@dataclass
+class CollectorContext(DataContext):
+    _mysql: MySQLService
+    _redis: Redis
+    _storage: AbstractStorage
+
+    @property
+    def mysql(self) -> MySQLService:
+        return self._mysql
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis
+
+    @property
+    def storage(self) -> AbstractStorage:
+        return self._storage
+
+
+async def main() -> int:
+    logger.init_basic_logging(config.log_level)
+
+    database_url = DatabaseURL(
+        "mysql+asyncmy://{username}:{password}@{host}:{port}/{db}".format(
+            username=config.sql_user,
+            password=urllib.parse.quote(config.sql_pass),
+            host=config.sql_host,
+            port=config.sql_port,
+            db=config.sql_db,
+        ),
+    )
+    mysql = MySQLService(database_url)
+    await mysql.connect()
+
+    redis = Redis.from_url(
+        f"redis://{config.redis_host}:{config.redis_port}/{config.redis_db}",
+    )
+    await redis.initialize()
+
+    if config.s3_enabled:
+        storage = S3Storage(
+            region=config.s3_region,
+            endpoint=config.s3_endpoint,
+            access_key=config.s3_access_key,
+            secret_key=config.s3_secret_key,
+            bucket=config.s3_bucket,
+            retries=10,
+            timeout=5,
+            upload_concurrency=config.s3_upload_concurrency,
+            upload_memory_budget=config.s3_upload_memory_budget,
+        )
+        await storage.connect()
+    else:
+        storage = LocalStorage(
+            root=config.local_root,
+            io_threads=config.local_io_threads,
+        )
+
+    ctx = CollectorContext(mysql, redis, storage)
+
+    try:
+        result = await levels.collect_level_data(ctx, GRACE_PERIOD)
+    finally:
+        await storage.disconnect()
+        await redis.close()
+        await mysql.disconnect()
+
+    logger.info(
+        "Collected unreferenced level data.",
+        extra={
+            "orphaned_count": result.orphaned_count,
+            "deleted_count": result.deleted_count,
+            "legacy_deleted_count": result.legacy_deleted_count,
+        },
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3.10
+from __future__ import annotations
+
+import sys
+
+# This is a hack to allow the script to be run from the root directory.
+sys.path.append(".")
+
+# A one-shot tool compressing all blobs saved before storage compression was
+# introduced. Blobs that are already compressed are skipped, so it is safe to
+# re-run (or interrupt) at any point.
+#
+# NOTE: Blobs are replaced without checking whether they changed since being
+# read, so the server must not be running (or a newly uploaded save could be
+# replaced with the old one).
+import asyncio
+from contextlib import aclosing
+
+from rgdps import logger
+from rgdps.config import config
+from rgdps.services.storage import AbstractStorage
+from rgdps.services.storage import BLOB_HEADER_SIZE
+from rgdps.services.storage import BlobWriter
+from rgdps.services.storage import CompressedBlobWriter
+from rgdps.services.storage import is_encoded_blob
+from rgdps.services.storage import LocalStorage
+from rgdps.services.storage import S3Storage
+
+KEY_PREFIXES = ("levels/", "saves/")
+# Blobs are streamed, so each key in progress only holds a read chunk and a
+# write buffer (up to an S3 part) in memory, regardless of the blob's size.
+CONCURRENCY = 16
+
+
+class SizeCountingBlobWriter(BlobWriter):
+    def __init__(self, writer: BlobWriter) -> None:
+        self._writer = writer
+        self.size = 0
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        await self._writer.write(data)
+
+    async def commit(self) -> None:
+        await self._writer.commit()
+
+    async def abort(self) -> None:
+        await self._writer.abort()
+
+
+async def compress_key(storage: AbstractStorage, key: str) -> tuple[int, int]:
+    """Compresses a single key in place, returning its size before and after.
+    Returns `(0, 0)` if the key is missing or already compressed."""
+
+    chunks = await storage.open_read(key)
+    if chunks is None:
+        return 0, 0
+
+    async with aclosing(chunks):  # type: ignore
+        header = b""
+        async for chunk in chunks:
+            header += chunk
+            if len(header) >= BLOB_HEADER_SIZE:
+                break
+
+        if not header or is_encoded_blob(header):
+            return 0, 0
+
+        encoded_writer = SizeCountingBlobWriter(await storage.open_write(key))
+        async with CompressedBlobWriter(
+            encoded_writer,
+            config.storage_compression_level,
+        ) as writer:
+            size = len(header)
+            await writer.write(header)
+
+            async for chunk in chunks:
+                size += len(chunk)
+                await writer.write(chunk)
+
+    return size, encoded_writer.size
+
+
+async def compress_prefix(storage: AbstractStorage, prefix: str) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    tasks: set[asyncio.Task[tuple[int, int]]] = set()
+
+    key_count = 0
+    size_before = 0
+    size_after = 0
+
+    def on_done(task: asyncio.Task[tuple[int, int]]) -> None:
+        nonlocal key_count, size_before, size_after
+        tasks.discard(task)
+        semaphore.release()
+
+        if task.cancelled():
+            return
+
+        if (exc := task.exception()) is not None:
+            logger.error(
+                "Failed to compress a key.",
+                exc_info=exc,
+            )
+            return
+
+        before, after = task.result()
+        if before:
+            key_count += 1
+            size_before += before
+            size_after += after
+
+    async for key in storage.iter_keys(prefix):
+        await semaphore.acquire()
+        task = asyncio.create_task(compress_key(storage, key))
+        tasks.add(task)
+        task.add_done_callback(on_done)
+
+    if tasks:
+        await asyncio.wait(tasks)
+
+    logger.info(
+        "Compressed the storage prefix.",
+        extra={
+            "prefix": prefix,
+            "key_count": key_count,
+            "size_before": size_before,
+            "size_after": size_after,
+        },
+    )
+
+
+async def main() -> int:
+    logger.init_basic_logging(config.log_level)
+
+    if config.s3_enabled:
+        storage = S3Storage(
+            region=config.s3_region,
+            endpoint=config.s3_endpoint,
+            access_key=config.s3_access_key,
+            secret_key=config.s3_secret_key,
+            bucket=config.s3_bucket,
+            retries=10,
+            timeout=5,
+            upload_concurrency=config.s3_upload_concurrency,
+            upload_memory_budget=config.s3_upload_memory_budget,
+        )
+        await storage.connect()
+    else:
+        storage = LocalStorage(
+            root=config.local_root,
+            io_threads=config.local_io_threads,
+        )
+
+    try:
+        for prefix in KEY_PREFIXES:
+            logger.info(
+                "Compressing the storage prefix...",
+                extra={
+                    "prefix": prefix,
+                },
+            )
+            await compress_prefix(storage, prefix)
+    finally:
+        await storage.disconnect()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
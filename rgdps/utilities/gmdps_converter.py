@@ -39,8 +39,11 @@ from rgdps.constants.users import UserRelationshipType
 from rgdps.constants.users import DEFAULT_PRIVILEGES
 from rgdps.constants.users import UserPrivileges
 from rgdps.constants.songs import SongSource
+from rgdps.services.meili import MeiliIndexQueue
 from rgdps.services.mysql import MySQLService
 from rgdps.services.storage import AbstractStorage
+from rgdps.models.level import Level
+from rgdps.models.song import Song
 from rgdps.models.user import User
 
 if TYPE_CHECKING:
@@ -57,7 +60,12 @@ class ConverterContext(Context):
     _mysql: MySQLService
     _redis: Redis
     _meili: MeiliClient
+    _meili_queue: MeiliIndexQueue
     _user_cache: AbstractAsyncCache[User]
+    _user_name_cache: AbstractAsyncCache[int]
+    _level_cache: AbstractAsyncCache[Level]
+    _song_cache: AbstractAsyncCache[Song]
+    _song_miss_cache: AbstractAsyncCache[bool]
     _password_cache: AbstractAsyncCache[str]
     _http: httpx.AsyncClient
     old_sql: MySQLService
@@ -75,10 +83,34 @@ class ConverterContext(Context):
     def meili(self) -> MeiliClient:
         return self._meili
 
+    @property
+    def meili_queue(self) -> MeiliIndexQueue:
+        return self._meili_queue
+
     @property
     def user_cache(self) -> AbstractAsyncCache[User]:
         return self._user_cache
 
+    @property
+    def user_name_cache(self) -> AbstractAsyncCache[int]:
+        return self._user_name_cache
+
+    @property
+    def level_cache(self) -> AbstractAsyncCache[Level]:
+        return self._level_cache
+
+    @property
+    def level_data_cache(self) -> AbstractAsyncCache[bytes]:
+        raise NotImplementedError("The GMDPS converter does not use storage.")
+
+    @property
+    def song_cache(self) -> AbstractAsyncCache[Song]:
+        return self._song_cache
+
+    @property
+    def song_miss_cache(self) -> AbstractAsyncCache[bool]:
+        return self._song_miss_cache
+
     @property
     def password_cache(self) -> AbstractAsyncCache[str]:
         return self._password_cache
@@ -161,8 +193,14 @@ async def get_context() -> ConverterContext:
         timeout=10,
     )
     await meili.health()
+    meili_queue = MeiliIndexQueue(meili)
+    meili_queue.start()
 
     user_cache = SimpleAsyncMemoryCache[User]()
+    user_name_cache = SimpleAsyncMemoryCache[int]()
+    level_cache = SimpleAsyncMemoryCache[Level]()
+    song_cache = SimpleAsyncMemoryCache[Song]()
+    song_miss_cache = SimpleAsyncMemoryCache[bool]()
     password_cache = SimpleAsyncMemoryCache[str]()
     http = httpx.AsyncClient()
 
@@ -172,7 +210,12 @@ async def get_context() -> ConverterContext:
         mysql,
         redis,
         meili,
+        meili_queue,
         user_cache,
+        user_name_cache,
+        level_cache,
+        song_cache,
+        song_miss_cache,
         password_cache,
         http,
         old_sql,
@@ -596,6 +639,7 @@ async def main() -> int:
             "Failed to convert data!",
         )
 
+    await ctx.meili_queue.stop()
     logger.info("Migration complete!")
     # TODO: Look into a better approach to stop docker
     # from restarting the container.
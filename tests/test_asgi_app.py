@@ -22,6 +22,10 @@ def test_meili_exists(app: FastAPI) -> None:
     assert app.state.meili is not None
 
 
+def test_meili_queue_exists(app: FastAPI) -> None:
+    assert app.state.meili_queue is not None
+
+
 def test_http_exists(app: FastAPI) -> None:
     assert app.state.http is not None
 
@@ -30,5 +34,21 @@ def test_user_cache_exists(app: FastAPI) -> None:
     assert app.state.user_cache is not None
 
 
+def test_level_cache_exists(app: FastAPI) -> None:
+    assert app.state.level_cache is not None
+
+
+def test_level_data_cache_exists(app: FastAPI) -> None:
+    assert app.state.level_data_cache is not None
+
+
+def test_song_cache_exists(app: FastAPI) -> None:
+    assert app.state.song_cache is not None
+
+
+def test_song_miss_cache_exists(app: FastAPI) -> None:
+    assert app.state.song_miss_cache is not None
+
+
 def test_password_cache_exists(app: FastAPI) -> None:
     assert app.state.password_cache is not None
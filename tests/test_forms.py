@@ -0,0 +1,68 @@
+import urllib.parse
+from typing import AsyncIterator
+
+from rgdps.api.forms import StreamingForm
+
+
+class ChunkedRequest:
+    def __init__(self, body: bytes, chunk_size: int) -> None:
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        for idx in range(0, len(self.body), self.chunk_size):
+            yield self.body[idx : idx + self.chunk_size]
+
+
+async def test_streaming_form_splits_escapes() -> None:
+    """Tests that a streamed field is decoded correctly regardless of where
+    the body is split, including within percent escapes."""
+
+    fields = {
+        "userName": "user name",
+        "password": "pass&word",
+        "saveData": "H4sI+AAA=;%;é" * 50,
+        "gameVersion": "21",
+    }
+    body = urllib.parse.urlencode(fields).encode()
+
+    for chunk_size in (1, 2, 3, 5, len(body)):
+        form = StreamingForm(ChunkedRequest(body, chunk_size))  # type: ignore
+        data = await form.stream("saveData")
+
+        assert data is not None
+        assert b"".join([chunk async for chunk in data]) == fields["saveData"].encode()
+        assert form.fields == {
+            "userName": "user name",
+            "password": "pass&word",
+        }
+        assert await form.read_remaining() == {
+            "userName": "user name",
+            "password": "pass&word",
+            "gameVersion": "21",
+        }
+
+
+async def test_streaming_form_missing_field() -> None:
+    form = StreamingForm(ChunkedRequest(b"a=1&b", 2))  # type: ignore
+
+    assert await form.stream("saveData") is None
+    assert form.fields == {"a": "1", "b": ""}
+
+
+async def test_streaming_form_fields_after_stream() -> None:
+    """Tests that fields sent after the streamed field are only available
+    once it has been read, as the save data upload relies on."""
+
+    body = b"saveData=abc&userName=user&password=pass&gameVersion=21"
+    form = StreamingForm(ChunkedRequest(body, 4))  # type: ignore
+    data = await form.stream("saveData")
+
+    assert data is not None
+    assert form.fields == {}
+    assert b"".join([chunk async for chunk in data]) == b"abc"
+    assert await form.read_remaining() == {
+        "userName": "user",
+        "password": "pass",
+        "gameVersion": "21",
+    }
@@ -0,0 +1,235 @@
+import asyncio
+import time
+from typing import Any
+from typing import AsyncIterator
+
+import pytest
+
+from rgdps.common import hashes
+from rgdps.repositories import level_data
+from rgdps.usecases import levels
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self._redis = redis
+        self._calls: list[tuple[str, tuple[Any, ...]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+    def hsetnx(self, *args: Any) -> None:
+        self._calls.append(("hsetnx", args))
+
+    def hmget(self, *args: Any) -> None:
+        self._calls.append(("hmget", args))
+
+    async def execute(self) -> list[Any]:
+        return [await getattr(self._redis, name)(*args) for name, args in self._calls]
+
+
+class FakeRedis:
+    """Implements the Redis commands (and scripts) used by the level data
+    repository, storing values as strings as Redis would."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.keys: set[str] = set()
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def hsetnx(self, key: str, field: str, value: float) -> int:
+        fields = self.hashes.setdefault(key, {})
+        if field in fields:
+            return 0
+
+        fields[field] = repr(value)
+        return 1
+
+    async def hmget(self, key: str, fields: list[str]) -> list[bytes | None]:
+        values = self.hashes.get(key, {})
+        return [values[field].encode() if field in values else None for field in fields]
+
+    async def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    async def exists(self, key: str) -> int:
+        return int(key in self.keys)
+
+    async def delete(self, key: str) -> None:
+        self.keys.discard(key)
+
+    async def eval(self, script: str, _: int, *args: Any) -> int:
+        if script == level_data.CLAIM_ORPHAN_SCRIPT:
+            orphans_key, deleting_key, data_hash, marked_ts, _ = args
+            if self.hashes.get(orphans_key, {}).get(data_hash) != marked_ts:
+                return 0
+
+            await self.hdel(orphans_key, data_hash)
+            self.keys.add(deleting_key)
+            return 1
+
+        if script == level_data.UNMARK_ORPHAN_SCRIPT:
+            orphans_key, deleting_key, data_hash = args
+            await self.hdel(orphans_key, data_hash)
+            return await self.exists(deleting_key)
+
+        raise NotImplementedError
+
+
+class FakeMySQL:
+    """Answers the level data hash queries from a set of referenced hashes."""
+
+    def __init__(self) -> None:
+        self.referenced: set[str] = set()
+
+    async def fetch_all(
+        self,
+        query: str,
+        values: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        assert query.startswith("SELECT DISTINCT data_hash FROM levels")
+        return [
+            {"data_hash": data_hash}
+            for data_hash in values.values()
+            if data_hash in self.referenced
+        ]
+
+
+class FakeStorage:
+    def __init__(self) -> None:
+        self.blobs: dict[str, bytes] = {}
+
+    async def save(self, key: str, data: bytes) -> None:
+        self.blobs[key] = data
+
+    async def delete(self, key: str) -> None:
+        self.blobs.pop(key, None)
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        for key in list(self.blobs):
+            if key.startswith(prefix):
+                yield key
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.mysql = FakeMySQL()
+        self.redis = FakeRedis()
+        self.storage = FakeStorage()
+
+
+def data_key(data_hash: str) -> str:
+    return level_data.DATA_HASH_KEY_PREFIX + data_hash
+
+
+@pytest.fixture
+def ctx() -> FakeContext:
+    return FakeContext()
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+async def test_collect_deletes_after_grace_period(
+    ctx: FakeContext,
+    clock: list[float],
+) -> None:
+    """Tests that unreferenced data is only deleted once it has remained
+    unreferenced for the grace period, and referenced data never is."""
+
+    ctx.storage.blobs = {data_key("orphan"): b"a", data_key("used"): b"b"}
+    ctx.mysql.referenced = {"used"}
+
+    result = await levels.collect_level_data(ctx, 100)  # type: ignore
+    assert result.orphaned_count == 1
+    assert result.deleted_count == 0
+
+    clock[0] += 100
+    result = await levels.collect_level_data(ctx, 100)  # type: ignore
+    assert result.deleted_count == 1
+    assert ctx.storage.blobs == {data_key("used"): b"b"}
+    assert not ctx.redis.keys
+
+
+async def test_collect_restarts_grace_period_on_upload(
+    ctx: FakeContext,
+    clock: list[float],
+) -> None:
+    """Tests that data uploaded again after being found unreferenced has its
+    grace period restarted."""
+
+    data = b"level data"
+    data_hash = hashes.hash_level_data_content(data)
+    ctx.storage.blobs = {data_key(data_hash): data}
+
+    await levels.collect_level_data(ctx, 100)  # type: ignore
+
+    clock[0] += 50
+    await levels._store_level_data(ctx, data)  # type: ignore
+
+    clock[0] += 50
+    result = await levels.collect_level_data(ctx, 100)  # type: ignore
+    assert result.deleted_count == 0
+    assert data_key(data_hash) in ctx.storage.blobs
+
+
+async def test_collect_rechecks_references_after_claim(
+    ctx: FakeContext,
+    clock: list[float],
+) -> None:
+    """Tests that claimed data referenced by a level since it was marked is
+    not deleted."""
+
+    ctx.storage.blobs = {data_key("orphan"): b"a"}
+    await levels.collect_level_data(ctx, 100)  # type: ignore
+
+    clock[0] += 100
+    claim_orphan = level_data.claim_orphan
+
+    async def claim_and_reference(*args: Any) -> bool:
+        claimed = await claim_orphan(*args)
+        ctx.mysql.referenced.add("orphan")
+        return claimed
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(level_data, "claim_orphan", claim_and_reference)
+        result = await levels.collect_level_data(ctx, 100)  # type: ignore
+
+    assert result.deleted_count == 0
+    assert data_key("orphan") in ctx.storage.blobs
+    assert not ctx.redis.keys
+
+
+async def test_store_level_data_during_deletion(
+    ctx: FakeContext,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests that data stored while the collector is deleting it is stored
+    again once the deletion is done."""
+
+    monkeypatch.setattr(level_data, "DELETING_POLL_INTERVAL", 0)
+    data = b"level data"
+    data_hash = hashes.hash_level_data_content(data)
+    ctx.storage.blobs = {data_key(data_hash): data}
+    ctx.redis.keys.add(level_data.DELETING_KEY_PREFIX + data_hash)
+
+    store = asyncio.create_task(levels._store_level_data(ctx, data))  # type: ignore
+    await asyncio.sleep(0.01)
+    assert not store.done()
+
+    # The collector deletes the data after it was stored.
+    await level_data.delete_from_data_hash(ctx, data_hash)  # type: ignore
+    await level_data.release_orphan(ctx, data_hash)  # type: ignore
+
+    assert await store == data_hash
+    assert ctx.storage.blobs == {data_key(data_hash): data}
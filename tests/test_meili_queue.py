@@ -0,0 +1,39 @@
+import pytest
+
+from rgdps.services.meili import _merge_writes
+from rgdps.services.meili import _PendingWrite
+from rgdps.services.meili import MeiliOperation
+
+ADD = MeiliOperation.ADD
+UPDATE = MeiliOperation.UPDATE
+DELETE = MeiliOperation.DELETE
+
+
+@pytest.mark.parametrize(
+    ("older", "newer", "expected"),
+    [
+        (ADD, ADD, (ADD, {"id": 1, "b": 2})),
+        (ADD, UPDATE, (ADD, {"id": 1, "a": 1, "b": 2})),
+        (ADD, DELETE, (DELETE, {"id": 1, "b": 2})),
+        (UPDATE, ADD, (ADD, {"id": 1, "b": 2})),
+        (UPDATE, UPDATE, (UPDATE, {"id": 1, "a": 1, "b": 2})),
+        (UPDATE, DELETE, (DELETE, {"id": 1, "b": 2})),
+        (DELETE, ADD, (ADD, {"id": 1, "b": 2})),
+        (DELETE, UPDATE, (DELETE, {"id": 1, "a": 1})),
+        (DELETE, DELETE, (DELETE, {"id": 1, "b": 2})),
+    ],
+)
+def test_merge_writes(
+    older: MeiliOperation,
+    newer: MeiliOperation,
+    expected: tuple[MeiliOperation, dict],
+) -> None:
+    """Tests that coalescing two writes has the same end result as sending
+    them in order."""
+
+    merged = _merge_writes(
+        _PendingWrite(older, {"id": 1, "a": 1}),
+        _PendingWrite(newer, {"id": 1, "b": 2}),
+    )
+
+    assert (merged.operation, merged.document) == expected
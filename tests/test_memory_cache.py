@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from rgdps.common.cache.memory import LRUAsyncMemoryCache
+
+
+async def test_lru_evicts_least_recently_used() -> None:
+    """Tests that a full cache evicts the least recently used key."""
+
+    cache = LRUAsyncMemoryCache[str](capacity=2)
+    await cache.set(1, "a")
+    await cache.set(2, "b")
+    await cache.get(1)
+    await cache.set(3, "c")
+
+    assert await cache.get_many([1, 2, 3]) == ["a", None, "c"]
+    assert len(cache) == 2
+    assert cache.metrics.evictions == 1
+    assert cache.metrics.hits == 3
+    assert cache.metrics.misses == 1
+
+
+async def test_lru_expires_values() -> None:
+    """Tests that values are not returned once they have expired."""
+
+    cache = LRUAsyncMemoryCache[str](capacity=2, expiry=timedelta(seconds=0))
+    await cache.set(1, "a")
+
+    assert await cache.get(1) is None
+    assert len(cache) == 0
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from rgdps.services import storage
+from rgdps.services.storage import S3UploadQueue
+
+
+class FakeUpload:
+    def __init__(self) -> None:
+        self.uploaded: dict[str, bytes] = {}
+        self.calls: list[str] = []
+        self.errors: list[Exception] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, key: str, data: bytes) -> None:
+        self.calls.append(key)
+        await self.release.wait()
+
+        if self.errors:
+            raise self.errors.pop(0)
+
+        self.uploaded[key] = data
+
+
+class PermanentError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storage, "S3_UPLOAD_RETRY_DELAY", 0)
+
+
+async def test_put_supersedes_pending_data() -> None:
+    """Tests that saving a key before it is uploaded replaces its pending
+    data, which is readable until uploaded."""
+
+    upload = FakeUpload()
+    queue = S3UploadQueue(upload, concurrency=1)
+
+    await queue.put("a", b"old")
+    await queue.put("a", b"new")
+    assert queue.get("a") == b"new"
+
+    queue.start()
+    await queue.stop()
+
+    assert upload.uploaded == {"a": b"new"}
+    assert upload.calls == ["a"]
+    assert queue.get("a") is None
+    assert queue.metrics.superseded == 1
+    assert queue.metrics.pending_count == 0
+    assert queue.metrics.pending_bytes == 0
+
+
+async def test_put_waits_for_memory_budget() -> None:
+    """Tests that `put` waits once the pending data exceeds the budget."""
+
+    upload = FakeUpload()
+    upload.release.clear()
+    queue = S3UploadQueue(upload, concurrency=1, memory_budget=4)
+    queue.start()
+
+    await queue.put("a", b"1234")
+    blocked_put = asyncio.create_task(queue.put("b", b"5678"))
+    await asyncio.sleep(0.01)
+
+    assert not blocked_put.done()
+    assert queue.metrics.backpressure_waits == 1
+
+    upload.release.set()
+    await blocked_put
+    await queue.stop()
+
+    assert upload.uploaded == {"a": b"1234", "b": b"5678"}
+    assert queue.metrics.pending_bytes == 0
+
+
+async def test_failed_upload_is_retried() -> None:
+    """Tests that a failing upload keeps its data pending until it succeeds."""
+
+    upload = FakeUpload()
+    upload.errors = [Exception(), Exception()]
+    queue = S3UploadQueue(upload, concurrency=1, max_attempts=3)
+    queue.start()
+
+    await queue.put("a", b"data")
+    await queue.drain()
+    await queue.stop()
+
+    assert upload.uploaded == {"a": b"data"}
+    assert queue.metrics.failed == 2
+    assert queue.metrics.dead_lettered == 0
+
+
+async def test_failed_upload_is_dead_lettered() -> None:
+    """Tests that uploads are given up on after their attempts are exhausted,
+    or immediately on a permanent error, releasing their data."""
+
+    upload = FakeUpload()
+    upload.errors = [Exception()] * 2 + [PermanentError()]
+    queue = S3UploadQueue(
+        upload,
+        concurrency=1,
+        max_attempts=2,
+        is_permanent_error=lambda error: isinstance(error, PermanentError),
+    )
+    queue.start()
+
+    await queue.put("a", b"data")
+    await queue.drain()
+    await queue.put("b", b"data")
+    await queue.drain()
+    await queue.stop()
+
+    assert upload.uploaded == {}
+    assert upload.calls == ["a", "a", "b"]
+    assert queue.metrics.dead_lettered == 2
+    assert queue.metrics.pending_count == 0
+    assert queue.metrics.pending_bytes == 0
+    assert queue.get("a") is None
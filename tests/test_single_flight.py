@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+
+from rgdps.common.cache.memory import LRUAsyncMemoryCache
+
+
+async def test_get_or_load_coalesces_misses() -> None:
+    """Tests that concurrent misses of the same key share a single load."""
+
+    cache = LRUAsyncMemoryCache[str](capacity=10)
+    load_count = 0
+
+    async def load() -> str:
+        nonlocal load_count
+        load_count += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(1, load) for _ in range(20)),
+    )
+
+    assert results == ["value"] * 20
+    assert load_count == 1
+    assert await cache.get(1) == "value"
+
+
+async def test_delete_detaches_load_in_progress() -> None:
+    """Tests that a load in progress when its key is deleted is not cached,
+    and that later misses start a new load rather than joining it."""
+
+    cache = LRUAsyncMemoryCache[str](capacity=10)
+    value = "old"
+    loaded = asyncio.Event()
+
+    async def load() -> str:
+        loaded_value = value
+        loaded.set()
+        await asyncio.sleep(0.01)
+        return loaded_value
+
+    stale_load = asyncio.create_task(cache.get_or_load(1, load))
+    await loaded.wait()
+
+    value = "new"
+    await cache.delete(1)
+
+    assert await cache.get_or_load(1, load) == "new"
+    assert await stale_load == "old"
+    assert await cache.get(1) == "new"
+
+
+async def test_load_runs_outside_caller_context() -> None:
+    """Tests that a shared load does not inherit the first caller's context
+    variables, such as the connection `databases` binds to a request."""
+
+    request_var = contextvars.ContextVar[str]("request_var")
+    request_var.set("request")
+    cache = LRUAsyncMemoryCache[str](capacity=10)
+
+    async def load() -> str:
+        return request_var.get("pool")
+
+    assert await cache.get_or_load(1, load) == "pool"
+    assert request_var.get() == "request"
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+from rgdps.common.sync import synchronise_chunked
+
+
+@dataclass
+class Row:
+    id: int
+
+
+async def test_synchronise_chunked_visits_all_rows() -> None:
+    rows = [Row(row_id) for row_id in range(1, 26)]
+    handled: list[Row] = []
+
+    async def fetch_chunk(after_id: int, limit: int) -> list[Row]:
+        return [row for row in rows if row.id > after_id][:limit]
+
+    async def handle_chunk(chunk: list[Row]) -> None:
+        handled.extend(chunk)
+
+    row_count = await synchronise_chunked(
+        fetch_chunk,
+        handle_chunk,
+        chunk_size=10,
+        concurrency=2,
+    )
+
+    assert row_count == 25
+    assert sorted(row.id for row in handled) == list(range(1, 26))